@@ -1,7 +1,7 @@
 """
 Benchmark comparing FM-only vs Multilevel (ML) partition manager on ibm01 and p1.
 
-Runs both testcases with K={2,3,5}, BAL_TOL=0.45, LIMITSIZE=10.
+Runs both testcases with K={2,3,5}, BAL_TOL=0.45 and the adaptive coarsening limit.
 """
 
 import time
@@ -23,7 +23,7 @@ from ckpttnpy.MLPartMgr import MLBiPartMgr, MLKWayPartMgr
 SEED = 42
 NUM_RUNS = 5
 BAL_TOL = 0.45
-LIMITSIZE = 10
+LIMITSIZE = None  # adaptive, see MLPartMgr._coarsen_further
 K_VALUES = [2, 3, 5]
 
 
@@ -0,0 +1,307 @@
+"""Index-based bounded priority queue for the FM gain buckets.
+
+ArrayBPQueue offers the same bucket semantics as ``mywheel.BPQueue`` but keeps
+the doubly-linked lists in three preallocated integer arrays (next, prev and
+key) indexed by vertex number, instead of one ``Dllink`` object per vertex and
+part. A vertex that has been popped or detached is "free": it is in no bucket,
+and a later ``modify_key`` inserts it again, which replaces the waiting list
+used with BPQueue. A locked vertex points to itself and ignores key updates.
+"""
+
+from typing import Iterator
+
+FREE = -1  # next[i] of an item that is in no bucket
+
+
+class ArrayBPQueue:
+    r"""Bounded priority queue with integer keys in [a..b] over items 0..n-1.
+
+    Items and bucket headers share the ``_next``/``_prev`` arrays: item ``i``
+    lives at index ``i`` and the header of internal key ``k`` at index
+    ``n + k``. As in BPQueue, internal keys are shifted by an offset so that
+    key 0 is a sentinel bucket that is never empty, which bounds the search
+    for the maximum without an extra check.
+
+    .. svgbob::
+       :align: center
+
+                  items 0..n-1              headers n+0 .. n+high
+              +---+---+-----+----+    +-----+-----+-----+-----+
+        _next | 2 | 1 | n+2 | -1 |    |  -1 | n+1 |  0  | ... |
+              +---+---+-----+----+    +-----+-----+-----+-----+
+                |   |    |     |         |     |     |
+                |   |    |    free       |   empty   "bucket 2: 0 -> 2"
+                |  locked  \          sentinel
+                 \          "back to header"
+                  "0 -> 2"
+
+    Examples:
+        >>> bpq = ArrayBPQueue(-3, 3, 4)
+        >>> bpq.append(0, 1)
+        >>> bpq.append(2, 1)
+        >>> bpq.appendleft(3, -2)
+        >>> bpq.get_max()
+        1
+        >>> bpq.popleft(), bpq.popleft(), bpq.popleft()
+        (0, 2, 3)
+        >>> bpq.is_empty()
+        True
+    """
+
+    __slots__ = ("_max", "_offset", "_high", "_head", "_next", "_prev", "_key")
+
+    def __init__(self, a: int, b: int, n: int) -> None:
+        """
+        The function preallocates the link and key arrays for `n` items and the
+        `b - a + 2` bucket headers.
+
+        :param a: The lowest key that can be stored
+        :param b: The highest key that can be stored
+        :param n: The number of items, which are numbered 0..n-1
+        """
+        assert a <= b
+        self._max = 0
+        self._offset = a - 1
+        self._high = b - self._offset
+        self._head = n
+        size = n + self._high + 1
+        self._next = list(range(size))
+        self._prev = list(range(size))
+        self._key = [0] * n
+        self._next[n] = FREE  # sentinel: bucket 0 never looks empty
+        self.clear()
+
+    def is_empty(self) -> bool:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.is_empty()
+            True
+        """
+        return self._max == 0
+
+    def get_max(self) -> int:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.get_max()
+            -4
+        """
+        return self._max + self._offset
+
+    def clear(self) -> None:
+        """
+        The function empties all buckets and marks every item as free.
+
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.append(1, 2)
+            >>> bpq.clear()
+            >>> bpq.is_empty()
+            True
+        """
+        head = self._head
+        headers = range(head + 1, head + self._high + 1)
+        self._next[head + 1 :] = headers
+        self._prev[head + 1 :] = headers
+        self._next[:head] = [FREE] * head
+        self._max = 0
+
+    def get_key(self, i: int) -> int:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.append(1, 2)
+            >>> bpq.get_key(1)
+            2
+        """
+        return self._key[i] + self._offset
+
+    def set_key(self, i: int, gain: int) -> None:
+        """
+        The function sets the key of item `i` without moving it between buckets,
+        so it is meant for free items.
+
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.set_key(0, 0)
+            >>> bpq.get_key(0)
+            0
+        """
+        self._key[i] = gain - self._offset
+
+    def appendleft(self, i: int, k: int) -> None:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 3)
+            >>> bpq.appendleft(0, 0)
+            >>> bpq.appendleft(1, 1)
+            >>> bpq.appendleft(2, 0)
+            >>> bpq.popleft(), bpq.popleft(), bpq.popleft()
+            (1, 2, 0)
+        """
+        assert k > self._offset
+        key = k - self._offset
+        self._key[i] = key
+        if self._max < key:
+            self._max = key
+        self._attach_front(i, key)
+
+    def append(self, i: int, k: int) -> None:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.append(0, 0)
+            >>> bpq.append(1, 0)
+            >>> bpq.popleft(), bpq.popleft()
+            (0, 1)
+        """
+        assert k > self._offset
+        key = k - self._offset
+        self._key[i] = key
+        if self._max < key:
+            self._max = key
+        self._attach_back(i, key)
+
+    def popleft(self) -> int:
+        """
+        The function removes the first item of the highest bucket and returns
+        it; the item becomes free.
+
+        :return: the index of the removed item
+        """
+        nxt = self._next
+        h = self._head + self._max
+        res = nxt[h]
+        self._unlink(res)
+        nxt[res] = FREE
+        self._update_max_key()
+        return res
+
+    def modify_key(self, i: int, delta: int) -> None:
+        """
+        The function changes the key of item `i` by `delta`. A free item is
+        (re)inserted, a locked item is left untouched. As in BPQueue, an
+        increased item goes to the front of its bucket and a decreased item to
+        the back.
+
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.appendleft(0, 0)
+            >>> bpq.modify_key(0, 1)
+            >>> bpq.get_key(0)
+            1
+            >>> bpq.set_key(1, 0)
+            >>> bpq.modify_key(1, -2)  # free item is inserted
+            >>> bpq.get_key(1)
+            -2
+            >>> bpq.lock(0)
+            >>> bpq.modify_key(0, 2)  # locked
+            >>> bpq.get_key(0), bpq.get_max()
+            (1, -2)
+        """
+        nxt, prv = self._next, self._prev
+        n = nxt[i]
+        if n == i or delta == 0:  # locked or no change
+            return
+        if n != FREE:  # unlink (inlined, this is the hot path)
+            p = prv[i]
+            nxt[p] = n
+            prv[n] = p
+        key = self._key[i] + delta
+        assert 0 < key <= self._high
+        self._key[i] = key
+        h = self._head + key
+        if delta > 0:  # LIFO
+            n = nxt[h]
+            nxt[i] = n
+            prv[i] = h
+            prv[n] = i
+            nxt[h] = i
+        else:  # FIFO
+            p = prv[h]
+            nxt[i] = h
+            prv[i] = p
+            nxt[p] = i
+            prv[h] = i
+        if self._max < key:  # item may not be in the queue
+            self._max = key
+        else:
+            self._update_max_key()
+
+    def detach(self, i: int) -> None:
+        """
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 2)
+            >>> bpq.appendleft(0, 0)
+            >>> bpq.detach(0)
+            >>> bpq.is_empty()
+            True
+        """
+        nxt = self._next[i]
+        if nxt == i or nxt == FREE:
+            return
+        self._unlink(i)
+        self._next[i] = FREE
+        if self._key[i] == self._max:
+            self._update_max_key()
+
+    def lock(self, i: int) -> None:
+        """
+        The function detaches item `i` and locks it, so that it ignores key
+        updates until the next `clear`.
+        """
+        self.detach(i)
+        self._next[i] = i  # lock
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        The function traverses the items in descending key order.
+
+        Examples:
+            >>> bpq = ArrayBPQueue(-3, 3, 3)
+            >>> bpq.append(0, -1)
+            >>> bpq.append(1, 2)
+            >>> bpq.append(2, -1)
+            >>> list(bpq)
+            [1, 0, 2]
+        """
+        nxt = self._next
+        for key in range(self._max, 0, -1):
+            h = self._head + key
+            i = nxt[h]
+            while i != h:
+                yield i
+                i = nxt[i]
+
+    # private:
+
+    def _attach_front(self, i: int, key: int) -> None:
+        nxt, prv = self._next, self._prev
+        h = self._head + key
+        first = nxt[h]
+        nxt[i] = first
+        prv[i] = h
+        prv[first] = i
+        nxt[h] = i
+
+    def _attach_back(self, i: int, key: int) -> None:
+        nxt, prv = self._next, self._prev
+        h = self._head + key
+        last = prv[h]
+        nxt[i] = h
+        prv[i] = last
+        nxt[last] = i
+        prv[h] = i
+
+    def _unlink(self, i: int) -> None:
+        nxt, prv = self._next, self._prev
+        n, p = nxt[i], prv[i]
+        nxt[p] = n
+        prv[n] = p
+
+    def _update_max_key(self) -> None:
+        nxt = self._next
+        head = self._head
+        while nxt[head + self._max] == head + self._max:
+            self._max -= 1
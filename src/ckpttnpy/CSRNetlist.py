@@ -0,0 +1,359 @@
+"""Compressed sparse row (CSR) hypergraph core.
+
+CSRGraph stores the bipartite module/net adjacency of a netlist as two flat
+integer arrays (offsets and targets), so that the FM hot paths index arrays
+instead of hashing node objects. CSRNetlist wraps a CSRGraph behind the
+HierNetlist interface, with modules renumbered to 0..n-1 and nets to n..n+m-1.
+Partitions inside the engine are dense ``array('b')`` buffers in the same
+order; to_dense_part/from_dense_part convert from and to the caller's form.
+"""
+
+from array import array
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .HierNetlist import HierNetlist
+
+INDEX_TYPECODE = "i"  # C int, matches numpy.intc
+PART_TYPECODE = "b"  # signed char, up to 127 parts
+
+Part = Union[Dict[Any, int], List[int]]
+
+
+class CSRDegreeView:
+    """Degree view over a CSRGraph.
+
+    Supports both ``degree[node]`` and ``degree(node)`` so that it can stand in
+    for the networkx degree view used throughout the code base.
+    """
+
+    __slots__ = ("_offsets",)
+
+    def __init__(self, offsets: array) -> None:
+        self._offsets = offsets
+
+    def __getitem__(self, node: int) -> int:
+        return self._offsets[node + 1] - self._offsets[node]
+
+    def __call__(self, node: int) -> int:
+        return self._offsets[node + 1] - self._offsets[node]
+
+
+class CSRGraph:
+    """Immutable bipartite adjacency in CSR form.
+
+    Modules and nets share one id space (modules first, then nets). For a
+    module ``v``, ``targets[offsets[v]:offsets[v + 1]]`` are the nets of ``v``
+    (the transposed module->net arrays); for a net, the same slice holds its
+    pins.
+
+    .. svgbob::
+
+         offsets  | 0 | 2 | 3 | 5 | 7 |
+                    |   |   |   |   |
+         targets  | 3 4 | 3 | 0 1 | 0 2 |
+                   "a0"  "a1" "n3"  "n4"
+
+    Examples:
+        >>> gr = CSRGraph.from_adjacency([[3, 4], [3], [4], [0, 1], [0, 2]])
+        >>> list(gr[3])
+        [0, 1]
+        >>> gr.degree[0], gr.degree(4)
+        (2, 2)
+        >>> gr.number_of_nodes(), gr.number_of_edges()
+        (5, 4)
+    """
+
+    __slots__ = ("offsets", "targets", "degree")
+
+    def __init__(self, offsets: array, targets: array) -> None:
+        """
+        The function initializes the graph from prebuilt offset and target arrays.
+
+        :param offsets: Array of length ``num_nodes + 1`` with the start of each
+            node's neighbour list in ``targets``
+        :param targets: Flat array of neighbour ids
+        """
+        self.offsets = offsets
+        self.targets = targets
+        self.degree = CSRDegreeView(offsets)
+
+    @classmethod
+    def from_adjacency(cls, adjacency: Iterable[Iterable[int]]) -> "CSRGraph":
+        """
+        The function builds a CSRGraph from a sequence of neighbour lists, one per node.
+
+        :param adjacency: Neighbour lists indexed by node id
+        :return: the frozen CSRGraph
+        """
+        offsets = array(INDEX_TYPECODE, [0])
+        targets = array(INDEX_TYPECODE)
+        for nbrs in adjacency:
+            targets.extend(nbrs)
+            offsets.append(len(targets))
+        return cls(offsets, targets)
+
+    def __getitem__(self, node: int) -> array:
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.offsets) - 1))
+
+    def number_of_nodes(self) -> int:
+        """
+        The function `number_of_nodes` returns the number of modules plus nets.
+        :return: the number of nodes in the graph.
+        """
+        return len(self.offsets) - 1
+
+    def number_of_edges(self) -> int:
+        """
+        The function `number_of_edges` returns the number of pins.
+        :return: the number of module-net connections (each stored twice).
+        """
+        return len(self.targets) // 2
+
+
+class CSRNetlist(HierNetlist):
+    """The `CSRNetlist` class is a `HierNetlist` backed by a `CSRGraph`.
+
+    Modules are renumbered to ``0..n-1`` and nets to ``n..n+m-1``, so that
+    gain calculators and managers work on dense integer ids. The original
+    module ids are kept in ``module_list`` (and ``module_index`` for the
+    reverse mapping).
+    """
+
+    def __init__(self, ugraph: CSRGraph, num_modules: int, num_nets: int):
+        """
+        The function initializes a netlist over a CSRGraph with dense ids.
+
+        :param ugraph: The CSR adjacency, modules first and nets after
+        :type ugraph: CSRGraph
+        :param num_modules: The number of modules
+        :param num_nets: The number of nets
+        """
+        HierNetlist.__init__(
+            self,
+            ugraph,  # type: ignore[arg-type]
+            range(num_modules),
+            range(num_modules, num_modules + num_nets),
+        )
+        self.module_list: List[Any] = list(range(num_modules))
+        self.module_index: Dict[Any, int] = {}
+
+    @classmethod
+    def from_netlist(cls, hyprgraph) -> "CSRNetlist":
+        """
+        The function converts a `Netlist` or `HierNetlist` into a `CSRNetlist` once.
+
+        Module weights, fixed modules, net weights and the large-net threshold are
+        carried over under the new dense ids.
+
+        :param hyprgraph: The netlist to convert
+        :return: the converted netlist
+
+        Examples:
+            >>> from netlistx.netlist import create_drawf
+            >>> hgr = CSRNetlist.from_netlist(create_drawf())
+            >>> hgr.number_of_modules(), hgr.number_of_nets(), hgr.number_of_pins()
+            (7, 6, 14)
+            >>> hgr.module_list[1], hgr.module_weight[1]
+            ('a1', 3)
+        """
+        modules = list(hyprgraph.modules)
+        nets = list(hyprgraph.nets)
+        num_modules = len(modules)
+        module_index = {v: i_v for i_v, v in enumerate(modules)}
+        net_index = {net: num_modules + i_net for i_net, net in enumerate(nets)}
+
+        adjacency: List[List[int]] = [
+            [net_index[net] for net in hyprgraph.ugraph[v]] for v in modules
+        ]
+        adjacency += [[module_index[v] for v in hyprgraph.ugraph[net]] for net in nets]
+
+        hgr = cls(CSRGraph.from_adjacency(adjacency), num_modules, len(nets))
+        hgr.module_list = modules
+        hgr.module_index = module_index
+
+        module_weight = hyprgraph.module_weight
+        if isinstance(module_weight, dict):
+            hgr.module_weight = [module_weight.get(v, 1) for v in modules]
+        else:
+            hgr.module_weight = [module_weight[i_v] for i_v in range(num_modules)]
+        hgr.module_fixed = {module_index[v] for v in hyprgraph.module_fixed}
+        hgr.num_pads = hyprgraph.num_pads
+        hgr.large_net_threshold = getattr(hyprgraph, "large_net_threshold", None)
+        for net in nets:
+            weight = hyprgraph.get_net_weight(net)
+            if weight != 1:
+                hgr.net_weight[net_index[net]] = weight
+        return hgr
+
+    def subnetlist(self, modules: Sequence[int]) -> "CSRNetlist":
+        """
+        The function builds the sub-netlist induced by some of the modules.
+
+        Every net keeps its pins among `modules` (net splitting), and nets with
+        fewer than two of them are dropped. Module weights, fixed modules, net
+        weights and the large-net threshold are carried over; ``module_list``
+        holds the ids of the modules in this netlist.
+
+        :param modules: The dense ids of the modules to keep
+        :return: the sub-netlist, with its modules renumbered in the given order
+
+        Examples:
+            >>> from netlistx.netlist import create_drawf
+            >>> hgr = CSRNetlist.from_netlist(create_drawf())
+            >>> sub = hgr.subnetlist([0, 1, 2])
+            >>> sub.number_of_modules(), sub.number_of_nets(), sub.module_list
+            (3, 3, [0, 1, 2])
+        """
+        num_modules = len(modules)
+        module_index = {v: i_v for i_v, v in enumerate(modules)}
+        adjacency: List[List[int]] = [[] for _ in range(num_modules)]
+        net_pins: List[List[int]] = []
+        net_weight: Dict[int, int] = {}
+        for net in self.nets:
+            pins = [module_index[v] for v in self.ugraph[net] if v in module_index]
+            if len(pins) < 2:
+                continue
+            i_net = num_modules + len(net_pins)
+            for i_v in pins:
+                adjacency[i_v].append(i_net)
+            net_pins.append(pins)
+            weight = self.net_weight.get(net, 1)
+            if weight != 1:
+                net_weight[i_net] = weight
+        hgr = CSRNetlist(
+            CSRGraph.from_adjacency(adjacency + net_pins), num_modules, len(net_pins)
+        )
+        hgr.module_list = list(modules)
+        hgr.module_index = module_index
+        hgr.module_weight = [self.module_weight[v] for v in modules]
+        hgr.module_fixed = {
+            module_index[v] for v in self.module_fixed if v in module_index
+        }
+        hgr.large_net_threshold = getattr(self, "large_net_threshold", None)
+        hgr.net_weight = net_weight
+        return hgr
+
+
+class PinArrays(NamedTuple):
+    """NumPy views of the net pins of a CSR-backed netlist, for vectorized code."""
+
+    pins: np.ndarray  # module id of every pin, grouped by net
+    pin_net: np.ndarray  # net position (0..m-1) of every pin
+    net_degree: np.ndarray  # number of pins of every net
+    net_weight: np.ndarray  # weight of every net
+
+
+def pin_arrays(hyprgraph) -> PinArrays:
+    """
+    The function `pin_arrays` exposes the net->pin half of a CSR-backed netlist as NumPy arrays.
+
+    The pin arrays are zero-copy views of the CSRGraph buffers; only the per-pin
+    net index and the net weights are materialized.
+
+    :param hyprgraph: A `HierNetlist` whose `ugraph` is a `CSRGraph` (modules
+        ``0..n-1``, nets ``n..n+m-1``)
+    :return: the pin arrays
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> arrs = pin_arrays(CSRNetlist.from_netlist(create_drawf()))
+        >>> arrs.net_degree.tolist()
+        [3, 3, 3, 2, 2, 1]
+        >>> arrs.pin_net[:4].tolist()
+        [0, 0, 0, 1]
+    """
+    ugraph = hyprgraph.ugraph
+    num_modules = hyprgraph.number_of_modules()
+    offsets = np.frombuffer(ugraph.offsets, dtype=np.intc)
+    targets = np.frombuffer(ugraph.targets, dtype=np.intc)
+    net_offsets = offsets[num_modules:]
+    net_degree = np.diff(net_offsets)
+    pins = targets[net_offsets[0] :]
+    pin_net = np.repeat(np.arange(len(net_degree)), net_degree)
+    net_weight = np.ones(len(net_degree), dtype=np.int64)
+    for net, weight in hyprgraph.net_weight.items():
+        net_weight[net - num_modules] = weight
+    threshold = getattr(hyprgraph, "large_net_threshold", None)
+    if threshold is not None:
+        net_weight[net_degree > threshold] = 0  # large nets carry no gain or cost
+    return PinArrays(pins, pin_net, net_degree, net_weight)
+
+
+def dense_index(hyprgraph) -> Tuple[Sequence, Any]:
+    """
+    The function numbers the modules of a netlist 0..n-1.
+
+    :param hyprgraph: The netlist
+    :return: the modules in index order and the module -> index mapping; both
+        are the module range itself when the modules are already ``range(n)``
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> vertices, index = dense_index(create_drawf())
+        >>> vertices[1], index["a1"]
+        ('a1', 1)
+    """
+    modules = hyprgraph.modules
+    if isinstance(modules, range) and modules.start == 0:
+        return modules, modules  # range(n)[v] == v
+    vertices = list(hyprgraph)
+    return vertices, {v: i_v for i_v, v in enumerate(vertices)}
+
+
+def to_dense_part(part: Part, modules: Sequence) -> array:
+    """
+    The function copies a caller's partition into a dense ``array('b')``.
+
+    :param part: The caller's partition, either a list in module order or a
+        dict keyed by module
+    :param modules: The caller's modules, in the order of the dense indices
+    :return: the partition of module ``modules[i]`` at index ``i``
+
+    Examples:
+        >>> to_dense_part({"a": 1, "b": 0}, ["b", "a"])
+        array('b', [0, 1])
+        >>> to_dense_part([1, 0, 1], range(3))
+        array('b', [1, 0, 1])
+    """
+    if isinstance(part, dict):
+        return array(PART_TYPECODE, (part[v] for v in modules))
+    return array(PART_TYPECODE, part)
+
+
+def from_dense_part(part_dense: array, part: Part, modules: Sequence) -> None:
+    """
+    The function writes a dense partition back into the caller's partition in place.
+
+    :param part_dense: The dense partition, as made by `to_dense_part`
+    :param part: The caller's partition to update
+    :param modules: The caller's modules, in the order of the dense indices
+
+    Examples:
+        >>> part = {"a": 1, "b": 0}
+        >>> from_dense_part(array("b", [1, 0]), part, ["b", "a"])
+        >>> part
+        {'a': 0, 'b': 1}
+    """
+    if isinstance(part, dict):
+        for v, k in zip(modules, part_dense):
+            part[v] = k
+    else:
+        part[:] = part_dense
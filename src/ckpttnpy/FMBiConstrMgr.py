@@ -1,7 +1,8 @@
 """Bipartition constraint manager for FM algorithm.
 
 FMBiConstrMgr extends FMConstrMgr with a bipartition-specific select_togo
-that picks the partition with smaller current weight (index 0 vs 1).
+that picks the partition with smaller current weight (index 0 vs 1), relative
+to its lower bound when the two parts have different target ratios.
 """
 
 from .FMConstrMgr import FMConstrMgr
@@ -15,7 +16,8 @@ class FMBiConstrMgr(FMConstrMgr):
     def select_togo(self) -> int:
         """
         The function `select_togo` returns 0 if the first element of `self.diff` is less than the second
-        element, otherwise it returns 1.
+        element, otherwise it returns 1. With uneven `ratios` the weights are
+        compared by their surplus over the lower bound of their part.
 
         :return: an integer value.
 
@@ -27,5 +29,9 @@ class FMBiConstrMgr(FMConstrMgr):
             >>> mgr.diff = [20, 10]
             >>> mgr.select_togo()
             1
+            >>> mgr = FMBiConstrMgr([0, 1, 2], 0.5, [10, 10, 10], ratios=(1 / 3, 2 / 3))
+            >>> mgr.select_togo()  # diff [0, 0], lower bounds [10, 20]
+            1
         """
-        return 0 if self.diff[0] < self.diff[1] else 1
+        lowerbounds = self.lowerbounds
+        return 0 if self.diff[0] - lowerbounds[0] < self.diff[1] - lowerbounds[1] else 1
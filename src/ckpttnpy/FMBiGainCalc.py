@@ -5,11 +5,16 @@ Provides specialized initialization and update methods for 2-pin, 3-pin, and
 general nets, tracking total cut cost.
 """
 
-from typing import Any, Dict, List, Union
+from itertools import compress
+from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 from mywheel.dllist import Dllink
 from mywheel.map_adapter import MapAdapter
 
+from .CSRNetlist import CSRGraph, PinArrays, pin_arrays
+from .HierNetlist import net_tables
+
 # from collections import Mapping
 
 Part = Union[Dict[Any, int], List[int]]
@@ -19,7 +24,17 @@ class FMBiGainCalc:
     """The FMBiGainCalc class is used for calculating the bipartition gain in
     Fiduccia-Mattheyses partitioning algorithm."""
 
-    __slots__ = ("totalcost", "hyprgraph", "vertex_list", "idx_vec", "delta_gain_w")
+    __slots__ = (
+        "totalcost",
+        "hyprgraph",
+        "vertex_list",
+        "idx_vec",
+        "delta_gain_w",
+        "pin_arrays",
+        "pin_count",
+        "net_weight",
+        "net_degree",
+    )
 
     # public:
 
@@ -40,6 +55,8 @@ class FMBiGainCalc:
         :type _: int (optional)
         """
         self.hyprgraph = hyprgraph
+        self.net_weight, self.net_degree = net_tables(hyprgraph)
+        self.pin_count: Dict[Any, List[int]] = {}  # net -> pins in each part
         self.vertex_list: Any = None  # Will be set below
         if isinstance(self.hyprgraph.modules, range):
             self.vertex_list = MapAdapter([Dllink([0, i]) for i in self.hyprgraph])
@@ -47,6 +64,9 @@ class FMBiGainCalc:
             self.vertex_list = {v: Dllink([0, v]) for v in self.hyprgraph}
         else:
             raise NotImplementedError
+        self.pin_arrays: Optional[PinArrays] = None
+        if isinstance(self.hyprgraph.ugraph, CSRGraph):
+            self.pin_arrays = pin_arrays(self.hyprgraph)
 
     def init(self, part: Part) -> int:
         """
@@ -61,7 +81,10 @@ class FMBiGainCalc:
         :type part: Part
         :return: an integer value, which is the total cost.
         """
+        if self.pin_arrays is not None:
+            return self._init_vectorized(part)
         self.totalcost = 0
+        self.pin_count = {}
         for vlink in self.vertex_list.values():
             vlink.data[0] = 0
         for net in self.hyprgraph.nets:
@@ -69,8 +92,78 @@ class FMBiGainCalc:
             self._init_gain(net, part)
         return self.totalcost
 
+    def vertex_gain(self, v, part: Part) -> int:
+        """
+        The function `vertex_gain` recomputes the gain of moving `v` from the pin distribution
+        (`pin_count`) of its nets, which must be up to date with `part`.
+
+        :param v: The module
+        :param part: The current partition
+        :type part: Part
+        :return: the gain of moving `v` to the other part.
+        """
+        pv = part[v]
+        gain = 0
+        for net in self.hyprgraph.ugraph[v]:
+            if self.net_degree[net] < 2:
+                continue
+            num = self.pin_count[net]
+            if num[pv] == 1:
+                gain += self.net_weight[net]
+            if num[pv ^ 1] == 0:
+                gain -= self.net_weight[net]
+        return gain
+
     # private:
 
+    def _init_vectorized(self, part: Part) -> int:
+        """
+        The function `_init_vectorized` (re)initializes all gains at once with NumPy.
+
+        It counts the pins of every net on side 1 with a single ``bincount`` and
+        scatter-adds the per-pin gains back to the modules, so the cost is an
+        O(pins) array operation. For every pin of a net with weight ``w``, the
+        gain is ``w * ([num_own == 1] - [num_other == 0])``, which agrees with
+        the 2-pin, 3-pin and general-net rules below.
+
+        :param part: The partition, indexable by the dense module ids
+        :type part: Part
+        :return: the total cost.
+        """
+        pins, pin_net, net_degree, net_weight = self.pin_arrays  # type: ignore[misc]
+        num_modules = len(self.vertex_list)
+        if isinstance(part, dict):
+            part_arr = np.fromiter((part[v] for v in range(num_modules)), np.intp)
+        else:
+            part_arr = np.asarray(part, dtype=np.intp)
+        part_pin = part_arr[pins]
+        num1 = np.bincount(pin_net, weights=part_pin, minlength=len(net_degree))
+        num1 = num1.astype(np.int64)
+        num0 = net_degree - num1
+        self.totalcost = int(net_weight[(num0 > 0) & (num1 > 0)].sum())
+        # the nets skipped by `_init_gain` (self-loops and large nets) are not counted, as
+        # moves do not keep their counts up to date
+        counted = net_degree >= 2
+        threshold = getattr(self.hyprgraph, "large_net_threshold", None)
+        if threshold is not None:
+            counted &= net_degree <= threshold
+        self.pin_count = dict(
+            zip(
+                compress(self.hyprgraph.nets, counted.tolist()),
+                np.column_stack((num0[counted], num1[counted])).tolist(),
+            )
+        )
+
+        num_own = np.where(part_pin == 0, num0[pin_net], num1[pin_net])
+        num_other = net_degree[pin_net] - num_own
+        pin_gain = net_weight[pin_net] * (
+            (num_own == 1).astype(np.int64) - (num_other == 0)
+        )
+        gain = np.bincount(pins, weights=pin_gain, minlength=num_modules)
+        for vlink, g in zip(self.vertex_list.values(), gain.astype(np.int64).tolist()):
+            vlink.data[0] = g
+        return self.totalcost
+
     def _init_gain(self, net, part: Part):
         """
         The function `_init_gain` initializes the gain for a given network and
@@ -84,9 +177,13 @@ class FMBiGainCalc:
         :type part: Part
         :return: nothing.
         """
-        degree = self.hyprgraph.ugraph.degree[net]
+        degree = self.net_degree[net]
         if degree < 2:  # unlikely, self-loop, etc.
             return  # does not provide any gain when move
+        num = [0, 0]
+        for w in self.hyprgraph.ugraph[net]:
+            num[part[w]] += 1
+        self.pin_count[net] = num
         if degree == 3:
             self._init_gain_3pin_net(net, part)
         elif degree == 2:
@@ -120,7 +217,7 @@ class FMBiGainCalc:
         net_cur = iter(self.hyprgraph.ugraph[net])
         w = next(net_cur)
         v = next(net_cur)
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         if part[w] != part[v]:
             self.totalcost += weight
             self._modify_gain(w, weight)
@@ -148,7 +245,7 @@ class FMBiGainCalc:
         w = next(net_cur)
         v = next(net_cur)
         u = next(net_cur)
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         if part[u] == part[v]:
             if part[w] == part[v]:
                 for a in [u, v, w]:
@@ -175,11 +272,8 @@ class FMBiGainCalc:
             = [0, 1,
         :type part: Part
         """
-        num = [0, 0]
-        for w in self.hyprgraph.ugraph[net]:
-            num[part[w]] += 1
-
-        weight = self.hyprgraph.get_net_weight(net)
+        num = self.pin_count[net]
+        weight = self.net_weight[net]
 
         if num[0] > 0 and num[1] > 0:
             self.totalcost += weight
@@ -213,7 +307,7 @@ class FMBiGainCalc:
         net_cur = iter(self.hyprgraph.ugraph[net])
         u = next(net_cur)
         w = u if u != v else next(net_cur)
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         delta = 2 if part[w] == from_part else -2
         self.delta_gain_w = delta * weight
         return w
@@ -242,7 +336,7 @@ class FMBiGainCalc:
         """
         net, _, from_part, _ = move_info
         delta_gain = [0, 0]
-        gain = self.hyprgraph.get_net_weight(net)
+        gain = self.net_weight[net]
 
         part_w = part[self.idx_vec[0]]
 
@@ -298,12 +392,11 @@ class FMBiGainCalc:
         :return: a list of delta gains.
         """
         net, _, from_part, to_part = move_info
-        num = [0, 0]
-        for w in self.idx_vec:
-            num[part[w]] += 1
+        num = self.pin_count[net][:]
+        num[from_part] -= 1  # exclude the moving vertex
         degree = len(self.idx_vec)
         delta_gain = [0] * degree
-        gain = self.hyprgraph.get_net_weight(net)
+        gain = self.net_weight[net]
 
         for l_part in [from_part, to_part]:
             if num[l_part] == 0:
@@ -32,29 +32,53 @@ class FMBiGainMgr(FMGainMgr):
         """
         totalcost = FMGainMgr.init(self, part)
 
-        for bckt in self.gainbucket:
-            bckt.clear()
-        for v in self.hyprgraph:
-            vlink = self.gain_calc.vertex_list[v]
+        vertex_list = self.gain_calc.vertex_list
+        for i, v in enumerate(self.vertices):
             to_part = part[v] ^ 1  # toggle 0 or 1
-            self.gainbucket[to_part].appendleft_direct(vlink)
-        for v in self.hyprgraph.module_fixed:
-            self.lock_all(part[v], v)
+            self.gainbucket[to_part].set_key(i, vertex_list[v].data[0])
+        self._fill_buckets(part)
         return totalcost
 
+    def reinit(self, part: Part, moved, undone) -> None:
+        """
+        The `reinit` function recomputes the out-of-date gains only and refills the buckets.
+
+        :param part: The current partition
+        :type part: Part
+        :param moved: The vertices moved since the buckets were last filled
+        :param undone: The vertices whose moves were rolled back in `part` only
+        """
+        for v in self._stale_vertices(part, moved, undone):
+            self._set_key(part[v] ^ 1, v, self.gain_calc.vertex_gain(v, part))
+        self._fill_buckets(part)
+
+    def vertex_gains(self, part: Part, v) -> List[int]:
+        """
+        The `vertex_gains` function returns the gains of moving `v` to each of the two parts.
+
+        :param part: The current partition
+        :type part: Part
+        :param v: The module
+        :return: the gains of moving `v` to part 0 and part 1 (0 for its own part).
+        """
+        gains = [0, 0]
+        gains[part[v] ^ 1] = self.gain_calc.vertex_gain(v, part)
+        return gains
+
     def lock(self, whichPart, v) -> None:
         """
-        The `lock` function locks a vertex by detaching it from a gain bucket and
-        setting its next pointer to itself.
+        The `lock` function locks a vertex by detaching it from a gain bucket so
+        that it ignores further key updates. A vertex has only one gain in a
+        bipartition, so it is locked in both buckets.
 
         :param whichPart: whichPart is a variable of type uint8_t. It is used to
             specify which part of the code to lock
         :param v: The parameter `v` is of type `node_t` and represents a node in
             the graph
         """
-        vlink = self.gain_calc.vertex_list[v]
-        self.gainbucket[whichPart].detach(vlink)
-        vlink.next = vlink  # lock
+        i = self.index[v]
+        self.gainbucket[whichPart].lock(i)
+        self.gainbucket[whichPart ^ 1].lock(i)
 
     def lock_all(self, from_part, v) -> None:
         """
@@ -94,7 +118,7 @@ class FMBiGainMgr(FMGainMgr):
             >>> mgr.gainbucket[0].get_max()
             3
         """
-        self.gainbucket[part_w ^ 1].modify_key(self.gain_calc.vertex_list[w], key)
+        self.gainbucket[part_w ^ 1].modify_key(self.index[w], key)
 
     def update_move_v(self, move_info_v, gain) -> None:
         """
@@ -109,6 +133,25 @@ class FMBiGainMgr(FMGainMgr):
 
     # private:
 
+    def _fill_buckets(self, part: Part) -> None:
+        """
+        The function `_fill_buckets` empties the buckets and inserts every vertex with its current key
+        (only the vertices on cut nets in boundary mode), then locks the fixed modules.
+
+        :param part: The current partition
+        :type part: Part
+        """
+        for bckt in self.gainbucket:
+            bckt.clear()
+        boundary = self._boundary() if self.boundary_only else None
+        for i, v in enumerate(self.vertices):
+            if boundary is None or boundary[i]:
+                bckt = self.gainbucket[part[v] ^ 1]
+                bckt.appendleft(i, bckt.get_key(i))
+            # else: free until a move changes its gain
+        for v in self.hyprgraph.module_fixed:
+            self.lock_all(part[v], v)
+
     def _set_key(self, whichPart, v, key) -> None:
         """
         The `_set_key` function sets a key for a specific part and vertex in a gainbucket.
@@ -118,4 +161,4 @@ class FMBiGainMgr(FMGainMgr):
         :param v: The parameter "v" is of type "node_t"
         :param key: The key parameter is an integer value that represents a key value
         """
-        self.gainbucket[whichPart].set_key(self.gain_calc.vertex_list[v], key)
+        self.gainbucket[whichPart].set_key(self.index[v], key)
@@ -6,7 +6,17 @@ for move legality determination based on lower bound calculations.
 """
 
 from enum import Enum
-from typing import Any, Dict, Generic, Iterable, List, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
 
 # Define a generic type for the hypergraph nodes
 Gnl = TypeVar("Gnl", bound=Iterable[int])
@@ -45,10 +55,16 @@ class FMConstrMgr(Generic[Gnl]):
         "diff",
         "totalweight",
         "lowerbound",
+        "lowerbounds",
     )
 
     def __init__(
-        self, hyprgraph: Gnl, bal_tol: float, module_weight, num_parts: int = 2
+        self,
+        hyprgraph: Gnl,
+        bal_tol: float,
+        module_weight,
+        num_parts: int = 2,
+        ratios: Optional[Sequence[float]] = None,
     ):
         """
         The function initializes the attributes of an object and calculates a lower
@@ -65,6 +81,10 @@ class FMConstrMgr(Generic[Gnl]):
         :param num_parts: The `num_parts` parameter represents the number of parts
             or modules that the system is divided into. It is an optional
             parameter with a default value of 2, defaults to 2 (optional)
+        :param ratios: The target share of the total weight of each part, e.g.
+            (1/3, 2/3) for an uneven bisection; the parts are equal by default.
+            The lower bound of part i is then ``2 * bal_tol * ratios[i]`` times
+            the total weight
         """
         self.hyprgraph = hyprgraph
         self.bal_tol = bal_tol
@@ -74,6 +94,14 @@ class FMConstrMgr(Generic[Gnl]):
         self.totalweight = sum(self.get_module_weight(v) for v in self.hyprgraph)
         totalweightK = self.totalweight * (2.0 / self.num_parts)
         self.lowerbound = round(totalweightK * self.bal_tol)
+        if ratios is None:
+            self.lowerbounds = [self.lowerbound] * num_parts
+        else:
+            assert len(ratios) == num_parts
+            self.lowerbounds = [
+                round(self.totalweight * 2.0 * self.bal_tol * ratio) for ratio in ratios
+            ]
+            self.lowerbound = min(self.lowerbounds)
 
     def init(self, part: Part) -> None:
         """
@@ -153,15 +181,14 @@ class FMConstrMgr(Generic[Gnl]):
         """
 
         diffFrom = self._get_diff_from(move_info_v)
+        _, from_part, to_part = move_info_v
 
-        if diffFrom < self.lowerbound:
+        if diffFrom < self.lowerbounds[from_part]:
             return LegalCheck.NotSatisfied  # not ok, don't move
 
-        _, _, to_part = move_info_v
-
         diffTo = self.diff[to_part] + self.weight
 
-        if diffTo < self.lowerbound:
+        if diffTo < self.lowerbounds[to_part]:
             return LegalCheck.GetBetter  # get better, but still illegal
 
         return LegalCheck.AllSatisfied  # all satisfied
@@ -174,7 +201,7 @@ class FMConstrMgr(Generic[Gnl]):
         :return: a boolean value.
         """
         diffFrom = self._get_diff_from(move_info_v)
-        return diffFrom >= self.lowerbound
+        return diffFrom >= self.lowerbounds[move_info_v[1]]
 
     def update_move(self, move_info_v) -> None:
         """
@@ -192,6 +219,17 @@ class FMConstrMgr(Generic[Gnl]):
         self.diff[to_part] += self.weight
         self.diff[from_part] -= self.weight
 
+    def undo_move(self, move_info_v) -> None:
+        """
+        The `undo_move` function reverts the effect of `update_move` for a move made earlier.
+
+        :param move_info_v: The tuple (v, from_part, to_part) of the original move
+        """
+        v, from_part, to_part = move_info_v
+        weight = self.get_module_weight(v)
+        self.diff[from_part] += weight
+        self.diff[to_part] -= weight
+
     def final_check(self, part: Part) -> bool:
         """
         The `final_check` function checks if the final partitioning of the graph
@@ -204,4 +242,12 @@ class FMConstrMgr(Generic[Gnl]):
         :return: a boolean value indicating whether the final partitioning of the graph satisfies the balance constraints.
         """
         self.init(part)
-        return all(diff >= self.lowerbound for diff in self.diff)
+        return self.is_legal()
+
+    def is_legal(self) -> bool:
+        """
+        The `is_legal` function checks the balance constraints on the current part weights.
+
+        :return: True if every part weighs at least its lower bound.
+        """
+        return all(diff >= lb for diff, lb in zip(self.diff, self.lowerbounds))
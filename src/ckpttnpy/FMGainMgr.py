@@ -3,24 +3,26 @@
 FMGainMgr manages gain buckets used in the FM algorithm to select the best vertex
 to move between partitions. Delegates actual gain calculation to a GainCalc instance.
 Handles 2-pin, 3-pin, and general nets with specialized update methods.
+The gain buckets are index-based ArrayBPQueue objects, so vertices are mapped
+to 0..n-1 once when the manager is constructed.
+In boundary mode (`boundary_only`), only vertices on cut nets are put into the
+buckets at `init`; the others are left free with their gain as key, and are
+inserted by the first `modify_key` that changes their gain, i.e. when a move
+makes one of their nets cut.
 """
 
 from abc import abstractmethod
 from typing import Any, Dict, List, Union
 
-from mywheel.bpqueue import BPQueue
-from mywheel.dllist import Dllink, Dllist
+from .ArrayBPQueue import ArrayBPQueue
+from .CSRNetlist import dense_index
 
 Part = Union[Dict[Any, int], List[int]]
 
-Item = Dllink[List[int]]
-
 
 class FMGainMgr:
     """The `FMGainMgr` class is a base class for managing gains in Fiduccia-Mattheyses partitioning algorithm."""
 
-    waitinglist = Dllist[List[int]]([0, 3734])
-
     # public:
 
     def __init__(self, GainCalc, hyprgraph, num_parts=2) -> None:
@@ -42,7 +44,12 @@ class FMGainMgr:
         self.gain_calc = GainCalc(hyprgraph, num_parts)
         self.pmax = self.hyprgraph.get_max_degree()
         bound = self.pmax * (num_parts - 1)
-        self.gainbucket = [BPQueue(-bound, bound) for _ in range(num_parts)]
+        self.vertices, self.index = dense_index(self.hyprgraph)
+        num_modules = len(self.vertices)
+        self.gainbucket = [
+            ArrayBPQueue(-bound, bound, num_modules) for _ in range(num_parts)
+        ]
+        self.boundary_only = False  # seed only vertices on cut nets
 
     def init(self, part) -> int:
         """
@@ -52,7 +59,6 @@ class FMGainMgr:
         :return: The total cost is being returned.
         """
         totalcost = self.gain_calc.init(part)
-        self.waitinglist.clear()
         assert isinstance(totalcost, int)
         return totalcost
 
@@ -76,9 +82,7 @@ class FMGainMgr:
         to_part = max(range(self.num_parts), key=lambda k: self.gainbucket[k].get_max())
         maxk = self.gainbucket[to_part].get_max()
 
-        vlink = self.gainbucket[to_part].popleft()
-        self.waitinglist.append(vlink)
-        v = vlink.data[1]
+        v = self.vertices[self.gainbucket[to_part].popleft()]
         from_part = part[v]
         move_info_v = v, from_part, to_part
         return move_info_v, maxk
@@ -91,9 +95,7 @@ class FMGainMgr:
         :return: a tuple containing two values: `v` and `gainmax`.
         """
         gainmax = self.gainbucket[to_part].get_max()
-        vlink = self.gainbucket[to_part].popleft()
-        self.waitinglist.append(vlink)
-        v = vlink.data[1]
+        v = self.vertices[self.gainbucket[to_part].popleft()]
         return v, gainmax
 
     def update_move(self, part, move_info_v):
@@ -101,6 +103,9 @@ class FMGainMgr:
         The function `update_move` updates the gain of a move in a graph based on the given move
         information.
 
+        The per-net pin distribution table (`gain_calc.pin_count`) is updated in O(1) per net, and
+        general nets that are not critical for the move are skipped without scanning their pins.
+
         :param part: A list that represents the partition of the graph. Each element in the list corresponds
             to a vertex in the graph and indicates which partition the vertex belongs to. For example, if part =
             [0, 1, 0, 1], it means that vertex 0 and vertex 2 belong
@@ -109,25 +114,76 @@ class FMGainMgr:
         """
         self.gain_calc.update_move_init()
         v, from_part, to_part = move_info_v
-        for net in self.hyprgraph.ugraph[v]:
-            degree = self.hyprgraph.ugraph.degree[net]
+        ugraph = self.hyprgraph.ugraph  # CSRGraph or networkx adjacency
+        pin_count = self.gain_calc.pin_count
+        net_degree = self.gain_calc.net_degree
+        for net in ugraph[v]:
+            degree = net_degree[net]
             if degree < 2:  # unlikely, self-loop, etc.
                 continue  # does not provide any gain change when move
+            num = pin_count[net]
             move_info = [net, v, from_part, to_part]
             if degree == 2:
                 self._update_move_net(
                     part, move_info, self.gain_calc.update_move_2pin_net
                 )
-            else:
+            elif degree == 3:
                 self.gain_calc.init_idx_vec(v, net)
-                if degree == 3:
-                    self._update_move_net(
-                        part, move_info, self.gain_calc.update_move_3pin_net
-                    )
-                else:
-                    self._update_move_net(
-                        part, move_info, self.gain_calc.update_move_general_net
-                    )
+                self._update_move_net(
+                    part, move_info, self.gain_calc.update_move_3pin_net
+                )
+            elif num[from_part] <= 2 or num[to_part] <= 1:
+                # Only critical nets change gains: with at least two other pins
+                # left on both sides, no delta is possible.
+                self.gain_calc.init_idx_vec(v, net)
+                self._update_move_net(
+                    part, move_info, self.gain_calc.update_move_general_net
+                )
+            num[from_part] -= 1
+            num[to_part] += 1
+
+    def update_pin_count(self, move_info_v) -> None:
+        """
+        The function `update_pin_count` updates the pin distribution (`gain_calc.pin_count`) of the
+        nets of `v` for a move, leaving the keys in the buckets as they are, which makes it the cheap
+        part of `update_move` for moves made between `init` calls (see `PartMgrBase`).
+
+        :param move_info_v: The move (v, from_part, to_part)
+        """
+        v, from_part, to_part = move_info_v
+        pin_count = self.gain_calc.pin_count
+        net_degree = self.gain_calc.net_degree
+        for net in self.hyprgraph.ugraph[v]:
+            if net_degree[net] < 2:
+                continue
+            num = pin_count[net]
+            num[from_part] -= 1
+            num[to_part] += 1
+
+    @abstractmethod
+    def vertex_gains(self, part, v) -> List[int]:
+        """
+        The `vertex_gains` function recomputes the gains of moving `v` to every part from the pin
+        distribution (`gain_calc.pin_count`), which must be up to date with `part`.
+
+        :param part: The current partition
+        :param v: The module
+        :return: the gains of moving `v` to each part (0 for its own part).
+        """
+
+    @abstractmethod
+    def reinit(self, part, moved, undone) -> None:
+        """
+        The `reinit` function prepares the buckets for another pass without calling `gain_calc.init`.
+
+        The keys of the other vertices are still valid, so only the gains of the vertices returned by
+        `_stale_vertices` are recomputed (from `gain_calc.pin_count`) before every vertex is unlocked
+        and put back into the buckets, in the same order as `init` does.
+
+        :param part: The current partition
+        :param moved: The vertices moved since the buckets were last filled
+        :param undone: The vertices whose moves were rolled back in `part` only
+        """
 
     @abstractmethod
     def modify_key(self, w, part_w, key) -> None:
@@ -144,6 +200,50 @@ class FMGainMgr:
 
     # private:
 
+    def _stale_vertices(self, part, moved, undone) -> set:
+        """
+        The function `_stale_vertices` recounts the pins of the nets of the `undone` vertices and
+        returns the vertices whose keys are out of date.
+
+        Those are the `moved` vertices, which were locked, and the pins of the recounted nets, whose
+        keys still include the gain changes of the moves that were rolled back.
+
+        :param part: The current partition
+        :param moved: The vertices moved since the buckets were last filled
+        :param undone: The vertices whose moves were rolled back in `part` only
+        :return: the set of vertices to recompute.
+        """
+        ugraph = self.hyprgraph.ugraph
+        pin_count = self.gain_calc.pin_count
+        net_degree = self.gain_calc.net_degree
+        stale = set(moved)
+        nets = {net for v in undone for net in ugraph[v] if net_degree[net] >= 2}
+        for net in nets:
+            num = [0] * self.num_parts
+            for w in ugraph[net]:
+                num[part[w]] += 1
+            pin_count[net] = num
+            stale.update(ugraph[net])
+        return stale
+
+    def _boundary(self) -> List[bool]:
+        """
+        The function `_boundary` marks the vertices that are incident to a cut net.
+
+        It must be called after `gain_calc.init`, since it reads the pin distribution
+        (`gain_calc.pin_count`) of the nets.
+
+        :return: a list indexed by dense vertex index, True for boundary vertices.
+        """
+        on_cut = [False] * len(self.vertices)
+        ugraph = self.hyprgraph.ugraph
+        index = self.index
+        for net, num in self.gain_calc.pin_count.items():
+            if max(num) < sum(num):  # pins in more than one part
+                for w in ugraph[net]:
+                    on_cut[index[w]] = True
+        return on_cut
+
     def _update_move_net(self, part, move_info, gain_calc_method):
         """
         The function `_update_move_net` updates the move for a net in a partition solution.
@@ -37,13 +37,13 @@ class FMKWayConstrMgr(FMConstrMgr):
     def init(self, part: Part):
         """
         The `init` function initializes the `illegal` attribute by checking if each element in `self.diff`
-        is less than `self.lowerbound`.
+        is less than its lower bound.
 
         :param part: The `part` parameter is of type `Part` and it represents some part of an object or system
         :type part: Part
         """
         FMConstrMgr.init(self, part)
-        self.illegal = [d < self.lowerbound for d in self.diff]
+        self.illegal = [d < lb for d, lb in zip(self.diff, self.lowerbounds)]
 
     def select_togo(self):
         """
@@ -12,6 +12,8 @@ from mywheel.dllist import Dllink
 from mywheel.map_adapter import MapAdapter
 from mywheel.robin import Robin
 
+from .HierNetlist import net_tables
+
 Part = Union[Dict[Any, int], List[int]]
 
 
@@ -27,6 +29,9 @@ class FMKWayGainCalc:
         "delta_gain_v",
         "idx_vec",
         "delta_gain_w",
+        "pin_count",
+        "net_weight",
+        "net_degree",
     )
 
     # public:
@@ -43,20 +48,30 @@ class FMKWayGainCalc:
         :type num_parts: int
         """
         self.delta_gain_v: List[int] = list()
+        self.pin_count: Dict[Any, List[int]] = {}  # net -> pins in each part
 
         self.hyprgraph = hyprgraph
+        self.net_weight, self.net_degree = net_tables(hyprgraph)
         self.num_parts = num_parts
         self.rr = Robin(num_parts)
         self.vertex_list: Any = None  # Will be set below
+        self._alloc_gains()
 
+    def _alloc_gains(self) -> None:
+        """
+        The function `_alloc_gains` allocates the storage of the gains: one ``Dllink`` per module and
+        part, which only holds the gain (the index-based buckets do not link it). Subclasses with
+        another storage override it, see FMKWayCompactGainCalc.
+        """
         if isinstance(self.hyprgraph.modules, range):
             self.vertex_list = [
                 MapAdapter([Dllink([0, i]) for i in self.hyprgraph])
-                for _ in range(num_parts)
+                for _ in range(self.num_parts)
             ]
         elif isinstance(self.hyprgraph.modules, list):
             self.vertex_list = [
-                {v: Dllink([0, v]) for v in self.hyprgraph} for _ in range(num_parts)
+                {v: Dllink([0, v]) for v in self.hyprgraph}
+                for _ in range(self.num_parts)
             ]
         else:
             raise NotImplementedError
@@ -73,13 +88,61 @@ class FMKWayGainCalc:
         :return: The method is returning the value of the `totalcost` variable.
         """
         self.totalcost = 0
-        for vlist in self.vertex_list:
-            for vlink in vlist.values():
-                vlink.data[0] = 0
+        self.pin_count = {}
+        self._reset_gains()
         for net in self.hyprgraph.nets:
             self._init_gain(net, part)
         return self.totalcost
 
+    def gains(self, k: int) -> List[int]:
+        """
+        The function `gains` returns the gains of moving each module to part `k`, in module order.
+
+        :param k: The target part
+        :return: the list of gains, one per module
+        """
+        return [vlink.data[0] for vlink in self.vertex_list[k].values()]
+
+    def vertex_gains(self, v, part: Part) -> List[int]:
+        """
+        The function `vertex_gains` recomputes the gains of moving `v` to every part from the pin
+        distribution (`pin_count`) of its nets, which must be up to date with `part`.
+
+        :param v: The module
+        :param part: The current partition
+        :type part: Part
+        :return: the gains of moving `v` to each part (0 for its own part).
+        """
+        pv = part[v]
+        gains = [0] * self.num_parts
+        for net in self.hyprgraph.ugraph[v]:
+            if self.net_degree[net] < 2:
+                continue
+            num = self.pin_count[net]
+            weight = self.net_weight[net]
+            leave = weight if num[pv] == 1 else 0
+            for k in self.rr.exclude(pv):
+                gains[k] += leave - weight if num[k] == 0 else leave
+        return gains
+
+    def _reset_gains(self) -> None:
+        """
+        The function `_reset_gains` sets the gains of all modules towards all parts to zero.
+        """
+        for vlist in self.vertex_list:
+            for vlink in vlist.values():
+                vlink.data[0] = 0
+
+    def _add_gain(self, k, v, weight) -> None:
+        """
+        The function `_add_gain` adds `weight` to the gain of moving `v` to part `k`.
+
+        :param k: The target part
+        :param v: The module
+        :param weight: The amount to add
+        """
+        self.vertex_list[k][v].data[0] += weight
+
     def _init_gain(self, net, part: Part):
         """
         The function `_init_gain` initializes the gain for a given network based on its degree.
@@ -90,9 +153,13 @@ class FMKWayGainCalc:
         :type part: Part
         :return: nothing.
         """
-        degree = self.hyprgraph.ugraph.degree[net]
+        degree = self.net_degree[net]
         if degree < 2:  # unlikely, self-loop, etc.
             return  # does not provide any gain when move
+        num = [0] * self.num_parts
+        for w in self.hyprgraph.ugraph[net]:
+            num[part[w]] += 1
+        self.pin_count[net] = num
         if degree > 3:
             self._init_gain_general_net(net, part)
         elif degree == 3:
@@ -129,14 +196,14 @@ class FMKWayGainCalc:
         v = next(net_cur)
         part_w = part[w]
         part_v = part[v]
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         if part_v == part_w:
             for a in [w, v]:
                 self._modify_gain(a, part_v, -weight)
         else:
             self.totalcost += weight
-            self.vertex_list[part_v][w].data[0] += weight
-            self.vertex_list[part_w][v].data[0] += weight
+            self._add_gain(part_v, w, weight)
+            self._add_gain(part_w, v, weight)
 
     def _init_gain_3pin_net(self, net, part: Part):
         """
@@ -156,7 +223,7 @@ class FMKWayGainCalc:
         part_w = part[w]
         part_v = part[v]
         part_u = part[u]
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         if part_u == part_v:
             if part_w == part_v:
                 for a in [u, v, w]:
@@ -170,13 +237,13 @@ class FMKWayGainCalc:
         else:
             self.totalcost += 2 * weight
             for a, b in permutations([u, v, w], 2):
-                self.vertex_list[part[b]][a].data[0] += weight
+                self._add_gain(part[b], a, weight)
             return
 
-        self.vertex_list[part[b]][a].data[0] += weight
+        self._add_gain(part[b], a, weight)
         for e in [b, c]:
             self._modify_gain(e, part[e], -weight)
-            self.vertex_list[part[a]][e].data[0] += weight
+            self._add_gain(part[a], e, weight)
         self.totalcost += weight
 
     def _init_gain_general_net(self, net, part: Part):
@@ -206,11 +273,8 @@ class FMKWayGainCalc:
           Gain for moving v2: +10 (if moves to A or C, -10 if to B)
 
         """
-        num = [0] * self.num_parts
-        for w in self.hyprgraph.ugraph[net]:
-            num[part[w]] += 1
-
-        weight = self.hyprgraph.get_net_weight(net)
+        num = self.pin_count[net]
+        weight = self.net_weight[net]
 
         for c in num:
             if c > 0:
@@ -220,7 +284,7 @@ class FMKWayGainCalc:
         for k, c in enumerate(num):
             if c == 0:
                 for w in self.hyprgraph.ugraph[net]:
-                    self.vertex_list[k][w].data[0] -= weight
+                    self._add_gain(k, w, -weight)
             elif c == 1:
                 # for w in self.hyprgraph.ugraph[net]:
                 cur = iter(self.hyprgraph.ugraph[net])
@@ -247,7 +311,7 @@ class FMKWayGainCalc:
         u = next(net_cur)
         w = u if u != v else next(net_cur)
         part_w = part[w]
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
         self.delta_gain_w = [0] * self.num_parts
 
         for l_part in [from_part, to_part]:
@@ -283,7 +347,7 @@ class FMKWayGainCalc:
         degree = len(self.idx_vec)
         delta_gain = list([0] * self.num_parts for _ in range(degree))
 
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
 
         fp, tp = from_part, to_part
 
@@ -367,14 +431,13 @@ class FMKWayGainCalc:
 
         """
         net, _, from_part, to_part = move_info
-        num = [0] * self.num_parts
-        for w in self.idx_vec:
-            num[part[w]] += 1
+        num = self.pin_count[net][:]
+        num[from_part] -= 1  # exclude the moving vertex
 
         degree = len(self.idx_vec)
         delta_gain = list([0] * self.num_parts for _ in range(degree))
 
-        weight = self.hyprgraph.get_net_weight(net)
+        weight = self.net_weight[net]
 
         fp, tp = from_part, to_part
         for _ in [0, 1]:
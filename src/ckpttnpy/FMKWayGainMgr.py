@@ -47,48 +47,62 @@ class FMKWayGainMgr(FMGainMgr):
         """
         totalcost = FMGainMgr.init(self, part)
 
-        for bckt in self.gainbucket:
-            bckt.clear()
+        for k in range(self.num_parts):
+            set_key = self.gainbucket[k].set_key
+            for i, gain in enumerate(self.gain_calc.gains(k)):
+                set_key(i, gain)
+        self._fill_buckets(part)
+        return totalcost
 
-        for v in self.hyprgraph:
-            pv = part[v]
-            for k in self.rr.exclude(pv):
-                vlink = self.gain_calc.vertex_list[k][v]
-                self.gainbucket[k].append(vlink, vlink.data[0])
-            vlink = self.gain_calc.vertex_list[pv][v]
-            self.gainbucket[pv].set_key(vlink, 0)
-            self.waitinglist.append(vlink)
+    def reinit(self, part: Part, moved, undone) -> None:
+        """
+        The `reinit` function recomputes the out-of-date gains only and refills the buckets.
 
-        for v in self.hyprgraph.module_fixed:
-            self.lock_all(part[v], v)
+        :param part: The current partition
+        :type part: Part
+        :param moved: The vertices moved since the buckets were last filled
+        :param undone: The vertices whose moves were rolled back in `part` only
+        """
+        for v in self._stale_vertices(part, moved, undone):
+            i = self.index[v]
+            gains = self.gain_calc.vertex_gains(v, part)
+            for k in self.rr.exclude(part[v]):
+                self.gainbucket[k].set_key(i, gains[k])
+        self._fill_buckets(part)
+
+    def vertex_gains(self, part: Part, v) -> List[int]:
+        """
+        The `vertex_gains` function returns the gains of moving `v` to each part.
 
-        return totalcost
+        :param part: The current partition
+        :type part: Part
+        :param v: The module
+        :return: the gains of moving `v` to each part (0 for its own part).
+        """
+        return self.gain_calc.vertex_gains(v, part)
 
     def lock(self, whichPart, v):
         """
-        The lock function sets a key by detaching a vertex link from a gain bucket and locking it.
+        The lock function detaches a vertex from a gain bucket and locks it.
 
         :param whichPart: An unsigned 8-bit integer representing a specific part or section
         :param v: The parameter `v` is of type `node_t`
         """
-        vlink = self.gain_calc.vertex_list[whichPart][v]
-        self.gainbucket[whichPart].detach(vlink)
-        vlink.next = vlink  # lock
+        self.gainbucket[whichPart].lock(self.index[v])
 
     def lock_all(self, _, v):
         """
-        The `lock_all` function locks a specific vertex in a graph by detaching it from its bucket and
-        setting its `next` attribute to itself.
+        The `lock_all` function locks a specific vertex in a graph by detaching it from the buckets of
+        all parts.
 
         :param _: The underscore (_) is a convention in Python to indicate that a parameter is not going to
             be used in the function. It is often used as a placeholder when the function signature requires a
             certain number of parameters, but the function does not actually need to use all of them
         :param v: The parameter `v` represents the vertex that needs to be locked
         """
-        for vlist, bckt in zip(self.gain_calc.vertex_list, self.gainbucket):
-            vlink = vlist[v]
-            bckt.detach(vlink)
-            vlink.next = vlink  # lock
+        i = self.index[v]
+        for bckt in self.gainbucket:
+            bckt.lock(i)
 
     def update_move_v(self, move_info_v, gain):
         """
@@ -98,10 +112,9 @@ class FMKWayGainMgr(FMGainMgr):
         :param gain: The `gain` parameter represents the gain value that needs to be updated for the moving cell
         """
         v, from_part, to_part = move_info_v
+        i = self.index[v]
         for k in [k for k in self.rr.exclude(from_part) if k != to_part]:
-            self.gainbucket[k].modify_key(
-                self.gain_calc.vertex_list[k][v], self.gain_calc.delta_gain_v[k]
-            )
+            self.gainbucket[k].modify_key(i, self.gain_calc.delta_gain_v[k])
         self._set_key(from_part, v, -gain)
         # self.lock(to_part, v)
 
@@ -137,22 +150,42 @@ class FMKWayGainMgr(FMGainMgr):
             >>> mgr.gainbucket[2].get_max()
             3
         """
+        i = self.index[w]
         for k in self.rr.exclude(part_w):
-            self.gainbucket[k].modify_key(self.gain_calc.vertex_list[k][w], key[k])
+            self.gainbucket[k].modify_key(i, key[k])
 
     # private:
 
+    def _fill_buckets(self, part: Part) -> None:
+        """
+        The function `_fill_buckets` empties the buckets and inserts every vertex with its current keys
+        (only the vertices on cut nets in boundary mode), then locks the fixed modules.
+
+        :param part: The current partition
+        :type part: Part
+        """
+        for bckt in self.gainbucket:
+            bckt.clear()
+        boundary = self._boundary() if self.boundary_only else None
+        for i, v in enumerate(self.vertices):
+            pv = part[v]
+            if boundary is None or boundary[i]:
+                for k in self.rr.exclude(pv):
+                    bckt = self.gainbucket[k]
+                    bckt.append(i, bckt.get_key(i))
+            # else: free until a move changes its gains
+            self.gainbucket[pv].set_key(i, 0)  # free until its gain changes
+        for v in self.hyprgraph.module_fixed:
+            self.lock_all(part[v], v)
+
     def _set_key(self, whichPart, v, key):
         """
         The `_set_key` function sets a key value for a specific part and vertex in a gainbucket.
 
         :param whichPart: whichPart is a variable of type uint8_t. It is used to specify which part of the
             gainbucket to set the key for
-        :param v: The parameter `v` is of type `node_t` and represents a node in the `vertex_list` of the
-            `gain_calc` object
+        :param v: The parameter `v` is of type `node_t` and represents a node in the netlist
         :param key: The `key` parameter is an integer value that is used to set the key for a specific node
             in the `gainbucket` list
         """
-        self.gainbucket[whichPart].set_key(
-            self.gain_calc.vertex_list[whichPart][v], key
-        )
+        self.gainbucket[whichPart].set_key(self.index[v], key)
@@ -1,10 +1,12 @@
 """Fiduccia-Mattheyses Partition Manager.
 
 FMPartMgr extends PartMgrBase with concrete snapshot/restore implementations
-for the FM algorithm's backtracking mechanism. Supports both list and dict
-partition representations.
+for the FM algorithm's backtracking mechanism. Supports list, dense array('b')
+and dict partition representations.
 """
 
+from array import array
+
 from mywheel.map_adapter import MapAdapter
 
 from .PartMgrBase import Part, PartMgrBase
@@ -26,6 +28,8 @@ class FMPartMgr(PartMgrBase):
         :type part: Part
         :return: a copy of the "part" object.
         """
+        if isinstance(part, array):
+            return part[:]
         return part.copy()
 
     def restore_part_info(self, snapshot, part: Part):
@@ -34,7 +38,7 @@ class FMPartMgr(PartMgrBase):
         based on the snapshot.
 
         :param snapshot: The `snapshot` parameter is a variable that represents the data that needs to be
-            restored. It can be either a list, a dictionary, or an object of type `MapAdapter`
+            restored. It can be a list, an `array`, a dictionary, or an object of type `MapAdapter`
         :param part: The `part` parameter is an instance of the `Part` class
         :type part: Part
 
@@ -52,7 +56,7 @@ class FMPartMgr(PartMgrBase):
           Restore partition assignments from a previous snapshot
         """
 
-        if isinstance(snapshot, list):
+        if isinstance(snapshot, (list, array)):
             for v, k in enumerate(snapshot):
                 part[v] = k
         elif isinstance(snapshot, dict) or isinstance(snapshot, MapAdapter):
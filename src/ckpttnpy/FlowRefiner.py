@@ -0,0 +1,317 @@
+"""Max-flow refinement between pairs of parts.
+
+FlowRefiner improves a legal partition with minimum cuts, in the spirit of the
+network-flow balanced partitioning papers in ``refs/``. For every pair of parts
+that share cut nets, a region of bounded weight is grown breadth-first on both
+sides of the cut, the rest of the two parts is contracted into the source and
+the sink, and the minimum cut of the hypergraph flow network (Lawler's
+expansion: one edge of capacity w(e) per net) gives the best reassignment of
+the region at once. Where FM only sees one move at a time, this can jump over
+the local minima that stop it.
+
+The region is bounded by the slack of each side over its lower bound, scaled
+by `alpha`; both extreme minimum cuts (the source side and the sink side of
+the residual network) are tried, and the more balanced legal one is kept. When
+neither is legal, `alpha` is halved, down to 1 where any cut is legal.
+
+For the connectivity cost (see `cut_cost`), the pins of a net in other parts
+do not change what a pair contributes, so the gain of one pair is exact.
+Every pair keeps the partition legal, so a `deadline` can stop the rounds
+between two pairs.
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import networkx as nx
+from networkx.algorithms.flow import boykov_kolmogorov
+
+from .HierNetlist import net_tables
+from .PartMgrBase import expired
+
+Part = Union[Dict[Any, int], List[int]]
+
+SOURCE = ("source",)
+SINK = ("sink",)
+
+
+class FlowRefiner:
+    r"""The `FlowRefiner` class refines a partition with bounded-region minimum cuts.
+
+    .. svgbob::
+       :align: center
+
+              part p0                          part p1
+        .-----------------.            .-----------------.
+        |        .--------+---.   .----+--------.        |
+        | source | region0    |cut| region1     | sink   |
+        |        '--------+---'   '----+--------'        |
+        '-----------------'            '-----------------'
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> from ckpttnpy.FMBiConstrMgr import FMBiConstrMgr
+        >>> hyprgraph = create_drawf()
+        >>> constr_mgr = FMBiConstrMgr(hyprgraph, 0.3, hyprgraph.module_weight)
+        >>> part = {v: 0 for v in hyprgraph}
+        >>> for v in ["a3", "a4", "a5", "p2", "p3"]:
+        ...     part[v] = 1
+        >>> refiner = FlowRefiner(hyprgraph, constr_mgr)
+        >>> refiner.refine(part) >= 0
+        True
+    """
+
+    def __init__(self, hyprgraph, constr_mgr) -> None:
+        """
+        The function initializes the refiner for a netlist and its balance constraints.
+
+        :param hyprgraph: The netlist
+        :param constr_mgr: The constraint manager (e.g. `FMBiConstrMgr`), whose part weights
+            (`diff`) and `lowerbounds` decide which cuts are legal
+        """
+        self.hyprgraph = hyprgraph
+        self.validator = constr_mgr
+        self.num_parts = constr_mgr.num_parts
+        self.alpha = 4.0  # region weight relative to the slack of its side
+        self.max_region_size = 2000  # modules per side of a region
+        self.max_rounds = 3  # rounds over all pairs of parts
+        self.deadline: Optional[float] = None  # time.monotonic() value, see expired
+
+    def refine(self, part: Part) -> int:
+        """
+        The function `refine` runs rounds of flow refinement over all pairs of parts that share cut
+        nets, heaviest pairs first, until a round improves nothing, after `max_rounds`, or when the
+        `deadline` passes.
+
+        :param part: The legal partition to refine, updated in place
+        :type part: Part
+        :return: the decrease of the connectivity cost.
+        """
+        self.validator.init(part)
+        totalgain = 0
+        for _ in range(self.max_rounds):
+            roundgain = 0
+            for (part0, part1), nets in self._pairs(part):
+                if expired(self.deadline):
+                    break
+                roundgain += self._refine_pair(part, part0, part1, nets)
+            totalgain += roundgain
+            if roundgain == 0 or expired(self.deadline):
+                break
+        return totalgain
+
+    # private:
+
+    def _pairs(self, part: Part) -> List[Tuple[Tuple[int, int], List[Any]]]:
+        """
+        The function `_pairs` lists the pairs of parts with the nets that they share, in order of
+        decreasing weight of those nets.
+
+        :param part: The current partition
+        :return: a list of ((part0, part1), nets) with part0 < part1.
+        """
+        ugraph = self.hyprgraph.ugraph
+        net_weight, net_degree = net_tables(self.hyprgraph)
+        pairs: Dict[Tuple[int, int], List[Any]] = {}
+        weight: Dict[Tuple[int, int], int] = {}
+        for net in self.hyprgraph.nets:
+            if net_degree[net] < 2:
+                continue
+            parts = sorted({part[w] for w in ugraph[net]})
+            for i, part0 in enumerate(parts):
+                for part1 in parts[i + 1 :]:
+                    pairs.setdefault((part0, part1), []).append(net)
+                    weight[part0, part1] = weight.get((part0, part1), 0) + (
+                        net_weight[net]
+                    )
+        return sorted(pairs.items(), key=lambda item: weight[item[0]], reverse=True)
+
+    def _refine_pair(self, part: Part, part0: int, part1: int, nets) -> int:
+        """
+        The function `_refine_pair` reassigns the modules of a region around the cut between
+        `part0` and `part1` according to a minimum cut, when that lowers the cost legally.
+
+        :param part: The current partition, updated in place
+        :param part0: The part on the source side
+        :param part1: The part on the sink side
+        :param nets: The nets that were cut between the two parts when the round started
+        :return: the decrease of the cost.
+        """
+        diff = self.validator.diff
+        lowerbounds = self.validator.lowerbounds
+        slack = [diff[part0] - lowerbounds[part0], diff[part1] - lowerbounds[part1]]
+        if min(slack) < 0:  # not legal, leave it to FM
+            return 0
+        alpha = max(self.alpha, 1.0)
+        while True:
+            region = self._grow_region(part, nets, part0, part1, alpha * slack[0])
+            region.update(self._grow_region(part, nets, part1, part0, alpha * slack[1]))
+            if not region:
+                return 0
+            cutcost, flowvalue, cuts = self._min_cut(part, part0, part1, region)
+            if flowvalue >= cutcost:
+                return 0
+            best = self._most_balanced(part, part0, part1, region, cuts)
+            if best is not None:
+                for v, to_part in best:
+                    part[v] = to_part
+                self.validator.init(part)
+                return cutcost - flowvalue
+            if alpha == 1.0:
+                return 0
+            alpha = max(alpha / 2.0, 1.0)
+
+    def _grow_region(self, part: Part, nets, from_part, to_part, budget) -> Set[Any]:
+        """
+        The function `_grow_region` grows a region of `from_part` breadth-first from the pins of
+        the nets that also have pins in `to_part`, up to the weight `budget`. Fixed modules are
+        left out.
+
+        :param part: The current partition
+        :param nets: The nets cut between the two parts
+        :param from_part: The part to grow the region in
+        :param to_part: The other part of the pair
+        :param budget: The maximum weight of the region
+        :return: the set of modules of the region.
+        """
+        ugraph = self.hyprgraph.ugraph
+        _, net_degree = net_tables(self.hyprgraph)
+        fixed = self.hyprgraph.module_fixed or ()
+        queue: deque = deque()
+        for net in nets:
+            pins = ugraph[net]
+            if any(part[w] == to_part for w in pins):
+                queue.extend(w for w in pins if part[w] == from_part)
+        visited = set(queue)
+        region: Set[Any] = set()
+        weight = 0
+        while queue and len(region) < self.max_region_size:
+            v = queue.popleft()
+            if v in fixed:
+                continue
+            weight_v = self.validator.get_module_weight(v)
+            if weight + weight_v > budget:
+                continue
+            region.add(v)
+            weight += weight_v
+            for net in ugraph[v]:
+                if net_degree[net] < 2:
+                    continue
+                for w in ugraph[net]:
+                    if w not in visited and part[w] == from_part:
+                        visited.add(w)
+                        queue.append(w)
+        return region
+
+    def _min_cut(self, part: Part, part0, part1, region: Set[Any]):
+        """
+        The function `_min_cut` builds the flow network of a region and computes a maximum flow.
+
+        Every net with at least two nodes in the network (region modules, the source for the
+        pins of `part0` outside the region, the sink for those of `part1`) becomes an edge of
+        capacity w(e) between two net nodes, linked to its pins by edges of infinite capacity;
+        a net with two nodes is a pair of edges of capacity w(e). Nets with pins on both
+        terminals stay cut and are left out.
+
+        :param part: The current partition
+        :param part0: The part on the source side
+        :param part1: The part on the sink side
+        :param region: The modules that may change sides
+        :return: the current cost of the nets of the network, the minimum cut, and the two
+            extreme minimum cuts as the sets of region modules on the source side.
+        """
+        ugraph = self.hyprgraph.ugraph
+        net_weight, net_degree = net_tables(self.hyprgraph)
+        graph = nx.DiGraph()
+        graph.add_nodes_from([SOURCE, SINK])
+        graph.add_nodes_from(region)
+        nets = {net for v in region for net in ugraph[v] if net_degree[net] >= 2}
+        cutcost = 0
+        for net in nets:
+            nodes: Set[Any] = set()
+            in_pair = set()
+            for w in ugraph[net]:
+                part_w = part[w]
+                if part_w == part0 or part_w == part1:
+                    in_pair.add(part_w)
+                if w in region:
+                    nodes.add(w)
+                elif part_w == part0:
+                    nodes.add(SOURCE)
+                elif part_w == part1:
+                    nodes.add(SINK)
+            if SOURCE in nodes and SINK in nodes:
+                continue
+            weight = net_weight[net]
+            if len(in_pair) == 2:
+                cutcost += weight
+            if len(nodes) == 2:
+                u, w = nodes
+                for x, y in ((u, w), (w, u)):
+                    if graph.has_edge(x, y):
+                        graph[x][y]["capacity"] += weight
+                    else:
+                        graph.add_edge(x, y, capacity=weight)
+            elif len(nodes) > 2:
+                net_in, net_out = ("net", net, 0), ("net", net, 1)
+                graph.add_edge(net_in, net_out, capacity=weight)
+                for x in nodes:
+                    graph.add_edge(x, net_in)  # no capacity: infinite
+                    graph.add_edge(net_out, x)
+        residual = boykov_kolmogorov(graph, SOURCE, SINK)
+        source_side = self._reachable(residual, SOURCE, residual.succ, forward=True)
+        sink_side = self._reachable(residual, SINK, residual.pred, forward=False)
+        cuts = [region & source_side, region - sink_side]
+        return cutcost, residual.graph["flow_value"], cuts
+
+    @staticmethod
+    def _reachable(residual, start, adj, forward: bool) -> Set[Any]:
+        """
+        The function `_reachable` collects the nodes reachable from `start` (or that reach it,
+        when not `forward`) through the edges of the residual network that are not saturated.
+        """
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            for w, attr in adj[u].items():
+                if w in seen:
+                    continue
+                edge = attr if forward else residual[w][u]
+                if edge["flow"] < edge["capacity"]:
+                    seen.add(w)
+                    queue.append(w)
+        return seen
+
+    def _most_balanced(
+        self, part: Part, part0, part1, region: Set[Any], cuts
+    ) -> Optional[List]:
+        """
+        The function `_most_balanced` returns the moves of the legal cut that leaves the most
+        slack to the lighter side, or None when no cut is legal.
+
+        :param part: The current partition
+        :param part0: The part on the source side
+        :param part1: The part on the sink side
+        :param region: The modules that may change sides
+        :param cuts: The region modules on the source side, one set per cut
+        :return: the moves as (v, to_part) pairs.
+        """
+        diff = self.validator.diff
+        lowerbounds = self.validator.lowerbounds
+        best = None
+        bestslack = -1
+        for source_side in cuts:
+            moves = []
+            weight0 = diff[part0]
+            for v in region:
+                to_part = part0 if v in source_side else part1
+                if part[v] != to_part:
+                    moves.append((v, to_part))
+                    weight_v = self.validator.get_module_weight(v)
+                    weight0 += weight_v if to_part == part0 else -weight_v
+            weight1 = diff[part0] + diff[part1] - weight0
+            slack = min(weight0 - lowerbounds[part0], weight1 - lowerbounds[part1])
+            if slack >= 0 and slack > bestslack:
+                best, bestslack = moves, slack
+        return best
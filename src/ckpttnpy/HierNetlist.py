@@ -2,10 +2,15 @@
 
 HierNetlist extends Netlist with cluster tracking, net weights,
 and projection methods (up/down) for multi-level graph coarsening
-and uncoarsening.
+and uncoarsening. The per-net weight and degree tables used by the gain
+code are built once per level by `net_tables`.
+
+Nets with more pins than `large_net_threshold` (off by default) are left out
+of FM gain maintenance and coarsening, as in hMetis; `cut_cost` still counts
+them for the final cost.
 """
 
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 import networkx as nx
 from netlistx.netlist import Netlist
@@ -34,7 +39,10 @@ class HierNetlist(Netlist):
 
         self.node_down_list: List[Any] = []
         self.net_weight: dict = {}
-        self.clusters: List[Any] = []
+        self.clusters: List[Any] = []  # parent nets merged into clusters
+        self.cluster_members: List[List[Any]] = []  # or the parent modules of each
+        self._net_tables: Optional[Tuple[NetTable, NetTable]] = None
+        self.large_net_threshold: Optional[int] = None  # nets above are ignored by FM
 
     def get_degree(self, v):
         """
@@ -56,7 +64,8 @@ class HierNetlist(Netlist):
     def projection_down(self, part, part_down):
         """
         The `projection_down` function assigns values from the `part` list to the `part_down` list based on
-        the mapping defined by the `self.node_down_list` and `self.clusters` lists.
+        the mapping defined by the `self.node_down_list` and `self.clusters` (or `self.cluster_members`)
+        lists.
 
         .. svgbob::
 
@@ -79,12 +88,16 @@ class HierNetlist(Netlist):
             represents the mapping of nodes in the `self.node_down_list` to their corresponding clusters in the
             `part` parameter
         """
-        num_cells = len(self.node_down_list) - len(self.clusters)
+        if self.cluster_members:  # rating-based clusters
+            members = self.cluster_members
+        else:
+            members = [self.parent.ugraph[net] for net in self.clusters]
+        num_cells = len(self.node_down_list) - len(members)
         for v1, v2 in enumerate(self.node_down_list[:num_cells]):
             part_down[v2] = part[v1]
-        for i_v, net in enumerate(self.clusters):
+        for i_v, cluster in enumerate(members):
             p = part[num_cells + i_v]
-            for v2 in self.parent.ugraph[net]:
+            for v2 in cluster:
                 part_down[v2] = p
 
     def projection_up(self, part, part_up):
@@ -125,3 +138,131 @@ class HierNetlist(Netlist):
         weight = self.net_weight.get(net, 1)
         assert isinstance(weight, int), f"Expected int, got {type(weight)}"
         return weight
+
+    def net_tables(self) -> Tuple["NetTable", "NetTable"]:
+        """
+        The function `net_tables` returns the frozen per-net weight and degree tables of this level.
+
+        The tables are built on first use and cached, so `net_weight` and `large_net_threshold` must be
+        final by then (as they are once `contract_subgraph` or `CSRNetlist.from_netlist` returns).
+        Threads that race on the first call build equal tables, and one of them is kept.
+
+        :return: the weight table and the degree table, both indexed by net
+        """
+        if self._net_tables is None:
+            self._net_tables = build_net_tables(self)
+        return self._net_tables
+
+
+NetTable = Union[Sequence[int], Dict[Any, int]]
+
+
+def build_net_tables(hyprgraph) -> Tuple[NetTable, NetTable]:
+    """
+    The function `build_net_tables` builds per-net weight and degree tables for a netlist.
+
+    For nets numbered ``range(n, n + m)`` the tables are tuples indexed directly by net id (the first
+    ``n`` entries are unused padding); for named nets they are dicts. Nets with more pins than the
+    netlist's `large_net_threshold` get degree 0, so that the gain code skips them like self-loops.
+
+    :param hyprgraph: The netlist
+    :return: the weight table and the degree table, both indexed by net
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> weight, degree = build_net_tables(create_drawf())
+        >>> weight["n0"], degree["n0"]
+        (1, 3)
+    """
+    nets = hyprgraph.nets
+    threshold = getattr(hyprgraph, "large_net_threshold", None)
+    degree = hyprgraph.ugraph.degree
+    degrees = [degree[net] for net in nets]
+    if threshold is not None:
+        degrees = [d if d <= threshold else 0 for d in degrees]
+    if isinstance(nets, range) and nets.step == 1:
+        pad = (0,) * nets.start
+        return (
+            pad + tuple(hyprgraph.get_net_weight(net) for net in nets),
+            pad + tuple(degrees),
+        )
+    return (
+        {net: hyprgraph.get_net_weight(net) for net in nets},
+        dict(zip(nets, degrees)),
+    )
+
+
+def is_large_net(hyprgraph, net) -> bool:
+    """
+    The function `is_large_net` tells whether a net is above the netlist's `large_net_threshold`.
+
+    :param hyprgraph: The netlist
+    :param net: The net
+    :return: True if the net has more pins than the threshold
+    """
+    threshold = getattr(hyprgraph, "large_net_threshold", None)
+    return threshold is not None and hyprgraph.ugraph.degree[net] > threshold
+
+
+def cut_cost(hyprgraph, part) -> int:
+    """
+    The function `cut_cost` computes the exact connectivity cost of a partition, large nets included.
+
+    Every net costs its weight times the number of parts it spans minus one, which is the cut size
+    for a bipartition and the k-way cost maintained by FMKWayGainCalc.
+
+    :param hyprgraph: The netlist
+    :param part: The partition
+    :return: the total cost
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hgr = create_drawf()
+        >>> cut_cost(hgr, {v: 0 for v in hgr})
+        0
+    """
+    ugraph = hyprgraph.ugraph
+    totalcost = 0
+    for net in hyprgraph.nets:
+        num_parts = len({part[w] for w in ugraph[net]})
+        if num_parts > 1:
+            totalcost += hyprgraph.get_net_weight(net) * (num_parts - 1)
+    return totalcost
+
+
+def cut_nets(hyprgraph, part) -> Set[Any]:
+    """
+    The function `cut_nets` returns the nets whose pins lie in more than one part.
+
+    :param hyprgraph: The netlist
+    :param part: The partition
+    :return: the set of cut nets
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hgr = create_drawf()
+        >>> cut_nets(hgr, {v: 0 for v in hgr})
+        set()
+    """
+    ugraph = hyprgraph.ugraph
+    cut = set()
+    for net in hyprgraph.nets:
+        pins = iter(ugraph[net])
+        first = next(pins, None)
+        if first is not None and any(part[w] != part[first] for w in pins):
+            cut.add(net)
+    return cut
+
+
+def net_tables(hyprgraph) -> Tuple[NetTable, NetTable]:
+    """
+    The function `net_tables` returns the per-net weight and degree tables of any netlist.
+
+    A `HierNetlist` caches them per level; other netlists (e.g. a plain `Netlist`) get fresh tables.
+
+    :param hyprgraph: The netlist
+    :return: the weight table and the degree table, both indexed by net
+    """
+    if isinstance(hyprgraph, HierNetlist):
+        return hyprgraph.net_tables()
+    return build_net_tables(hyprgraph)
@@ -3,25 +3,69 @@
 MLPartMgr implements multi-level recursive partitioning: contracts large hypergraphs
 into smaller ones, recurses, then uncoarsens with FM optimization at each level.
 Provides MLBiPartMgr (2-way) and MLKWayPartMgr (k-way) specializations.
+Module identifiers are remapped to dense indices once on entry, and the
+partition is kept in an array('b') until it is written back at the end.
+After the first descent, optional V-cycles re-coarsen without contracting the
+cut nets, so that the current partition carries over to every level, and
+refine it again on the way back up.
+The levels of the first descent depend only on the netlist and the module
+weights, so they are cached in `hierarchy` and reused by later runs on the same
+netlist (multi-start), unless `randomized_coarsening` gives every run its own
+randomized levels. At the coarsest level, a portfolio of initial
+partitioners (see initial_part) competes with the projected partition, and the
+best one after FM is projected back up. At the `flow_levels` finest levels, FM
+is followed by max-flow refinement (see FlowRefiner), and by FM again when the
+flows improved the cut.
+Unless `limitsize` is set, the coarsening stops adaptively, before the next
+contraction: at a number of modules proportional to k, or when the contraction
+ratio of the last level says that another level would cost more than it saves
+on the initial partitioning, whose estimated cost grows with the size of the
+level relative to k.
+When the `deadline` passes, no further level, initial partitioner, V-cycle or
+FM move is started: the levels already descended are refined as far as FM got,
+which keeps the best legal partition found so far.
+
+Thread safety: the state of a run lives in the managers that it creates
+(gain calculators and buckets, constraint managers, the dense partition), so
+separate MLPartMgr instances can partition concurrently in one process, also on
+free-threaded CPython. The netlists and the cached hierarchy are only read
+during a run, apart from lazily built, idempotent caches and the append of a
+new level, which takes a lock. Shallow copies of one manager can therefore share
+its hierarchy across threads, but one instance must not run two partitions at
+the same time.
 """
 
 import gc
+import math
+import random
+import threading
+from array import array
 
 # from ckpttnpy.min_cover import contract_subgraph
 from ckpttnpy.FMPartMgr import FMPartMgr
 from ckpttnpy.NNPartMgr import NNPartMgr
 
+from .CSRNetlist import PART_TYPECODE, CSRNetlist, from_dense_part, to_dense_part
+from .FlowRefiner import FlowRefiner
 from .FMBiConstrMgr import FMBiConstrMgr
 from .FMBiGainCalc import FMBiGainCalc
 from .FMBiGainMgr import FMBiGainMgr
 from .FMConstrMgr import LegalCheck
+from .FMKWayCompactGainCalc import FMKWayCompactGainCalc
 from .FMKWayConstrMgr import FMKWayConstrMgr
-from .FMKWayGainCalc import FMKWayGainCalc
 from .FMKWayGainMgr import FMKWayGainMgr
+from .HierNetlist import cut_cost, cut_nets
+from .initial_part import INITIAL_PARTITIONERS
 
 # Take a snapshot when a move make **negative** gain.
 # Snapshot in the form of "interface"???
 from .min_cover import contract_subgraph
+from .PartMgrBase import expired
+
+COARSEST_SIZE_PER_PART = 25  # adaptive coarsening target, in modules per part
+INITIAL_PARTITION_COST = 2  # one FM run from scratch, in refinements
+
+_hierarchy_lock = threading.Lock()  # for levels added to a shared hierarchy
 
 
 class MLPartMgr:
@@ -53,13 +97,29 @@ class MLPartMgr:
         self.bal_tol = bal_tol
         self.num_parts = num_parts
         self.totalcost = 0
-        self.LIMIT_SIZE = 50
+        self.LIMIT_SIZE = None  # None: adaptive, see _coarsen_further
+        self.large_net_threshold = None  # e.g. 200 to let FM ignore larger nets
+        self.max_stall_moves = None  # early termination of FM passes, see PartMgrBase
+        self.max_move_fraction = None
+        self.boundary_fm = False  # refine with boundary-only FM, see FMGainMgr
+        self.label_propagation = False  # before the FM passes, see PartMgrBase
+        self.flow_levels = 0  # finest levels refined with max-flow, see FlowRefiner
+        self.coarsening = "matching"  # or "heavy_edge", "first_choice", see min_cover
+        self.num_vcycles = 0  # V-cycles after the first descent
+        self.initial_partitioners = INITIAL_PARTITIONERS  # at the coarsest level
+        self.rng = None  # for the initial partitioners, the `random` module if None
+        self.randomized_coarsening = False  # shuffle every contraction with rng
+        self.deadline = None  # time.monotonic() value, see PartMgrBase.expired
+        self.hierarchy = None  # cached levels [(hyprgraph, module_weight), ...]
+        self._hierarchy_key = None
 
     @property
     def limitsize(self):
         """
         The `limitsize` function is a property that returns the value of the `_limitsize` attribute.
-        :return: The `limitsize` property is returning the value of the `_limitsize` attribute.
+        :return: The `limitsize` property is returning the value of the `_limitsize` attribute, the
+            number of modules below which a level is not contracted, or None when the coarsening
+            stops adaptively.
         """
         return self.LIMIT_SIZE
 
@@ -69,7 +129,7 @@ class MLPartMgr:
         The above function is a setter method that sets the value of the "_limitsize" attribute in a class.
 
         :param limit: The `limit` parameter is the value that will be assigned to the `_limitsize` attribute
-            of the object
+            of the object, None for the adaptive limit
         """
         self.LIMIT_SIZE = limit
 
@@ -88,9 +148,255 @@ class MLPartMgr:
             in the hypergraph `hyprgraph`. Each element in the list corresponds to a module and contains an integer
             value representing the partition number to which the module belongs
         :return: The function `run_Partition` returns the value of `legalcheck`.
+
+        Named modules are remapped to 0..n-1 (a `CSRNetlist`) on entry; the
+        engine works on a dense ``array('b')`` partition, which is copied back
+        into the caller's `part` when done.
+
+        When `large_net_threshold` is set, nets with more pins are left out of
+        FM and coarsening on a private copy of the netlist, and `totalcost` is
+        recomputed exactly, large nets included, at the end.
+
+        Up to `num_vcycles` V-cycles follow the first descent; they stop as soon
+        as one of them does not improve `totalcost`, or once the `deadline`
+        has passed.
+
+        The levels of the first descent are taken from `hierarchy` when it was
+        built for the same `hyprgraph` and `module_weight` objects, see
+        `build_hierarchy`; otherwise they are built (and cached) on the way.
+        With `randomized_coarsening`, every run builds its own levels, each
+        contraction visiting the modules in an order shuffled by `rng`.
+        """
+        modules = list(hyprgraph.modules)
+        if self.randomized_coarsening or not self._has_hierarchy(
+            hyprgraph, module_weight
+        ):
+            self._init_hierarchy(hyprgraph, module_weight)
+        hyprgraph, module_weight = self.hierarchy[0]
+        part_dense = to_dense_part(part, modules)
+        legalcheck = self._run_Partition(hyprgraph, module_weight, part_dense, level=0)
+        for _ in range(self.num_vcycles):
+            if legalcheck != LegalCheck.AllSatisfied or expired(self.deadline):
+                break
+            totalcostbefore = self.totalcost
+            legalcheck = self._run_Partition(
+                hyprgraph, module_weight, part_dense, vcycle=True
+            )
+            assert self.totalcost <= totalcostbefore
+            if self.totalcost == totalcostbefore:
+                break
+        if self.large_net_threshold is not None:
+            self.totalcost = cut_cost(hyprgraph, part_dense)
+        from_dense_part(part_dense, part, modules)
+        return legalcheck
+
+    def build_hierarchy(self, hyprgraph, module_weight, rng=None):
+        """
+        The function `build_hierarchy` builds all the levels of the first
+        descent up front, so that later calls of `run_Partition` on the same
+        `hyprgraph` only refine. A shallow copy of the manager shares the
+        hierarchy, which lets several starts run from the same cached levels.
+
+        :param hyprgraph: The netlist that will be partitioned
+        :param module_weight: The module weights that will be used
+        :param rng: An optional `random.Random`; when given, the modules are
+            visited in a shuffled order at each level, which gives a different
+            hierarchy for each seed
+
+        The levels that are missing when the `deadline` passes are left to
+        `run_Partition`.
         """
+        self._init_hierarchy(hyprgraph, module_weight)
+        levels = self.hierarchy
+        while (
+            levels[-1] is not None
+            and not expired(self.deadline)
+            and self._coarsen_further(
+                levels[-1][0], levels[-2][0] if len(levels) > 1 else None
+            )
+        ):
+            order = None
+            if rng is not None:
+                order = list(levels[-1][0])
+                rng.shuffle(order)
+            levels.append(self._contract(*levels[-1], set(), order))
+
+    def _has_hierarchy(self, hyprgraph, module_weight):
+        key = self._hierarchy_key
+        return (
+            self.hierarchy is not None
+            and key[0] is hyprgraph
+            and key[1] is module_weight
+            and key[2:]
+            == (
+                self.coarsening,
+                self.limitsize,
+                self.large_net_threshold,
+                len(self.initial_partitioners),
+            )
+        )
 
-        def legalcheck_fn():
+    def _init_hierarchy(self, hyprgraph, module_weight):
+        """
+        The function `_init_hierarchy` starts a new hierarchy whose only level
+        is `hyprgraph` itself, on dense module indices.
+        """
+        self._hierarchy_key = (
+            hyprgraph,
+            module_weight,
+            self.coarsening,
+            self.limitsize,
+            self.large_net_threshold,
+            len(self.initial_partitioners),  # see _max_contraction_ratio
+        )
+        if (
+            not isinstance(hyprgraph.modules, range)
+            or self.large_net_threshold is not None
+        ):
+            modules = list(hyprgraph.modules)
+            hyprgraph = CSRNetlist.from_netlist(hyprgraph)
+            hyprgraph.large_net_threshold = self.large_net_threshold
+            if isinstance(module_weight, dict):
+                module_weight = [module_weight.get(v, 1) for v in modules]
+        self.hierarchy = [(hyprgraph, module_weight)]
+
+    def _coarser(self, level):
+        """
+        The function `_coarser` returns the level below `level` in the cached
+        hierarchy, contracting it on first use, or None when `_contract` does
+        not use the contraction.
+        """
+        levels = self.hierarchy
+        if level + 1 == len(levels):
+            coarse = self._contract(*levels[level], set())
+            with _hierarchy_lock:  # a copy may have added it in the meantime
+                if level + 1 == len(levels):
+                    levels.append(coarse)
+        return levels[level + 1]
+
+    def _contract(self, hyprgraph, module_weight, forbid, order=None):
+        """
+        The function `_contract` contracts `hyprgraph` and returns the coarser
+        hypergraph with its module weights, or None when it does not remove any
+        module, or, with an explicit `limitsize`, when it keeps 2/3 of them or
+        more. The adaptive limit keeps every contraction and lets
+        `_coarsen_further` stop before the next one instead. Without an
+        `order`, `randomized_coarsening` shuffles the modules with `rng`.
+        """
+        if order is None and self.randomized_coarsening:
+            order = list(hyprgraph)
+            (random if self.rng is None else self.rng).shuffle(order)
+        hgr2, module_weight2 = contract_subgraph(
+            hyprgraph, module_weight, forbid, self.coarsening, order
+        )
+        ratio = 2 / 3 if self.LIMIT_SIZE is not None else 1.0
+        if hgr2.number_of_modules() < ratio * hyprgraph.number_of_modules():
+            return hgr2, module_weight2
+        return None
+
+    def _coarsen_further(self, hyprgraph, finer=None):
+        """
+        The function `_coarsen_further` decides whether `hyprgraph` is
+        contracted once more.
+
+        An explicit `limitsize` bounds the size of the coarsest level. Otherwise
+        the coarsening stops below ``COARSEST_SIZE_PER_PART`` modules per part,
+        or when the contraction ratio from `finer` to `hyprgraph`, which
+        predicts the next one, is too high to pay off.
+
+        :param hyprgraph: The current level
+        :param finer: The level above it, or None when it is not known
+        :return: True to contract `hyprgraph`.
+        """
+        num_modules = hyprgraph.number_of_modules()
+        if self.LIMIT_SIZE is not None:
+            return num_modules >= self.LIMIT_SIZE
+        if num_modules < COARSEST_SIZE_PER_PART * self.num_parts:
+            return False
+        if finer is None:
+            return True
+        ratio = num_modules / finer.number_of_modules()
+        return ratio < self._max_contraction_ratio(num_modules)
+
+    def _initial_partition_cost(self, num_modules):
+        """
+        The function `_initial_partition_cost` estimates the cost of the initial
+        partitioning at a level of `num_modules` modules, in refinements of
+        that level.
+
+        Every initial partitioner and the projected partition are refined from
+        scratch, ``INITIAL_PARTITION_COST`` refinements each at the size target
+        of ``COARSEST_SIZE_PER_PART`` modules per part. A partition from
+        scratch costs about n log n (greedy growing, and FM passes that grow
+        with the size), against n for the refinement of a projected partition,
+        so the estimate grows by log n / log target above the target.
+
+        :param num_modules: The number of modules of the level
+        :return: the estimated cost c.
+        """
+        target = COARSEST_SIZE_PER_PART * self.num_parts
+        growth = math.log(max(num_modules, target)) / math.log(target)
+        return INITIAL_PARTITION_COST * (len(self.initial_partitioners) + 1) * growth
+
+    def _max_contraction_ratio(self, num_modules):
+        r"""
+        The function `_max_contraction_ratio` returns the contraction ratio
+        above which contracting a level of `num_modules` modules does not pay
+        off.
+
+        Another level with ratio r costs about a contraction and a refinement,
+        (1 + r) times the current level, and moves the initial partitioning, of
+        estimated cost c (see `_initial_partition_cost`), to a level r times
+        smaller. That pays off when c (1 - r) > 1 + r, i.e.
+        r < (c - 1) / (c + 1). As c grows with the size of the level relative
+        to k, large levels keep coarsening at ratios that stop small ones.
+
+        .. svgbob::
+           :align: center
+
+            modules
+              ^
+           n  +--*
+              |   \     ratio 0.6
+              |    *--.
+              |        \    ratio 0.7
+              |         *---.
+              |              '--*  ratio 0.8 > max: stop
+              +--+----+----+----+---> level
+
+        :param num_modules: The number of modules of the level
+        :return: the maximum ratio.
+        """
+        cost = self._initial_partition_cost(num_modules)
+        return (cost - 1) / (cost + 1)
+
+    def _run_Partition(
+        self,
+        hyprgraph,
+        module_weight,
+        part,
+        vcycle=False,
+        level=None,
+        depth=0,
+        finer=None,
+    ):
+        """
+        The function `_run_Partition` is the recursive body of `run_Partition`,
+        working on dense module indices.
+
+        :param hyprgraph: The hypergraph of the current level
+        :param module_weight: The module weights of the current level
+        :param part: The dense partition of the current level
+        :param vcycle: Whether `part` is a partition to keep (a V-cycle), in
+            which case its cut nets are not contracted at any level
+        :param level: The index of the current level in `hierarchy`, or None
+            when the levels are not cached (V-cycles)
+        :param depth: The number of levels above the current one
+        :param finer: The hypergraph of the level above, None at the top
+        :return: the value of `legalcheck`.
+        """
+
+        def legalcheck_fn(part):
             """
             The function `legalcheck_fn` creates instances of various managers and uses them to perform a legal
             check on a given part, returning the result and the total cost.
@@ -105,7 +411,7 @@ class MLPartMgr:
             legalcheck = part_mgr.legalize(part)
             return legalcheck, part_mgr.totalcost
 
-        def optimize_fn():
+        def optimize_fn(part):
             """
             The function `optimize_fn` optimizes a given part by calculating the total cost using various
             managers and returns the result.
@@ -113,34 +419,75 @@ class MLPartMgr:
             :return: the total cost calculated by the `part_mgr.optimize()` method.
             """
             gain_mgr = self.GainMgr(self.GainCalc, hyprgraph, self.num_parts)
+            gain_mgr.boundary_only = self.boundary_fm
             constr_mgr = self.ConstrMgr(
                 hyprgraph, self.bal_tol, module_weight, self.num_parts
             )
             part_mgr = self.PartMgr(hyprgraph, gain_mgr, constr_mgr)
+            part_mgr.max_stall_moves = self.max_stall_moves
+            part_mgr.max_move_fraction = self.max_move_fraction
+            part_mgr.label_propagation = self.label_propagation
+            part_mgr.deadline = self.deadline
             part_mgr.optimize(part)
+            if depth < self.flow_levels and not expired(self.deadline):
+                refiner = FlowRefiner(hyprgraph, constr_mgr)
+                refiner.deadline = self.deadline
+                if refiner.refine(part) > 0:
+                    part_mgr.optimize(part)
             return part_mgr.totalcost
 
-        legalcheck, totalcost = legalcheck_fn()
+        legalcheck, totalcost = legalcheck_fn(part)
         if legalcheck != LegalCheck.AllSatisfied:
             self.totalcost = totalcost
             return legalcheck
 
-        if hyprgraph.number_of_modules() >= self.limitsize:  # OK
+        coarsest = True
+        if not expired(self.deadline) and self._coarsen_further(hyprgraph, finer):
             try:
-                hgr2, module_weight2 = contract_subgraph(
-                    hyprgraph, module_weight, set()
-                )
-                if hgr2.number_of_modules() * 3 / 2 < hyprgraph.number_of_modules():
-                    part2 = [0] * hgr2.number_of_modules()
+                if level is None:
+                    forbid = cut_nets(hyprgraph, part) if vcycle else set()
+                    coarse = self._contract(hyprgraph, module_weight, forbid)
+                    level2 = None
+                else:
+                    coarse = self._coarser(level)
+                    level2 = level + 1
+                if coarse is not None:
+                    coarsest = False
+                    hgr2, module_weight2 = coarse
+                    part2 = array(PART_TYPECODE, bytes(hgr2.number_of_modules()))
                     hgr2.projection_up(part, part2)
-                    legalcheck_recur = self.run_Partition(hgr2, module_weight2, part2)
+                    legalcheck_recur = self._run_Partition(
+                        hgr2,
+                        module_weight2,
+                        part2,
+                        vcycle,
+                        level2,
+                        depth + 1,
+                        hyprgraph,
+                    )
                     if legalcheck_recur == LegalCheck.AllSatisfied:
                         hgr2.projection_down(part2, part)
             except MemoryError:
                 print("MemoryError: Not enough memory available.")
                 gc.collect()
 
-        self.totalcost = optimize_fn()
+        self.totalcost = optimize_fn(part)
+        if coarsest and not vcycle:
+            # initial partitioning portfolio, the projected part included
+            rng = random if self.rng is None else self.rng
+            for initial_partitioner in self.initial_partitioners:
+                if expired(self.deadline):
+                    break
+                part2 = array(PART_TYPECODE, part)
+                initial_partitioner(
+                    hyprgraph, module_weight, self.num_parts, part2, rng
+                )
+                if legalcheck_fn(part2)[0] != LegalCheck.AllSatisfied:
+                    continue
+                totalcost = optimize_fn(part2)
+                if totalcost < self.totalcost:
+                    self.totalcost = totalcost
+                    part[:] = part2
         assert self.totalcost >= 0
         return legalcheck
 
@@ -178,7 +525,7 @@ class MLKWayPartMgr(MLPartMgr):
         """
         MLPartMgr.__init__(
             self,
-            FMKWayGainCalc,
+            FMKWayCompactGainCalc,
             FMKWayGainMgr,
             FMKWayConstrMgr,
             FMPartMgr,
@@ -220,7 +567,7 @@ class MLKWayNNPartMgr(MLPartMgr):
         """
         MLPartMgr.__init__(
             self,
-            FMKWayGainCalc,
+            FMKWayCompactGainCalc,
             FMKWayGainMgr,
             FMKWayConstrMgr,
             NNPartMgr,
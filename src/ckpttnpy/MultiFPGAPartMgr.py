@@ -136,6 +136,18 @@ class MultiFPGAGainCalc(FMKWayGainCalc):
         """Set the weight for inter-FPGA communication costs in gain calculations"""
         self.inter_fpga_cost_weight = weight
 
+    def vertex_gains(self, v, part):
+        """Recompute the gains of v, including the inter-FPGA term of its general nets"""
+        gains = super().vertex_gains(v, part)
+        for net in self.hyprgraph.ugraph[v]:
+            if self.net_degree[net] <= 3:
+                continue
+            if sum(c > 0 for c in self.pin_count[net]) > 1:
+                net_weight = self.net_weight[net] * self.inter_fpga_cost_weight
+                for k in self.rr.exclude(part[v]):
+                    gains[k] -= net_weight
+        return gains
+
     def _init_gain_general_net(self, net, part):
         """Initialize gain for general net, considering inter-FPGA communication costs"""
         # Call parent implementation first
@@ -149,9 +161,7 @@ class MultiFPGAGainCalc(FMKWayGainCalc):
 
         if len(connected_fpgas) > 1:  # Net spans multiple FPGAs
             # Increase the cost based on the inter-FPGA communication weight
-            net_weight = (
-                self.hyprgraph.get_net_weight(net) * self.inter_fpga_cost_weight
-            )
+            net_weight = self.net_weight[net] * self.inter_fpga_cost_weight
             for w in self.hyprgraph.ugraph[net]:
                 self._modify_gain(
                     w, part[w], -net_weight
@@ -99,6 +99,9 @@ class NNGainMgr:
         The function `update_move` updates the gain of a move in a graph based on the given move
         information.
 
+        The per-net pin distribution table (`gain_calc.pin_count`) is updated in O(1) per net, and
+        general nets that are not critical for the move are skipped without scanning their pins.
+
         :param part: A list that represents the partition of the graph. Each element in the list corresponds
             to a vertex in the graph and indicates which partition the vertex belongs to. For example, if part =
             [0, 1, 0, 1], it means that vertex 0 and vertex 2 belong
@@ -107,25 +110,32 @@ class NNGainMgr:
         """
         self.gain_calc.update_move_init()
         v, from_part, to_part = move_info_v
+        pin_count = self.gain_calc.pin_count
+        net_degree = self.gain_calc.net_degree
         for net in self.hyprgraph.ugraph[v]:
-            degree = self.hyprgraph.ugraph.degree[net]
+            degree = net_degree[net]
             if degree < 2:  # unlikely, self-loop, etc.
                 continue  # does not provide any gain change when move
+            num = pin_count[net]
             move_info = [net, v, from_part, to_part]
             if degree == 2:
                 self._update_move_net(
                     part, move_info, self.gain_calc.update_move_2pin_net
                 )
-            else:
+            elif degree == 3:
+                self.gain_calc.init_idx_vec(v, net)
+                self._update_move_net(
+                    part, move_info, self.gain_calc.update_move_3pin_net
+                )
+            elif num[from_part] <= 2 or num[to_part] <= 1:
+                # Only critical nets change gains: with at least two other pins
+                # left on both sides, no delta is possible.
                 self.gain_calc.init_idx_vec(v, net)
-                if degree == 3:
-                    self._update_move_net(
-                        part, move_info, self.gain_calc.update_move_3pin_net
-                    )
-                else:
-                    self._update_move_net(
-                        part, move_info, self.gain_calc.update_move_general_net
-                    )
+                self._update_move_net(
+                    part, move_info, self.gain_calc.update_move_general_net
+                )
+            num[from_part] -= 1
+            num[to_part] += 1
 
     @abstractmethod
     def modify_key(self, w, part_w, key) -> None:
@@ -3,11 +3,13 @@
 NNPartMgr implements a simplified FM-style partition optimization without
 backtracking (no snapshot/restore). Unlike PartMgrBase, _optimize_1pass
 only accepts positive-gain moves and stops at the first non-improving move.
+Every move improves the cost, so a `deadline` can stop it after any move.
 """
 
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from .FMConstrMgr import LegalCheck
+from .PartMgrBase import expired
 
 Part = Union[Dict[Any, int], List[int]]
 
@@ -38,6 +40,7 @@ class NNPartMgr:
         self.validator = constr_mgr
         self.num_parts = gain_mgr.num_parts
         self.totalcost = 0
+        self.deadline: Optional[float] = None  # time.monotonic() value, see expired
 
     def get_module_weight(self, v: Any) -> int:
         """Get module weight for a given module.
@@ -108,6 +111,9 @@ class NNPartMgr:
         ):
             self.gain_mgr.lock_all(part[v], v)
 
+        # A legal part is left as it is
+        if self.validator.is_legal():
+            return LegalCheck.AllSatisfied
         legalcheck = LegalCheck.NotSatisfied
         while legalcheck != LegalCheck.AllSatisfied:  # satisfied:
             # Take the gainmax with v from gainbucket
@@ -138,7 +144,7 @@ class NNPartMgr:
     def optimize(self, part: Part):
         """
         The `optimize` function iteratively optimizes the cost of a given part until no further improvement
-        can be made.
+        can be made, or until the `deadline` passes.
 
         :param part: The "part" parameter is an object of type "Part". It is used as input for the
             optimization process
@@ -148,6 +154,8 @@ class NNPartMgr:
         while True:
             self.init(part)
             totalcostbefore = self.totalcost
+            if expired(self.deadline):
+                break
             self._optimize_1pass(part)
             assert self.totalcost <= totalcostbefore
             if self.totalcost == totalcostbefore:
@@ -190,6 +198,8 @@ class NNPartMgr:
             self.validator.update_move(move_info_v)
             totalgain += gainmax
             part[v] = to_part
+            if expired(self.deadline):
+                break
 
         self.totalcost -= totalgain
 
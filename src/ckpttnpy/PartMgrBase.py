@@ -2,18 +2,39 @@
 
 PartMgrBase provides the core FM (Fiduccia-Mattheyses) partition optimization loop:
 initialization, legalization, iterative 1-pass optimization with backtracking,
-and abstract methods for snapshot/restore used by subclasses.
+an optional size-constrained label propagation before the FM passes, and
+abstract methods for snapshot/restore used by subclasses. A `deadline` stops the
+optimization between moves and passes, keeping the best partition so far.
 """
 
 # Take a snapshot when a move make **negative** gain.
 # Snapshot in the form of "interface"???
+import time
 from abc import abstractmethod
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from .FMConstrMgr import LegalCheck
 
 Part = Union[Dict[Any, int], List[int]]
 
+MAX_LABEL_PROPAGATION_ROUNDS = 10
+
+
+def expired(deadline: Optional[float]) -> bool:
+    """
+    The function `expired` tells whether a deadline, a `time.monotonic()` value, has passed.
+
+    :param deadline: The deadline, or None for no deadline
+    :return: True when the deadline has passed.
+
+    Examples:
+        >>> expired(None)
+        False
+        >>> expired(time.monotonic() - 1.0)
+        True
+    """
+    return deadline is not None and time.monotonic() >= deadline
+
 
 # The `PartMgrBase` class is a base class that manages parts, including their hierarchy, gain, and
 # constraints.
@@ -41,6 +62,12 @@ class PartMgrBase:
         self.validator = constr_mgr
         self.num_parts = gain_mgr.num_parts
         self.totalcost = 0
+        # Early termination of a pass (None = run until the buckets are empty)
+        self.max_stall_moves: Optional[int] = None  # moves without a new best prefix
+        self.max_move_fraction: Optional[float] = None  # fraction of modules moved
+        # Size-constrained label propagation before the FM passes
+        self.label_propagation = False
+        self.deadline: Optional[float] = None  # time.monotonic() value, see expired
 
     def get_module_weight(self, v: Any) -> int:
         """Get module weight for a given module.
@@ -81,6 +108,19 @@ class PartMgrBase:
         assert self.totalcost >= 0
         self.validator.init(part)
 
+    def reinit(self, part: Part, moved, undone) -> None:
+        """
+        The `reinit` function prepares another pass incrementally: `totalcost`, the part weights of the
+        `validator` and the gains are carried over from the previous pass, and only the gains around the
+        moved vertices are recomputed before the buckets are refilled.
+
+        :param part: The current partition
+        :type part: Part
+        :param moved: The vertices moved during the previous pass
+        :param undone: The vertices whose moves were rolled back at the end of the pass
+        """
+        self.gain_mgr.reinit(part, moved, undone)
+
     def legalize(self, part: Part):
         """
         The `legalize` function is used to perform a legalization process on a given part in a graph.
@@ -111,6 +151,9 @@ class PartMgrBase:
         ):
             self.gain_mgr.lock_all(part[v], v)
 
+        # A legal part is left as it is
+        if self.validator.is_legal():
+            return LegalCheck.AllSatisfied
         legalcheck = LegalCheck.NotSatisfied
         while legalcheck != LegalCheck.AllSatisfied:  # satisfied:
             # Take the gainmax with v from gainbucket
@@ -141,31 +184,109 @@ class PartMgrBase:
     def optimize(self, part: Part):
         """
         The `optimize` function iteratively optimizes the cost of a given part until no further improvement
-        can be made.
+        can be made. Later passes start from `reinit`, unless most of the previous pass was rolled back, in
+        which case recomputing everything with `init` is cheaper. With `label_propagation` set, the FM
+        passes start from the result of `_label_propagation`. When the `deadline` passes, the current
+        pass stops at its best prefix and no other pass starts.
 
         :param part: The "part" parameter is an object of type "Part". It is used as input for the
             optimization process
         :type part: Part
         """
         # legalcheck = LegalCheck.NotSatisfied
-        for _ in range(100):  # max_passes
+        self.init(part)
+        if self.label_propagation and self._label_propagation(part):
             self.init(part)
+        num_modules = self.hyprgraph.number_of_modules()
+        for _ in range(100):  # max_passes
+            if expired(self.deadline):
+                break
             totalcostbefore = self.totalcost
-            self._optimize_1pass(part)
+            moved, undone = self._optimize_1pass(part)
             assert self.totalcost <= totalcostbefore
             if self.totalcost == totalcostbefore:
                 break
+            if 2 * len(undone) > num_modules:
+                self.init(part)
+            else:
+                self.reinit(part, moved, undone)
         # return legalcheck
 
+    def _label_propagation(self, part: Part) -> int:
+        """
+        The `_label_propagation` function runs rounds of size-constrained label propagation: every
+        module that is not fixed moves to the part with the highest positive gain among those the
+        `validator` accepts (the same constraints as the FM passes), with the gains computed by the gain calculator from the current pin
+        distribution. The rounds stop when one of them improves nothing, or after
+        `MAX_LABEL_PROPAGATION_ROUNDS`.
+
+        The moves update the pin distribution, the part weights and `totalcost`, but not the buckets,
+        so the caller must `init` again when a module was moved.
+
+        .. svgbob::
+
+            "round 1"            "round 2"            "round 3"
+          +-----+-----+        +-----+-----+        +-----+-----+
+          | a b | c d |  -->   | a b | c d |  -->   | a b | c d |
+          | e   | f g |        |     | e f |        |     | e f |
+          +-----+-----+        +-----+-----+        +-----+-----+
+            e: gain 2, legal     no move has gain      converged
+
+        :param part: The current partition, updated in place
+        :type part: Part
+        :return: the number of moves.
+        """
+        fixed = self.hyprgraph.module_fixed or ()
+        modules = [v for v in self.hyprgraph if v not in fixed]
+        num_moves = 0
+        for _ in range(MAX_LABEL_PROPAGATION_ROUNDS):
+            if expired(self.deadline):
+                break
+            totalcostbefore = self.totalcost
+            for v in modules:
+                gains = self.gain_mgr.vertex_gains(part, v)
+                from_part = part[v]
+                for to_part in sorted(
+                    range(self.num_parts), key=gains.__getitem__, reverse=True
+                ):
+                    gain = gains[to_part]
+                    if gain <= 0:
+                        break
+                    if to_part == from_part:
+                        continue
+                    move_info_v = v, from_part, to_part
+                    if not self.validator.check_constraints(move_info_v):
+                        continue
+                    self.gain_mgr.update_pin_count(move_info_v)
+                    self.validator.update_move(move_info_v)
+                    part[v] = to_part
+                    self.totalcost -= gain
+                    num_moves += 1
+                    break
+            assert self.totalcost >= 0
+            if self.totalcost == totalcostbefore:
+                break
+        return num_moves
+
     def _optimize_1pass(self, part: Part):
         """
         The `_optimize_1pass` function optimizes the placement of parts by selecting moves with the maximum
         gain and updating the placement accordingly.
 
+        Instead of copying the whole partition when the gain turns negative, the moves made after the
+        best point are journaled as (v, from_part) and undone in reverse order at the end of the pass, so
+        that the cost of backtracking is proportional to the number of moves undone. The part weights of
+        the validator are rolled back too; the gains are left to `reinit`.
+
+        The pass stops early, keeping the best prefix, after `max_stall_moves` moves without a new best
+        prefix or after moving `max_move_fraction` of the modules, when those are set, and when the
+        `deadline` passes.
+
         :param part: The `part` parameter represents a specific partition or group of elements. It is used
             in the context of a partitioning algorithm where elements are divided into different groups or
             partitions based on certain criteria
         :type part: Part
+        :return: the vertices moved during the pass, and those of them that were moved back.
 
         .. svgbob::
 
@@ -183,8 +304,14 @@ class PartMgrBase:
         """
         totalgain = 0
         deferredsnapshot = False
-        snapshot = None
+        journal = []  # (v, from_part) of the moves since the last best point
+        bestlen = 0
         besttotalgain = 0
+        moved = []
+        max_moves = None
+        if self.max_move_fraction is not None:
+            num_modules = self.hyprgraph.number_of_modules()
+            max_moves = max(1, int(self.max_move_fraction * num_modules))
         # legalcheck = LegalCheck.NotSatisfied
 
         while not self.gain_mgr.is_empty():
@@ -198,17 +325,21 @@ class PartMgrBase:
             if gainmax < 0:
                 # become down turn
                 if (not deferredsnapshot) or (totalgain > besttotalgain):
-                    # Take a snapshot before move
-                    snapshot = self.take_snapshot(part)
+                    # Mark the best point before move
+                    bestlen = len(journal)
                     besttotalgain = totalgain
                 deferredsnapshot = True
             elif totalgain + gainmax >= besttotalgain:
                 besttotalgain = totalgain + gainmax
                 deferredsnapshot = False
+                journal.clear()  # never rolled back past this move
 
             # Update v and its neigbours (even they are in waitinglist)
             # Put neigbours to bucket
-            v, _, to_part = move_info_v
+            v, from_part, to_part = move_info_v
+            if deferredsnapshot:
+                journal.append((v, from_part))
+            moved.append(v)
             self.gain_mgr.lock(to_part, v)
             self.gain_mgr.update_move(part, move_info_v)
             self.gain_mgr.update_move_v(move_info_v, gainmax)
@@ -216,13 +347,29 @@ class PartMgrBase:
             totalgain += gainmax
             part[v] = to_part
 
+            if max_moves is not None and len(moved) >= max_moves:
+                break
+            if expired(self.deadline):
+                break
+            if (
+                deferredsnapshot
+                and self.max_stall_moves is not None
+                and len(journal) - bestlen >= self.max_stall_moves
+            ):
+                break
+
         if deferredsnapshot:
-            # restore previous best solution
-            self.restore_part_info(snapshot, part)
+            # restore previous best solution by undoing the tail of the journal
+            undone = journal[bestlen:]
+            for v, from_part in reversed(undone):
+                self.validator.undo_move((v, from_part, part[v]))
+                part[v] = from_part
             totalgain = besttotalgain
+        else:
+            undone = []
 
         self.totalcost -= totalgain
-        # return legalcheck
+        return moved, [v for v, _ in undone]
 
     def final_check(self, part: Part) -> bool:
         """
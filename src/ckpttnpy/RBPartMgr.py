@@ -0,0 +1,165 @@
+"""Recursive bisection manager for k-way partitioning.
+
+RBPartMgr partitions a netlist into k parts by recursive bisection with
+MLBiPartMgr, so that memory and the cost per move do not grow with k as they do
+for MLKWayPartMgr. Each bisection works on the sub-netlist induced by one side
+(net splitting, see `CSRNetlist.subnetlist`), which makes the sum of the
+bisection costs equal to the (k-1) cost of the final partition. An odd k is
+split into floor(k/2) and ceil(k/2) parts with matching target ratios. The
+balance tolerance of each bisection is derived from the weight of the
+sub-netlist and the number of levels left below it (adaptive imbalance), so that
+the final parts still meet the k-way lower bound and the slack left unused by
+one bisection goes to the next ones.
+A `deadline` is passed on to every bisection, which then still splits its
+modules legally, so that a run stopped by it keeps k legal parts.
+"""
+
+import copy
+import math
+from functools import partial
+from typing import List
+
+from .CSRNetlist import CSRNetlist, dense_index
+from .FMConstrMgr import LegalCheck
+from .MLPartMgr import MLBiPartMgr
+
+
+class RBPartMgr:
+    r"""The `RBPartMgr` class is a manager for k-way partitioning by recursive bisection.
+
+    .. svgbob::
+       :align: center
+
+                        k = 5
+                   .------+------.
+                   |             |
+                 k = 2         k = 3
+                .--+--.     .----+----.
+                |     |     |         |
+                0     1     2       k = 2
+                                   .--+--.
+                                   |     |
+                                   3     4
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hyprgraph = create_drawf()
+        >>> part_mgr = RBPartMgr(0.3, 3)
+        >>> part = {v: 0 for v in hyprgraph}
+        >>> part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+        <LegalCheck.AllSatisfied: 2>
+        >>> sorted(set(part.values()))
+        [0, 1, 2]
+    """
+
+    def __init__(self, bal_tol, num_parts) -> None:
+        """
+        The function initializes the manager with the k-way balance tolerance.
+
+        :param bal_tol: The balance tolerance of the final k-way partition, with
+            the same meaning as for `FMKWayConstrMgr`: every part weighs at least
+            ``2 * bal_tol`` times the average part weight
+        :param num_parts: The number of parts, any k >= 2
+        """
+        self.bal_tol = bal_tol
+        self.num_parts = num_parts
+        self.totalcost = 0
+        self.bipart_mgr = MLBiPartMgr(bal_tol)  # settings for every bisection
+        self.deadline = None  # time.monotonic() value, see PartMgrBase.expired
+
+    def run_Partition(self, hyprgraph, module_weight, part):
+        """
+        The function `run_Partition` splits `hyprgraph` into `num_parts` parts by
+        recursive bisection.
+
+        The parts of `part` on entry give the initial side of every module at
+        each bisection (module v starts on the lower side when part[v] falls in
+        the lower half of the parts being split).
+
+        :param hyprgraph: The netlist to partition
+        :param module_weight: The module weights
+        :param part: The initial partition, updated in place
+        :return: the worst `legalcheck` of all the bisections.
+        """
+        modules, module_index = dense_index(hyprgraph)
+        if not isinstance(hyprgraph, CSRNetlist):
+            hyprgraph = CSRNetlist.from_netlist(hyprgraph)
+        if isinstance(module_weight, dict):
+            weights = [module_weight.get(v, 1) for v in modules]
+        else:
+            weights = [module_weight[module_index[v]] for v in modules]
+        part_dense = [part[v] for v in modules]
+
+        # the k-way lower bound of FMKWayConstrMgr
+        lowerbound = 2.0 * self.bal_tol * sum(weights) / self.num_parts
+
+        self.totalcost = 0
+        legalcheck = self._bisect(
+            hyprgraph,
+            weights,
+            part_dense,
+            list(range(len(part_dense))),
+            0,
+            self.num_parts,
+            lowerbound,
+        )
+        for i_v, v in enumerate(modules):
+            part[v] = part_dense[i_v]
+        return legalcheck
+
+    def _bisect(
+        self, hyprgraph, weights, part, modules: List[int], first, k, lowerbound
+    ) -> LegalCheck:
+        """
+        The function `_bisect` assigns `modules` to the parts first..first+k-1.
+
+        :param hyprgraph: The top-level netlist
+        :param weights: The module weights of the top-level netlist
+        :param part: The dense partition of the top-level netlist
+        :param modules: The modules to split
+        :param first: The first part of this range
+        :param k: The number of parts in this range
+        :param lowerbound: The lower bound of the weight of a final part
+        :return: the worst `legalcheck` in this range.
+
+        With W the weight of `modules`, every final part must keep at least
+        rho = k * lowerbound / W of its share of W; spread over the
+        ceil(log2(k)) levels left, one bisection keeps rho' = rho^(1/levels),
+        which is ``2 * bal_tol`` for FMBiConstrMgr.
+        """
+        if k == 1 or not modules:
+            for v in modules:
+                part[v] = first
+            return LegalCheck.AllSatisfied
+
+        k0 = k // 2
+        k1 = k - k0
+        if len(modules) == hyprgraph.number_of_modules():
+            sub = hyprgraph
+        else:
+            sub = hyprgraph.subnetlist(modules)
+        sub_weight = [weights[v] for v in modules]
+        rho = min(1.0, k * lowerbound / max(sum(sub_weight), 1))
+        bal_tol = rho ** (1.0 / math.ceil(math.log2(k))) / 2.0
+        middle = first + k0
+        part2 = [0 if part[v] < middle else 1 for v in modules]
+
+        part_mgr = copy.copy(self.bipart_mgr)
+        part_mgr.bal_tol = bal_tol
+        part_mgr.hierarchy = None
+        part_mgr.deadline = self.deadline
+        if k0 != k1:
+            part_mgr.ConstrMgr = partial(part_mgr.ConstrMgr, ratios=(k0 / k, k1 / k))
+        legalcheck = part_mgr.run_Partition(sub, sub_weight, part2)
+        self.totalcost += part_mgr.totalcost
+
+        sides: List[List[int]] = [[], []]
+        for v, side in zip(modules, part2):
+            sides[side].append(v)
+        legalcheck0 = self._bisect(
+            hyprgraph, weights, part, sides[0], first, k0, lowerbound
+        )
+        legalcheck1 = self._bisect(
+            hyprgraph, weights, part, sides[1], middle, k1, lowerbound
+        )
+        return min(legalcheck, legalcheck0, legalcheck1, key=lambda c: c.value)
@@ -1,16 +1,29 @@
 """CLI for hypergraph partitioning compatible with hMetis and KaHyPar."""
 
 import argparse
+import copy
 import json
+import os
 import random
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 import networkx as nx
 from netlistx.readwrite import read_are, read_netd
 
+if TYPE_CHECKING:
+    from ckpttnpy.CSRNetlist import CSRNetlist
+    from ckpttnpy.MLPartMgr import MLPartMgr
+    from ckpttnpy.RBPartMgr import RBPartMgr
+
 
 def read_hypergraph_hmetis(filename: str) -> Tuple[nx.Graph, List[int]]:
     """Read hypergraph from hMetis format file."""
@@ -300,39 +313,62 @@ OBJECTIVE_CHOICES = ["cut", "km1", "soed", "km1a"]
 
 
 def get_preset_config(preset: str) -> dict:
-    """Return balance tolerance and recursive flag for a preset."""
+    """Return balance tolerance, recursive and bisection flags for a preset."""
     configs = {
-        "default": {"bal_tol": 0.03, "recursive": True},
-        "quality": {"bal_tol": 0.01, "recursive": False},
-        "highest_quality": {"bal_tol": 0.005, "recursive": False},
-        "deterministic": {"bal_tol": 0.03, "recursive": True},
-        "large_k": {"bal_tol": 0.03, "recursive": True},
+        "default": {"bal_tol": 0.03, "recursive": True, "bisection": False},
+        "quality": {"bal_tol": 0.01, "recursive": False, "bisection": False},
+        "highest_quality": {"bal_tol": 0.005, "recursive": False, "bisection": False},
+        "deterministic": {"bal_tol": 0.03, "recursive": True, "bisection": False},
+        "large_k": {"bal_tol": 0.03, "recursive": True, "bisection": True},
     }
     return configs.get(preset, configs["default"])
 
 
-def run_one_partition(
+def make_part_mgr(
     graph: nx.Graph,
     module_weights: List[int],
-    module_fixed: Set[int],
     bal_tol: float,
     k: int,
     use_recursive: bool,
-    rng: random.Random,
-) -> Tuple[List[int], int]:
-    """Run a single FM partitioning from a randomized start."""
+    bisection: bool = False,
+    deadline: Optional[float] = None,
+    randomized_coarsening: bool = False,
+) -> Tuple[Optional["CSRNetlist"], Optional[Union["MLPartMgr", "RBPartMgr"]]]:
+    """Build the netlist and a partition manager with its coarsening hierarchy.
+
+    The hierarchy depends only on the netlist and the module weights, so it is
+    built once here and shared by all the starts (see
+    `MLPartMgr.build_hierarchy`), unless `randomized_coarsening` lets every
+    start coarsen with its own randomized matching. With `bisection`, k > 2
+    uses recursive bisection (`RBPartMgr`) instead of direct k-way
+    partitioning. The manager and its starts stop at `deadline`, a
+    `time.monotonic()` value (see `PartMgrBase.expired`). Returns
+    ``(None, None)`` when the hypergraph has no modules or no nets.
+    """
     from netlistx.netlist import Netlist
 
+    from ckpttnpy.CSRNetlist import CSRNetlist
+
     modules = [n for n in graph.nodes() if graph.nodes[n].get("bipartite") == 0]
     nets = [n for n in graph.nodes() if graph.nodes[n].get("bipartite") == 1]
 
     if not modules or not nets:
-        return [0] * len(modules), 0
+        return None, None
+
+    netlist = CSRNetlist.from_netlist(Netlist(graph, modules, nets))
 
-    netlist = Netlist(graph, modules, nets)
-    init_part = [0] * len(modules)
-    random_init_part(init_part, len(modules), k, module_fixed, rng)
+    if bisection and k > 2:
+        from ckpttnpy.MLPartMgr import MLBiNNPartMgr
+        from ckpttnpy.RBPartMgr import RBPartMgr
 
+        rb_part_mgr = RBPartMgr(bal_tol, k)
+        rb_part_mgr.deadline = deadline
+        if not use_recursive:
+            rb_part_mgr.bipart_mgr = MLBiNNPartMgr(bal_tol)
+        rb_part_mgr.bipart_mgr.randomized_coarsening = randomized_coarsening
+        return netlist, rb_part_mgr
+
+    part_mgr: MLPartMgr
     if k == 2:
         if use_recursive:
             from ckpttnpy.MLPartMgr import MLBiPartMgr
@@ -359,14 +395,14 @@ def run_one_partition(
 
             part_mgr = MLKWayPartMgr(bal_tol, k)
         else:
+            from ckpttnpy.FMKWayCompactGainCalc import FMKWayCompactGainCalc
             from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
-            from ckpttnpy.FMKWayGainCalc import FMKWayGainCalc
             from ckpttnpy.FMKWayGainMgr import FMKWayGainMgr
             from ckpttnpy.MLPartMgr import MLPartMgr
             from ckpttnpy.NNPartMgr import NNPartMgr
 
             part_mgr = MLPartMgr(
-                FMKWayGainCalc,
+                FMKWayCompactGainCalc,
                 FMKWayGainMgr,
                 FMKWayConstrMgr,
                 NNPartMgr,
@@ -374,10 +410,126 @@ def run_one_partition(
                 k,
             )
 
+    part_mgr.deadline = deadline
+    part_mgr.randomized_coarsening = randomized_coarsening
+    if not randomized_coarsening:
+        part_mgr.build_hierarchy(netlist, module_weights)
+    return netlist, part_mgr
+
+
+def run_one_partition(
+    netlist: Optional["CSRNetlist"],
+    part_mgr: Optional[Union["MLPartMgr", "RBPartMgr"]],
+    module_weights: List[int],
+    num_modules: int,
+    module_fixed: Set[int],
+    k: int,
+    rng: random.Random,
+) -> Tuple[List[int], int]:
+    """Run a single FM partitioning from a randomized start.
+
+    The start works on a shallow copy of `part_mgr`, which has its own cost and
+    random number generator but shares the cached hierarchy with the other
+    starts; with `randomized_coarsening`, it builds its own hierarchy from
+    `rng` instead.
+    """
+    from ckpttnpy.RBPartMgr import RBPartMgr
+
+    if netlist is None or part_mgr is None:
+        return [0] * num_modules, 0
+
+    part_mgr = copy.copy(part_mgr)
+    if isinstance(part_mgr, RBPartMgr):
+        part_mgr.bipart_mgr = copy.copy(part_mgr.bipart_mgr)
+        part_mgr.bipart_mgr.rng = rng
+    else:
+        part_mgr.rng = rng
+    init_part = [0] * num_modules
+    random_init_part(init_part, num_modules, k, module_fixed, rng)
     part_mgr.run_Partition(netlist, module_weights, init_part)
     return init_part, part_mgr.totalcost
 
 
+_worker_args: tuple = ()  # the arguments of every start in a worker process
+
+
+def _init_worker(*args) -> None:
+    """Keep the arguments shared by the starts of a worker process."""
+    global _worker_args
+    _worker_args = args
+
+
+def _run_start(start_seed: Optional[int]) -> Tuple[List[int], int]:
+    """Run one start in a worker process, see `run_multi_start`."""
+    return run_one_partition(*_worker_args, random.Random(start_seed))
+
+
+def run_multi_start(
+    netlist: Optional["CSRNetlist"],
+    part_mgr: Optional[Union["MLPartMgr", "RBPartMgr"]],
+    module_weights: List[int],
+    num_modules: int,
+    module_fixed: Set[int],
+    k: int,
+    seeds: Sequence[Optional[int]],
+    executor: str = "process",
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[int, List[int], int]]:
+    """Run one start per seed in parallel, see `run_one_partition`.
+
+    With the "process" executor, the netlist and the manager (with its cached
+    hierarchy) are sent to each worker process once, by the pool initializer;
+    a start then only receives its seed and sends back the partition and its
+    cost. With the "thread" executor, the starts share the objects of this
+    process, but the GIL runs them one at a time.
+
+    Yields ``(start, part, cost)`` as the starts complete, where `start`
+    indexes `seeds`. The workers default to one per start, and for processes
+    to at most one per CPU. A start is submitted only when a worker is free,
+    and no more once the `deadline` of `part_mgr` has passed, so that a run
+    stopped by it yields the starts that were already running (at least one).
+    """
+    from ckpttnpy.PartMgrBase import expired
+
+    deadline = getattr(part_mgr, "deadline", None)
+    args = (netlist, part_mgr, module_weights, num_modules, module_fixed, k)
+    if max_workers is None:
+        max_workers = len(seeds)
+        if executor == "process":
+            max_workers = min(max_workers, os.cpu_count() or 1)
+    pool: Union[ProcessPoolExecutor, ThreadPoolExecutor]
+    if executor == "process":
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=args
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    with pool:
+        futures = {}
+        starts = enumerate(seeds)
+
+        def submit_next() -> None:
+            start, start_seed = next(starts, (None, None))
+            if start is None:
+                return
+            if executor == "process":
+                fut = pool.submit(_run_start, start_seed)
+            else:
+                fut = pool.submit(run_one_partition, *args, random.Random(start_seed))
+            futures[fut] = start
+
+        for _ in range(max_workers):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                start = futures.pop(fut)
+                part, cost = fut.result()
+                if not expired(deadline):
+                    submit_next()
+                yield start, part, cost
+
+
 def run_cli() -> int:
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -457,6 +609,18 @@ Examples:
         default=1,
         help="Number of starts for multi-start (default: 1)",
     )
+    g_algo.add_argument(
+        "--executor",
+        choices=["process", "thread"],
+        default="process",
+        help="Run the starts in worker processes or threads (default: process)",
+    )
+    g_algo.add_argument(
+        "--randomized-coarsening",
+        action="store_true",
+        help="Coarsen every start with its own randomized matching "
+        "instead of sharing one hierarchy",
+    )
 
     g_other = parser.add_argument_group("Other options")
     g_other.add_argument(
@@ -467,10 +631,19 @@ Examples:
         help="Random seed (0=random device, non-zero=deterministic)",
     )
     g_other.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
-    g_other.add_argument("--time-limit", type=int, help="Time limit in seconds")
+    g_other.add_argument(
+        "--time-limit",
+        type=int,
+        help="Time limit in seconds, after which the best partition so far is written",
+    )
     g_other.add_argument("--max-quality", type=int, help="Maximum quality (iterations)")
 
     args = parser.parse_args()
+    deadline = None
+    if args.time_limit is not None:
+        if args.time_limit <= 0:
+            parser.error("time limit must be positive")
+        deadline = time.monotonic() + args.time_limit
 
     k = args.k or 2
     epsilon_val = args.epsilon or 0.05
@@ -521,19 +694,24 @@ Examples:
         print(f"K={k}, epsilon={epsilon_val}, preset={args.preset}", file=sys.stderr)
 
     num_starts = max(args.threads, 1)
+    bisection = get_preset_config(args.preset)["bisection"]
+    netlist, part_mgr = make_part_mgr(
+        graph,
+        module_weights,
+        epsilon_val,
+        k,
+        use_recursive,
+        bisection,
+        deadline,
+        args.randomized_coarsening,
+    )
     best_part: List[int] = [0] * num_modules
     best_cost = sys.maxsize
 
     if num_starts == 1:
         rng = random.Random(args.seed if args.seed != 0 else None)
         best_part, best_cost = run_one_partition(
-            graph,
-            module_weights,
-            module_fixed,
-            epsilon_val,
-            k,
-            use_recursive,
-            rng,
+            netlist, part_mgr, module_weights, num_modules, module_fixed, k, rng
         )
         if not quiet:
             print(f"Partitioning cost: {best_cost}", file=sys.stderr)
@@ -547,36 +725,39 @@ Examples:
                 file=sys.stderr,
             )
 
-        with ThreadPoolExecutor(max_workers=num_starts) as executor:
-            futures = {}
-            for start in range(num_starts):
-                start_seed = args.seed + start * 104729 if args.seed != 0 else None
-                rng = random.Random(start_seed)
-                fut = executor.submit(
-                    run_one_partition,
-                    graph,
-                    module_weights,
-                    module_fixed,
-                    epsilon_val,
-                    k,
-                    use_recursive,
-                    rng,
+        best_start = num_starts
+        num_done = 0
+        seeds = [
+            args.seed + start * 104729 if args.seed != 0 else None
+            for start in range(num_starts)
+        ]
+        for start, local_part, local_cost in run_multi_start(
+            netlist,
+            part_mgr,
+            module_weights,
+            num_modules,
+            module_fixed,
+            k,
+            seeds,
+            args.executor,
+        ):
+            num_done += 1
+            if not quiet:
+                print(
+                    f"  Start {start + 1}/{num_starts} cost: {local_cost}",
+                    file=sys.stderr,
                 )
-                futures[fut] = start + 1
-
-            for fut in as_completed(futures):
-                start_num = futures[fut]
-                local_part, local_cost = fut.result()
-                if not quiet:
-                    print(
-                        f"  Start {start_num}/{num_starts} cost: {local_cost}",
-                        file=sys.stderr,
-                    )
-                if local_cost < best_cost:
-                    best_cost = local_cost
-                    best_part = local_part
+            # ties go to the first start, whatever the completion order
+            if (local_cost, start) < (best_cost, best_start):
+                best_cost, best_start = local_cost, start
+                best_part = local_part
 
         if not quiet:
+            if num_done < num_starts:
+                print(
+                    f"Time limit reached after {num_done}/{num_starts} starts",
+                    file=sys.stderr,
+                )
             print(f"Partitioning cost: {best_cost}", file=sys.stderr)
 
     modules = [n for n in graph.nodes() if graph.nodes[n].get("bipartite") == 0]
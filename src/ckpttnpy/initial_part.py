@@ -0,0 +1,205 @@
+"""Initial partitioners for the coarsest level of multi-level partitioning.
+
+Cheap constructive partitioners whose results seed FM at the bottom of the
+MLPartMgr recursion:
+- `greedy_grow`: greedy hypergraph growing, each part absorbs the frontier
+  module that removes the most cut
+- `bfs_grow`: each part grows breadth-first from a random seed module
+- `random_balanced`: modules in random order, heaviest first, go to the
+  lightest part
+
+Parts 0..k-2 are grown one after another up to an equal share of the weight
+that is left, and part k-1 takes the rest. Fixed modules keep their part.
+Large nets (see `HierNetlist.large_net_threshold`) are not followed.
+"""
+
+import heapq
+import random
+from collections import deque
+from typing import Any, Dict, List
+
+from .HierNetlist import net_tables
+
+
+def _free_modules(hyprgraph, module_weight, num_parts, part):
+    """
+    The function returns the modules that are not fixed and the weight of each
+    part counting only the fixed modules.
+    """
+    fixed = hyprgraph.module_fixed or ()
+    weights = [0] * num_parts
+    for v in fixed:
+        weights[part[v]] += module_weight[v]
+    return [v for v in hyprgraph if v not in fixed], weights
+
+
+def random_balanced(hyprgraph, module_weight, num_parts: int, part, rng=random):
+    """
+    The function `random_balanced` assigns the modules, shuffled and then sorted
+    by decreasing weight, each to the currently lightest part.
+
+    :param hyprgraph: The netlist
+    :param module_weight: The module weights
+    :param num_parts: The number of parts
+    :param part: The partition, updated in place (fixed modules are kept)
+    :param rng: The random number generator, e.g. a `random.Random`
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hyprgraph = create_drawf()
+        >>> part = {v: 0 for v in hyprgraph}
+        >>> random_balanced(hyprgraph, hyprgraph.module_weight, 2, part, random.Random(1))
+        >>> sorted(set(part.values()))
+        [0, 1]
+    """
+    modules, weights = _free_modules(hyprgraph, module_weight, num_parts, part)
+    rng.shuffle(modules)
+    modules.sort(key=lambda v: module_weight[v], reverse=True)  # stable
+    for v in modules:
+        to_part = min(range(num_parts), key=weights.__getitem__)
+        part[v] = to_part
+        weights[to_part] += module_weight[v]
+
+
+def bfs_grow(hyprgraph, module_weight, num_parts: int, part, rng=random):
+    """
+    The function `bfs_grow` grows every part but the last one breadth-first
+    from a random seed module, and restarts from another random module when
+    the search runs out of neighbours.
+
+    :param hyprgraph: The netlist
+    :param module_weight: The module weights
+    :param num_parts: The number of parts
+    :param part: The partition, updated in place (fixed modules are kept)
+    :param rng: The random number generator, e.g. a `random.Random`
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hyprgraph = create_drawf()
+        >>> part = {v: 0 for v in hyprgraph}
+        >>> bfs_grow(hyprgraph, hyprgraph.module_weight, 2, part, random.Random(1))
+        >>> sorted(set(part.values()))
+        [0, 1]
+    """
+    ugraph = hyprgraph.ugraph
+    _, net_degree = net_tables(hyprgraph)
+    modules, weights = _free_modules(hyprgraph, module_weight, num_parts, part)
+    free = set(modules)
+    rng.shuffle(modules)
+    remaining = sum(module_weight[v] for v in modules)
+    for to_part in range(num_parts - 1):
+        target = (remaining + sum(weights[to_part:])) / (num_parts - to_part)
+        seeds = [v for v in modules if v in free]
+        queue: deque = deque()
+        while weights[to_part] < target and free:
+            if not queue:
+                while seeds[-1] not in free:
+                    seeds.pop()
+                queue.append(seeds[-1])
+                free.discard(seeds[-1])
+            v = queue.popleft()
+            part[v] = to_part
+            weights[to_part] += module_weight[v]
+            remaining -= module_weight[v]
+            for net in ugraph[v]:
+                if net_degree[net] < 2:
+                    continue
+                for w in ugraph[net]:
+                    if w in free:
+                        free.discard(w)
+                        queue.append(w)
+        free.update(queue)  # queued, but not taken
+    for v in free:
+        part[v] = num_parts - 1
+
+
+def greedy_grow(hyprgraph, module_weight, num_parts: int, part, rng=random):
+    """
+    The function `greedy_grow` grows every part but the last one from a random
+    seed module by greedy hypergraph growing: the next module is the frontier
+    module with the highest gain, i.e. the one whose move into the part reduces
+    the cut the most.
+
+    With `inside` the number of pins of a net in the growing part and `degree`
+    its number of pins among the modules not yet assigned, adding a module
+    gains the weight of every net it completes and loses the weight of every
+    net it starts.
+
+    .. svgbob::
+       :align: center
+
+              part       frontier
+            .------.
+            | a  b |--e1--- v      gain(v) = w(e1) - w(e2)
+            '------'        |
+                            e2--- x
+
+    :param hyprgraph: The netlist
+    :param module_weight: The module weights
+    :param num_parts: The number of parts
+    :param part: The partition, updated in place (fixed modules are kept)
+    :param rng: The random number generator, e.g. a `random.Random`
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hyprgraph = create_drawf()
+        >>> part = {v: 0 for v in hyprgraph}
+        >>> greedy_grow(hyprgraph, hyprgraph.module_weight, 2, part, random.Random(1))
+        >>> sorted(set(part.values()))
+        [0, 1]
+    """
+    ugraph = hyprgraph.ugraph
+    net_weight, net_degree = net_tables(hyprgraph)
+    modules, weights = _free_modules(hyprgraph, module_weight, num_parts, part)
+    free = set(modules)
+    rng.shuffle(modules)  # seeds and tie breaking
+    rank = {v: i_v for i_v, v in enumerate(modules)}
+    remaining = sum(module_weight[v] for v in modules)
+
+    def gain_of(v) -> int:
+        gain = 0
+        for net in ugraph[v]:
+            if net_degree[net] < 2:
+                continue
+            if inside[net] == degree[net] - 1:
+                gain += net_weight[net]
+            elif inside[net] == 0:
+                gain -= net_weight[net]
+        return gain
+
+    for to_part in range(num_parts - 1):
+        target = (remaining + sum(weights[to_part:])) / (num_parts - to_part)
+        degree: Dict[Any, int] = {}
+        for v in free:
+            for net in ugraph[v]:
+                degree[net] = degree.get(net, 0) + 1
+        inside: Dict[Any, int] = dict.fromkeys(degree, 0)
+        gain: Dict[Any, int] = {}
+        heap: List = []  # (-gain, rank, module), stale entries are skipped
+        while weights[to_part] < target and free:
+            while heap and (heap[0][2] not in free or -heap[0][0] != gain[heap[0][2]]):
+                heapq.heappop(heap)
+            if heap:
+                v = heapq.heappop(heap)[2]
+            else:
+                while modules[-1] not in free:
+                    modules.pop()
+                v = modules[-1]
+            free.discard(v)
+            part[v] = to_part
+            weights[to_part] += module_weight[v]
+            remaining -= module_weight[v]
+            for net in ugraph[v]:
+                if net_degree[net] < 2:
+                    continue
+                inside[net] += 1
+                if inside[net] in (1, degree[net] - 1):  # gains of its pins change
+                    for w in ugraph[net]:
+                        if w in free:
+                            gain[w] = gain_of(w)
+                            heapq.heappush(heap, (-gain[w], rank[w], w))
+    for v in free:
+        part[v] = num_parts - 1
+
+
+INITIAL_PARTITIONERS = (greedy_grow, bfs_grow, random_balanced)
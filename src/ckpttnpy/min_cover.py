@@ -1,77 +1,60 @@
 """Clustering algorithm for graph contraction in multi-level partitioning.
 
-Implements min-maximal matching based clustering, duplicate net detection
-(exact for low-pin nets, minHash probabilistic for high-pin nets), and
-subgraph contraction. Produces a HierNetlist with updated module weights.
+Implements min-maximal matching based clustering, rating-based vertex
+clustering (heavy-edge and first-choice), exact duplicate net detection,
+and subgraph contraction. Produces a HierNetlist with updated module weights.
+
+Coarsening strategies of `contract_subgraph`:
+- "matching": a minimum maximal matching of nets; each matched net becomes a cluster
+- "heavy_edge": modules are paired with their best-rated unclustered neighbour
+- "first_choice": modules join the cluster of their best-rated neighbour
+The rating of two modules is the sum of w(e) / (|e| - 1) over the nets e they share.
 
 Duplicate net detection:
-- Low-pin nets (<= 5 pins): exact set comparison
-- High-pin nets: minHash probabilistic similarity (signature size 64, threshold 0.8)
+- Nets are bucketed by their sorted pin tuple in a single pass, linear in pins
+- Nets above the netlist's `large_net_threshold` are neither clustered nor compared
 
 Note:
     module and net should have a unique id because they treat the same node in the underlying graph.
 """
 
-import hashlib
-from typing import List, MutableMapping, Optional, Set, Tuple, TypeVar
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 from netlistx.netlist import Netlist, TinyGraph
 from netlistx.netlist_algo import min_maximal_matching
 
-from .HierNetlist import HierNetlist
+from .CSRNetlist import CSRGraph
+from .HierNetlist import HierNetlist, is_large_net, net_tables
 
-LOW_PIN_NET_THRESHOLD = 5
-MINHASH_SIG_SIZE = 64  # Number of hash functions in minHash signature
-MINHASH_SIMILARITY = 0.8  # Similarity threshold for duplicate detection
+COARSENING_STRATEGIES = ("matching", "heavy_edge", "first_choice")
+MAX_CLUSTER_WEIGHT_FACTOR = 4  # rated clusters weigh at most 4x the mean module
 
 Node = TypeVar("Node")  # Hashable
 
 
-def _minhash_signature(items, k: int = MINHASH_SIG_SIZE):
-    """Compute minHash signature for a set of items.
-
-    Uses k independent hash functions (md5 with different suffixes)
-    to produce a fixed-size signature.  The Jaccard similarity of two
-    sets can be estimated by comparing their signatures.
-
-    :param items: Iterable of hashable items
-    :param k: Number of hash functions (signature size)
-    :returns: List of k minimum hash values
-    """
-    sig = [float("inf")] * k
-    for item in items:
-        item_bytes = str(item).encode()
-        for i in range(k):
-            h = hashlib.md5(item_bytes + str(i).encode()).hexdigest()
-            h_int = int(h[:16], 16)
-            if h_int < sig[i]:
-                sig[i] = h_int
-    return sig
-
-
-def _jaccard_similarity(sig1, sig2):
-    """Estimate Jaccard similarity from two minHash signatures.
-
-    :param sig1: First minHash signature (list of ints)
-    :param sig2: Second minHash signature (list of ints)
-    :returns: Estimated Jaccard similarity in [0.0, 1.0]
-    """
-    if not sig1 or not sig2:
-        return 0.0
-    n = min(len(sig1), len(sig2))
-    matches = sum(1 for a, b in zip(sig1, sig2) if a == b)
-    return matches / n
-
-
 def setup(
-    hyprgraph: Netlist, cluster_weight: MutableMapping, forbid: Optional[Set]
+    hyprgraph: Netlist,
+    cluster_weight: MutableMapping,
+    forbid: Optional[Set],
+    order: Optional[Iterable[Any]] = None,
 ) -> Tuple[List, List, List]:
     r"""
     The `setup` function takes in a hypergraph `hyprgraph`, cluster weights `cluster_weight`, and a set of
-    forbidden dependencies `forbid`, and returns a tuple containing the clusters, nets, and cell list.
+    forbidden nets `forbid`, and returns a tuple containing the clusters, nets, and cell list.
 
     This function performs the initial setup for clustering by:
-    1. Finding a minimum maximal matching in the hypergraph
+    1. Finding a minimum maximal matching in the hypergraph (large and forbidden nets excluded)
     2. Creating clusters from the matched nets
     3. Separating remaining nets that weren't clustered
     4. Collecting cells that weren't included in any clusters
@@ -97,12 +80,27 @@ def setup(
     :param cluster_weight: The parameter "cluster_weight" represents the weight of each cluster in the
         hypergraph. It is used in the min_maximal_matching function to determine the matching with the
         minimum weight
-    :param forbid: The `forbid` parameter is used to specify a set of vertices that should not be
-        included in the matching. It is used in the `min_maximal_matching` function to ensure that the
-        matching does not include certain vertices
+    :param forbid: The `forbid` parameter is a set of nets that must not become clusters, e.g. the cut
+        nets of the current partition in a V-cycle
+    :param order: An order of the modules, e.g. shuffled for a randomized matching; the matching
+        then visits the nets in the order in which they are first reached from these modules
+        (net order by default)
     :return: three values: clusters, nets, and cell_list.
     """
-    s1, _ = min_maximal_matching(hyprgraph, cluster_weight, dependents=forbid)
+    # Large and forbidden nets are never rated as clusters: pre-match them with
+    # infinite weight so that the matching skips them, then drop them from the result.
+    excluded = {net for net in hyprgraph.nets if is_large_net(hyprgraph, net)}
+    if forbid:
+        excluded.update(forbid)
+    for net in excluded:
+        cluster_weight[net] = float("inf")
+    matching_graph: Any = hyprgraph
+    if order is not None:
+        net_order = dict.fromkeys(net for v in order for net in hyprgraph.ugraph[v])
+        net_order.update(dict.fromkeys(hyprgraph.nets))  # nets without pins last
+        matching_graph = SimpleNamespace(nets=net_order, ugraph=hyprgraph.ugraph)
+    s1, _ = min_maximal_matching(matching_graph, cluster_weight, set(excluded))
+    s1 -= excluded
     covered: Set[int] = set()
     nets = list()
     clusters = list()
@@ -117,7 +115,100 @@ def setup(
     return clusters, nets, cell_list
 
 
-def construct_graph(hyprgraph: Netlist, nets, cell_list, clusters):
+def rate_clusters(
+    hyprgraph: Netlist,
+    module_weight,
+    forbid: Set,
+    first_choice: bool = False,
+    max_cluster_weight: Optional[int] = None,
+    order: Optional[Iterable[Any]] = None,
+) -> Tuple[List[List[Any]], List, List]:
+    r"""
+    The `rate_clusters` function clusters modules by rating their neighbours, as in hMetis/KaHyPar.
+
+    The modules are visited in `order` (module order by default); an unclustered module `u` rates every neighbour `v` with the
+    pin-normalized sum over their common nets e of w(e) / (|e| - 1), and joins the best one whose
+    cluster stays within `max_cluster_weight`. With heavy-edge rating `v` must be unclustered, which
+    gives pairs; with first-choice rating `u` may join the cluster that `v` already belongs to.
+    Large nets, self-loops and the nets in `forbid` are not rated.
+
+    .. svgbob::
+
+          u ---- 1/1 ---- v        "2-pin net"
+          |      .---.
+          +-1/2-| e3  |--- w       "3-pin net"
+                 '---'
+          r(u, v) = 1, r(u, w) = 1/2
+
+    :param hyprgraph: The netlist to cluster
+    :type hyprgraph: Netlist
+    :param module_weight: The module weights
+    :param forbid: The nets that must not be contracted
+    :type forbid: Set
+    :param first_choice: Whether to use first-choice instead of heavy-edge rating
+    :param max_cluster_weight: The weight limit of a cluster, `MAX_CLUSTER_WEIGHT_FACTOR` times the
+        mean module weight by default
+    :param order: The order in which the modules are visited, e.g. shuffled for a randomized
+        hierarchy
+    :return: the clusters (lists of modules), the nets and the unclustered modules.
+
+    Examples:
+        >>> from netlistx.netlist import create_drawf
+        >>> hyprgraph = create_drawf()
+        >>> clusters, nets, cell_list = rate_clusters(hyprgraph, hyprgraph.module_weight, set())
+        >>> sorted(v for c in clusters for v in c) == sorted(set(hyprgraph) - set(cell_list))
+        True
+    """
+    ugraph = hyprgraph.ugraph
+    net_weight, net_degree = net_tables(hyprgraph)  # large nets have degree 0
+    if max_cluster_weight is None:
+        totalweight = sum(module_weight[v] for v in hyprgraph)
+        num_modules = hyprgraph.number_of_modules()
+        max_cluster_weight = MAX_CLUSTER_WEIGHT_FACTOR * totalweight // num_modules
+    leader: Dict[Any, Any] = {}  # module -> first module of its cluster
+    members: Dict[Any, List[Any]] = {}  # leader -> modules of the cluster
+    weight: Dict[Any, int] = {}  # leader -> weight of the cluster
+
+    for u in hyprgraph if order is None else order:
+        if u in leader:
+            continue
+        rating: Dict[Any, float] = {}
+        for net in ugraph[u]:
+            degree = net_degree[net]
+            if degree < 2 or net in forbid:
+                continue
+            score = net_weight[net] / (degree - 1)
+            for v in ugraph[net]:
+                if v == u:
+                    continue
+                if v in leader:
+                    if not first_choice:
+                        continue
+                    v = leader[v]
+                rating[v] = rating.get(v, 0.0) + score
+        weight_u = module_weight[u]
+        best, best_score = None, 0.0
+        for v, score in rating.items():
+            if score > best_score and (
+                weight.get(v, module_weight[v]) + weight_u <= max_cluster_weight
+            ):
+                best, best_score = v, score
+        if best is None:
+            continue
+        if best not in members:
+            leader[best] = best
+            members[best] = [best]
+            weight[best] = module_weight[best]
+        leader[u] = best
+        members[best].append(u)
+        weight[best] += weight_u
+
+    clusters = list(members.values())
+    cell_list = [v for v in hyprgraph if v not in leader]
+    return clusters, list(hyprgraph.nets), cell_list
+
+
+def construct_graph(hyprgraph: Netlist, nets, cell_list, clusters, members=None):
     r"""
     The function constructs a bipartite graph based on a given hypergraph, netlist, cell list, and
     clusters.
@@ -145,16 +236,17 @@ def construct_graph(hyprgraph: Netlist, nets, cell_list, clusters):
         a component or module in the circuit design
     :param clusters: clusters is a list of clusters, where each cluster is a set of cells that are
         grouped together
+    :param members: The modules of each cluster, if the clusters are not nets (see `rate_clusters`)
     :return: a bipartite graph (ugraph) that represents the connections between modules (cell_list and
         clusters) and nets.
     """
-    num_modules = len(cell_list) + len(clusters)
+    if members is None:
+        members = [hyprgraph.ugraph[net] for net in clusters]
+    num_modules = len(cell_list) + len(members)
     # Construct a graph for the next level's netlist
     num_cell = len(cell_list)
     node_up_map = {
-        v: i_v + num_cell
-        for i_v, net in enumerate(clusters)
-        for v in hyprgraph.ugraph[net]
+        v: i_v + num_cell for i_v, cluster in enumerate(members) for v in cluster
     }
     node_up_map.update({v: i_v for i_v, v in enumerate(cell_list)})
     ugraph = TinyGraph()  # ugraph is a bipartite graph
@@ -172,9 +264,10 @@ def purge_duplicate_nets(hyprgraph: Netlist, ugraph, nets, num_clusters, num_mod
     weights and list of nets.
 
     This function identifies and removes duplicate nets by:
-    1. Checking for nets that connect exactly the same set of modules
-    2. For low-pin nets (<= 5 connections), it does exact set comparison
-    3. Combining weights of duplicate nets into a single representative net
+    1. Visiting each net attached to a cluster once
+    2. Bucketing it by its sorted pin tuple; a net that lands in an occupied bucket connects
+       exactly the same modules as the first net there (the dict compares the tuples on collision)
+    3. Combining weights of duplicate nets into that first, representative net
 
     The example below can be visualized as follows:
 
@@ -213,42 +306,27 @@ def purge_duplicate_nets(hyprgraph: Netlist, ugraph, nets, num_clusters, num_mod
         if wt != 1:
             net_weight[num_modules + i_net] = wt
 
+    threshold = getattr(hyprgraph, "large_net_threshold", None)
     removelist = set()
-    sig_cache = {}  # cache minHash signatures for high-pin nets
+    visited = set()
+    buckets: Dict[Tuple[int, ...], int] = {}  # sorted pins -> representative net
     for cluster in range(num_modules - num_clusters, num_modules):
-        for net1 in ugraph[cluster]:  # only check the nets of cluster
+        for net1 in ugraph[cluster]:  # only check the nets of clusters
             assert net1 >= num_modules
             assert net1 < num_modules + num_nets
-            if ugraph.degree(net1) == 1:  # self loop
+            if net1 in visited:
+                continue
+            visited.add(net1)
+            deg = ugraph.degree(net1)
+            if deg == 1:  # self loop
                 removelist.add(net1)
                 continue
-            for net2 in filter(lambda net2: net2 != net1, ugraph[cluster]):
-                if ugraph.degree(net1) != ugraph.degree(net2):
-                    continue  # no need to check if pins are different
-                same = False
-                deg = ugraph.degree(net1)
-                if deg <= LOW_PIN_NET_THRESHOLD:
-                    # Exact set comparison for low-pin nets
-                    set1 = set(v for v in ugraph[net1])
-                    set2 = set(v for v in ugraph[net2])
-                    if set1 == set2:
-                        same = True
-                elif deg <= 200:
-                    # MinHash pre-filter: skip exact comparison unless likely duplicate
-                    if net1 not in sig_cache:
-                        sig_cache[net1] = _minhash_signature(ugraph[net1])
-                    if net2 not in sig_cache:
-                        sig_cache[net2] = _minhash_signature(ugraph[net2])
-                    sim = _jaccard_similarity(sig_cache[net1], sig_cache[net2])
-                    if sim >= MINHASH_SIMILARITY:
-                        # Confirm with exact comparison to avoid false positives
-                        set1 = set(v for v in ugraph[net1])
-                        set2 = set(v for v in ugraph[net2])
-                        if set1 == set2:
-                            same = True
-                if same:
-                    removelist.add(net2)
-                    net_weight[net1] = net_weight.get(net1, 1) + net_weight.get(net2, 1)
+            if threshold is not None and deg > threshold:
+                continue  # large nets are not compared
+            net = buckets.setdefault(tuple(sorted(ugraph[net1])), net1)
+            if net != net1:  # same pins as net
+                removelist.add(net1)
+                net_weight[net] = net_weight.get(net, 1) + net_weight.get(net1, 1)
     # ugraph.remove_nodes_from(removelist)
     print("removed {} nets".format(len(removelist)))
     gr_nets = range(num_modules, num_modules + len(nets))
@@ -294,27 +372,35 @@ def reconstruct_graph(hyprgraph: Netlist, ugraph, nets, num_clusters, num_module
     net_weight, updated_nets = purge_duplicate_nets(
         hyprgraph, ugraph, nets, num_clusters, num_modules
     )
-    # Reconstruct a new graph with purged nets
+    # Reconstruct a new graph with purged nets (frozen in CSR form)
     num_nets = len(updated_nets)
-    gr2 = TinyGraph()
-    gr2.init_nodes(num_modules + num_nets)
+    adjacency: List[List[int]] = [[] for _ in range(num_modules)]
     for i_net, net in enumerate(updated_nets):
-        for v in ugraph[net]:
-            assert net >= num_modules
-            assert net < num_modules + len(nets)
-            gr2.add_edge(v, num_modules + i_net)
+        assert net >= num_modules
+        assert net < num_modules + len(nets)
+        pins = list(ugraph[net])
+        for v in pins:
+            adjacency[v].append(num_modules + i_net)
+        adjacency.append(pins)
+    gr2 = CSRGraph.from_adjacency(adjacency)
 
     # Update net weight (@todo: check if it is neccessary)
     net_weight2 = {}
     for i_net, net in enumerate(updated_nets):
         if net not in net_weight:
             continue
-        net_weight2[i_net] = net_weight[net]
+        net_weight2[num_modules + i_net] = net_weight[net]
 
     return gr2, net_weight2, num_nets
 
 
-def contract_subgraph(hyprgraph: Netlist, module_weight, forbid: Set):
+def contract_subgraph(
+    hyprgraph: Netlist,
+    module_weight,
+    forbid: Set,
+    strategy: str = "matching",
+    order: Optional[Iterable[Any]] = None,
+):
     r"""
     The `contract_subgraph` function takes a hierarchical netlist, module weights, and a set of
     forbidden nets as input, and returns a contracted hierarchical netlist with updated module weights.
@@ -342,22 +428,40 @@ def contract_subgraph(hyprgraph: Netlist, module_weight, forbid: Set):
     :param module_weight: The `module_weight` parameter is a dictionary that assigns a weight to each
         module in the netlist. The weight represents the importance or size of the module
     :param forbid: The `forbid` parameter is a set that contains the nets that should not be contracted.
+        Passing the cut nets of a partition keeps every cluster inside one part (see `cut_nets`).
         These nets will remain as separate entities in the resulting hierarchical netlist
     :type forbid: Set
+    :param strategy: The clustering strategy, one of `COARSENING_STRATEGIES`: "matching" (nets
+        chosen by `setup`), or "heavy_edge" / "first_choice" (modules chosen by `rate_clusters`)
+    :type strategy: str
+    :param order: The visit order of the modules, see `setup` for "matching" and `rate_clusters`
+        for the rating strategies
     :return: The function `contract_subgraph` returns a tuple containing the contracted hierarchical
         netlist (`hgr2`) and the updated module weights (`module_weight2`).
     """
-    cluster_weight = {
-        net: sum(module_weight[v] for v in hyprgraph.ugraph[net])
-        for net in hyprgraph.nets
-    }  # can be done in parallel
-
-    clusters, nets, cell_list = setup(hyprgraph, cluster_weight, forbid)
+    if strategy == "matching":
+        cluster_weight = {
+            net: sum(module_weight[v] for v in hyprgraph.ugraph[net])
+            for net in hyprgraph.nets
+        }  # can be done in parallel
+        clusters, nets, cell_list = setup(hyprgraph, cluster_weight, forbid, order)
+        members = None
+        weight_list = [cluster_weight[net] for net in clusters]
+        down_list = [next(iter(hyprgraph.ugraph[net])) for net in clusters]
+    elif strategy in COARSENING_STRATEGIES:
+        members, nets, cell_list = rate_clusters(
+            hyprgraph, module_weight, forbid, strategy == "first_choice", order=order
+        )
+        clusters = []
+        weight_list = [sum(module_weight[v] for v in cluster) for cluster in members]
+        down_list = [cluster[0] for cluster in members]
+    else:
+        raise ValueError(f"Unknown coarsening strategy {strategy}")
     # Construct a graph for the next level's netlist
-    ugraph = construct_graph(hyprgraph, nets, cell_list, clusters)
+    ugraph = construct_graph(hyprgraph, nets, cell_list, clusters, members)
 
-    num_modules = len(cell_list) + len(clusters)
-    num_clusters = len(clusters)
+    num_clusters = len(weight_list)
+    num_modules = len(cell_list) + num_clusters
 
     gr2, net_weight2, num_nets = reconstruct_graph(
         hyprgraph, ugraph, nets, num_clusters, num_modules
@@ -374,15 +478,17 @@ def contract_subgraph(hyprgraph: Netlist, module_weight, forbid: Set):
     num_cells = num_modules - num_clusters
     for v, v2 in enumerate(cell_list):
         module_weight2[v] = module_weight[v2]
-    for i_v, net in enumerate(clusters):
-        module_weight2[num_cells + i_v] = cluster_weight[net]
+    for i_v, weight in enumerate(weight_list):
+        module_weight2[num_cells + i_v] = weight
 
     node_down_list = cell_list
-    node_down_list += [next(iter(hyprgraph.ugraph[net])) for net in clusters]
+    node_down_list += down_list
 
     hgr2.clusters = clusters
+    hgr2.cluster_members = members or []
     hgr2.node_down_list = node_down_list
     hgr2.module_weight = module_weight2
     hgr2.net_weight = net_weight2
     hgr2.parent = hyprgraph
+    hgr2.large_net_threshold = getattr(hyprgraph, "large_net_threshold", None)
     return hgr2, module_weight2
@@ -7,4 +7,47 @@ Read more about conftest.py under:
 - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import pytest
+
+from ckpttnpy.FMBiConstrMgr import FMBiConstrMgr
+from ckpttnpy.FMBiGainCalc import FMBiGainCalc
+from ckpttnpy.FMBiGainMgr import FMBiGainMgr
+from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
+from ckpttnpy.FMKWayGainCalc import FMKWayGainCalc
+from ckpttnpy.FMKWayGainMgr import FMKWayGainMgr
+from ckpttnpy.FMPartMgr import FMPartMgr
+
+
+@pytest.fixture
+def create_FMGainMgr():
+    """
+    The fixture `create_FMGainMgr` returns a function that creates the gain manager of a bipartition
+    (2 parts) or of a k-way partition.
+    """
+
+    def create(hyprgraph, num_parts):
+        if num_parts == 2:
+            return FMBiGainMgr(FMBiGainCalc, hyprgraph)
+        return FMKWayGainMgr(FMKWayGainCalc, hyprgraph, num_parts)
+
+    return create
+
+
+@pytest.fixture
+def create_FMPartMgr(create_FMGainMgr):
+    """
+    The fixture `create_FMPartMgr` returns a function that creates a part manager with the gain and
+    constraint managers of a bipartition (2 parts) or of a k-way partition.
+    """
+
+    def create(hyprgraph, num_parts, bal_tol=0.4, PartMgr=FMPartMgr):
+        gain_mgr = create_FMGainMgr(hyprgraph, num_parts)
+        if num_parts == 2:
+            constr_mgr = FMBiConstrMgr(hyprgraph, bal_tol, hyprgraph.module_weight)
+        else:
+            constr_mgr = FMKWayConstrMgr(
+                hyprgraph, bal_tol, hyprgraph.module_weight, num_parts
+            )
+        return PartMgr(hyprgraph, gain_mgr, constr_mgr)
+
+    return create
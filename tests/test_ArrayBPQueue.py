@@ -0,0 +1,62 @@
+from random import randint, seed
+
+from mywheel.bpqueue import BPQueue
+from mywheel.dllist import Dllink, Dllist
+
+from ckpttnpy.ArrayBPQueue import ArrayBPQueue
+
+
+def test_ArrayBPQueue_basic() -> None:
+    bpq = ArrayBPQueue(-3, 3, 5)
+    assert bpq.is_empty()
+    for i in range(5):
+        bpq.append(i, i - 2)
+    assert bpq.get_max() == 2
+    assert list(bpq) == [4, 3, 2, 1, 0]
+    bpq.detach(4)
+    bpq.detach(4)  # already free
+    assert bpq.get_max() == 1
+    bpq.lock(3)
+    bpq.modify_key(3, 2)  # locked
+    assert bpq.get_max() == 0
+    bpq.clear()
+    assert bpq.is_empty()
+    assert list(bpq) == []
+
+
+def test_ArrayBPQueue_same_order_as_BPQueue() -> None:
+    """Random operation sequences pop items in exactly the BPQueue order."""
+    seed(42)
+    n, bound = 30, 6
+    for _ in range(20):
+        bpq = BPQueue(-bound, bound)
+        waitinglist = Dllist([0, 0])
+        nodes = [Dllink([0, i]) for i in range(n)]
+        abpq = ArrayBPQueue(-bound, bound, n)
+        keys = [0] * n
+        for i in range(n):
+            keys[i] = randint(-bound // 2, bound // 2)
+            bpq.append(nodes[i], keys[i])
+            abpq.append(i, keys[i])
+        for _ in range(200):
+            i = randint(0, n - 1)
+            op = randint(0, 3)
+            if op == 0 and not bpq.is_empty():
+                assert abpq.get_max() == bpq.get_max()
+                j = abpq.popleft()
+                assert j == bpq.popleft().data[1]
+                waitinglist.append(nodes[j])
+            elif op == 1:
+                bpq.detach(nodes[i])
+                waitinglist.append(nodes[i])
+                abpq.detach(i)
+            else:
+                delta = randint(-2, 2)
+                if not -bound <= keys[i] + delta <= bound:
+                    continue
+                if nodes[i].next is not nodes[i] and delta != 0:
+                    keys[i] += delta
+                bpq.modify_key(nodes[i], delta)
+                abpq.modify_key(i, delta)
+            assert abpq.is_empty() == bpq.is_empty()
+        assert list(abpq) == [it.data[1] for it in bpq]
@@ -0,0 +1,123 @@
+from random import randint, seed
+
+from netlistx.netlist import create_drawf, read_json
+
+from ckpttnpy.CSRNetlist import (
+    CSRGraph,
+    CSRNetlist,
+    from_dense_part,
+    to_dense_part,
+)
+from ckpttnpy.FMBiConstrMgr import FMBiConstrMgr
+from ckpttnpy.FMBiGainCalc import FMBiGainCalc
+from ckpttnpy.FMBiGainMgr import FMBiGainMgr
+from ckpttnpy.FMConstrMgr import LegalCheck
+from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
+from ckpttnpy.FMKWayGainCalc import FMKWayGainCalc
+from ckpttnpy.FMKWayGainMgr import FMKWayGainMgr
+from ckpttnpy.FMPartMgr import FMPartMgr
+from ckpttnpy.MLPartMgr import MLBiPartMgr
+
+
+def test_csr_graph() -> None:
+    gr = CSRGraph.from_adjacency([[2], [2], [0, 1]])
+    assert gr.number_of_nodes() == 3
+    assert gr.number_of_edges() == 2
+    assert list(gr[2]) == [0, 1]
+    assert gr.degree[2] == 2
+    assert gr.degree(0) == 1
+    assert list(gr) == [0, 1, 2]
+
+
+def test_from_netlist_drawf() -> None:
+    hyprgraph = create_drawf()
+    hyprgraph.module_fixed = {"p1"}
+    hgr = CSRNetlist.from_netlist(hyprgraph)
+    assert hgr.number_of_modules() == hyprgraph.number_of_modules()
+    assert hgr.number_of_nets() == hyprgraph.number_of_nets()
+    assert hgr.number_of_pins() == hyprgraph.number_of_pins()
+    assert hgr.get_max_degree() == hyprgraph.get_max_degree()
+    assert hgr.module_fixed == {hgr.module_index["p1"]}
+    for net in hyprgraph.nets:
+        i_net = hgr.number_of_modules() + list(hyprgraph.nets).index(net)
+        pins = {hgr.module_list[v] for v in hgr.ugraph[i_net]}
+        assert pins == set(hyprgraph.ugraph[net])
+    for v, i_v in hgr.module_index.items():
+        assert hgr.module_weight[i_v] == hyprgraph.module_weight[v]
+
+
+def _run_fm(hyprgraph, part, num_parts):
+    if num_parts == 2:
+        gain_mgr = FMBiGainMgr(FMBiGainCalc, hyprgraph)
+        constr_mgr = FMBiConstrMgr(hyprgraph, 0.45, hyprgraph.module_weight)
+    else:
+        gain_mgr = FMKWayGainMgr(FMKWayGainCalc, hyprgraph, num_parts)
+        constr_mgr = FMKWayConstrMgr(
+            hyprgraph, 0.45, hyprgraph.module_weight, num_parts
+        )
+    part_mgr = FMPartMgr(hyprgraph, gain_mgr, constr_mgr)
+    assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+    part_mgr.optimize(part)
+    return part_mgr.totalcost
+
+
+def test_fm_same_result_on_csr() -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    hgr = CSRNetlist.from_netlist(hyprgraph)
+    for num_parts in [2, 3]:
+        seed(1)
+        part = [randint(0, num_parts - 1) for _ in hyprgraph]
+        part_csr = list(part)
+        cost = _run_fm(hyprgraph, part, num_parts)
+        cost_csr = _run_fm(hgr, part_csr, num_parts)
+        assert cost == cost_csr
+        assert part == part_csr
+
+
+def test_fm_same_result_on_dense_part() -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    for num_parts in [2, 3]:
+        seed(2)
+        part = [randint(0, num_parts - 1) for _ in hyprgraph]
+        part_dense = to_dense_part(part, hyprgraph.modules)
+        cost = _run_fm(hyprgraph, part, num_parts)
+        cost_dense = _run_fm(hyprgraph, part_dense, num_parts)
+        assert cost == cost_dense
+        assert part == part_dense.tolist()
+
+
+def test_dense_part_round_trip() -> None:
+    hyprgraph = create_drawf()
+    modules = list(hyprgraph.modules)
+    part = {v: i_v % 2 for i_v, v in enumerate(reversed(modules))}
+    part_dense = to_dense_part(part, modules)
+    assert [part[v] for v in modules] == part_dense.tolist()
+    part_dense.reverse()
+    from_dense_part(part_dense, part, modules)
+    assert [part[v] for v in reversed(modules)] == part_dense.tolist()
+
+
+def test_coarse_levels_are_csr() -> None:
+    seed(3)
+    hgr = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    part_mgr = MLBiPartMgr(0.45)
+    part_mgr.limitsize = 7
+    part = [randint(0, 1) for _ in hgr]
+    legal_check = part_mgr.run_Partition(hgr, hgr.module_weight, part)
+    assert legal_check == LegalCheck.AllSatisfied
+    constr_mgr = FMBiConstrMgr(hgr, 0.45, hgr.module_weight)
+    assert constr_mgr.final_check(part)
+
+
+def test_subnetlist() -> None:
+    hgr = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    part = [v % 2 for v in hgr]
+    for side in (0, 1):
+        modules = [v for v in hgr if part[v] == side]
+        sub = hgr.subnetlist(modules)
+        assert sub.module_list == modules
+        assert sub.module_weight == [hgr.module_weight[v] for v in modules]
+        # net splitting: every net keeps its pins on this side, if two or more
+        pins = [[v for v in hgr.ugraph[net] if part[v] == side] for net in hgr.nets]
+        expected = sorted(len(p) for p in pins if len(p) >= 2)
+        assert sorted(sub.ugraph.degree[net] for net in sub.nets) == expected
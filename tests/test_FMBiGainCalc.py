@@ -1,6 +1,11 @@
+from random import randint, seed
+
 import pytest
+from netlistx.netlist import read_json
 
+from ckpttnpy.CSRNetlist import CSRNetlist
 from ckpttnpy.FMBiGainCalc import FMBiGainCalc
+from ckpttnpy.FMBiGainMgr import FMBiGainMgr
 from tests.mocks import MockHyprgraph
 
 
@@ -31,3 +36,58 @@ def test_init_gain(gain_calc, hyprgraph, net, part, totalcost, expected_gains) -
     assert gain_calc.totalcost == totalcost
     for v, gain in expected_gains.items():
         assert gain_calc.vertex_list[v].data[0] == gain
+
+
+@pytest.mark.parametrize(
+    "part_seed, large_net_threshold", [(1, None), (2, None), (3, None), (4, 10)]
+)
+def test_init_vectorized(part_seed, large_net_threshold) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    hgr = CSRNetlist.from_netlist(hyprgraph)
+    hgr.net_weight[hgr.number_of_modules() + 5] = 3
+    hgr.large_net_threshold = large_net_threshold
+    seed(part_seed)
+    part = [randint(0, 1) for _ in hgr]
+
+    vectorized = FMBiGainCalc(hgr)
+    assert vectorized.pin_arrays is not None
+    scalar = FMBiGainCalc(hgr)
+    scalar.pin_arrays = None  # force the per-net path
+
+    assert vectorized.init(part) == scalar.init(part)
+    for v in hgr:
+        assert vectorized.vertex_list[v].data[0] == scalar.vertex_list[v].data[0]
+
+
+def test_large_nets_excluded() -> None:
+    hgr = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    hgr.large_net_threshold = 10
+    seed(9)
+    part = [randint(0, 1) for _ in hgr]
+    small_cut = sum(
+        1
+        for net in hgr.nets
+        if hgr.ugraph.degree[net] <= 10 and len({part[w] for w in hgr.ugraph[net]}) > 1
+    )
+    assert FMBiGainCalc(hgr).init(part) == small_cut
+
+
+def test_init_vectorized_pin_count() -> None:
+    """Both init paths leave the large nets out of the pin counts."""
+    hgr = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    hgr.large_net_threshold = 10
+    seed(9)
+    part = [randint(0, 1) for _ in hgr]
+
+    vectorized = FMBiGainMgr(FMBiGainCalc, hgr)
+    assert vectorized.gain_calc.pin_arrays is not None
+    scalar = FMBiGainMgr(FMBiGainCalc, hgr)
+    scalar.gain_calc.pin_arrays = None  # force the per-net path
+    vectorized.init(part)
+    scalar.init(part)
+
+    pin_count = vectorized.gain_calc.pin_count
+    assert pin_count == scalar.gain_calc.pin_count
+    assert all(hgr.ugraph.degree[net] <= 10 for net in pin_count)
+    assert len(pin_count) < hgr.number_of_nets()
+    assert vectorized._boundary() == scalar._boundary()
@@ -1,5 +1,7 @@
+from random import randint, seed
+
 import pytest
-from netlistx.netlist import Netlist, create_drawf, create_test_netlist
+from netlistx.netlist import Netlist, create_drawf, create_test_netlist, read_json
 
 from ckpttnpy.FMBiGainCalc import FMBiGainCalc
 from ckpttnpy.FMBiGainMgr import FMBiGainMgr
@@ -27,3 +29,77 @@ def test_FMBiGainMgr(create_netlist) -> None:
     part = {v: 0 for v in hyprgraph}
     part["a1"] = 1
     _run_FMBiGainMgr(hyprgraph, part)
+
+
+def _recount(hyprgraph: Netlist, part: Part, num_parts: int):
+    pin_count = {}
+    for net in hyprgraph.nets:
+        if hyprgraph.ugraph.degree[net] < 2:
+            continue
+        num = [0] * num_parts
+        for w in hyprgraph.ugraph[net]:
+            num[part[w]] += 1
+        pin_count[net] = num
+    return pin_count
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_pin_count_maintained(create_FMGainMgr, num_parts) -> None:
+    seed(5)
+    hyprgraph = read_json("testcases/p1.json")
+    part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    mgr = create_FMGainMgr(hyprgraph, num_parts)
+    mgr.init(part)
+    for _ in range(200):
+        move_info_v, gainmax = mgr.select(part)
+        mgr.update_move(part, move_info_v)
+        mgr.update_move_v(move_info_v, gainmax)
+        v, _, to_part = move_info_v
+        part[v] = to_part
+    assert mgr.gain_calc.pin_count == _recount(hyprgraph, part, num_parts)
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_boundary_only(create_FMGainMgr, num_parts) -> None:
+    """Only cut-net vertices are seeded; the others join as moves reach them."""
+
+    def on_cut(part):
+        return {
+            w
+            for net, num in _recount(hyprgraph, part, num_parts).items()
+            if max(num) < sum(num)
+            for w in hyprgraph.ugraph[net]
+        }
+
+    seed(3)
+    hyprgraph = read_json("testcases/p1.json")
+    part = [0] * hyprgraph.number_of_modules()
+    for v in range(20):
+        part[v] = randint(1, num_parts - 1)
+    mgr = create_FMGainMgr(hyprgraph, num_parts)
+    mgr.boundary_only = True
+    mgr.init(part)
+    queued = {v for bckt in mgr.gainbucket for v in bckt}
+    assert queued == on_cut(part)
+    assert len(queued) < hyprgraph.number_of_modules()
+
+    moved = set()
+    for _ in range(30):
+        move_info_v, gainmax = mgr.select(part)
+        mgr.update_move(part, move_info_v)
+        mgr.update_move_v(move_info_v, gainmax)
+        v, from_part, to_part = move_info_v
+        mgr.lock_all(from_part, v)
+        part[v] = to_part
+        moved.add(v)
+
+    fresh = create_FMGainMgr(hyprgraph, num_parts)
+    fresh.init(part)
+    queued = {v for bckt in mgr.gainbucket for v in bckt}
+    assert queued >= on_cut(part) - moved
+    for v in hyprgraph:
+        if v in moved:
+            continue
+        for k in range(num_parts):
+            if k != part[v]:
+                assert mgr.gainbucket[k].get_key(v) == fresh.gainbucket[k].get_key(v)
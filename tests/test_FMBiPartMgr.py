@@ -1,3 +1,6 @@
+import time
+from random import randint, seed
+
 import pytest
 from netlistx.netlist import (  # create_test_netlist,
     Netlist,
@@ -11,6 +14,7 @@ from ckpttnpy.FMBiGainCalc import FMBiGainCalc
 from ckpttnpy.FMBiGainMgr import FMBiGainMgr
 from ckpttnpy.FMConstrMgr import LegalCheck
 from ckpttnpy.FMPartMgr import FMPartMgr
+from ckpttnpy.NNPartMgr import NNPartMgr
 from ckpttnpy.skeleton import _logger
 from tests.mocks import Part
 
@@ -55,3 +59,160 @@ def test_FMBiPartMgr(create_netlist, part_type) -> None:
         hyprgraph.module_fixed = {"p1"}
 
     _run_FMBiPartMgr(hyprgraph, part)
+
+
+def _random_part(hyprgraph, num_parts, seed_value):
+    seed(seed_value)
+    return [randint(0, num_parts - 1) for _ in hyprgraph]
+
+
+def test_optimize_1pass_rolls_back_with_journal(create_FMPartMgr) -> None:
+    """One pass leaves the partition at its best prefix without full snapshots."""
+
+    class NoSnapshotPartMgr(FMPartMgr):
+        def take_snapshot(self, part: Part):
+            raise AssertionError("full snapshot taken")
+
+    hyprgraph = read_json("testcases/p1.json")
+    part = _random_part(hyprgraph, 2, 11)
+    part_mgr = create_FMPartMgr(hyprgraph, 2, 0.45, NoSnapshotPartMgr)
+    assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+    part_mgr.init(part)
+    totalcostbefore = part_mgr.totalcost
+    part_mgr._optimize_1pass(part)
+    assert part_mgr.totalcost < totalcostbefore
+    totalcost = part_mgr.totalcost
+    part_mgr.init(part)
+    assert part_mgr.totalcost == totalcost
+
+
+@pytest.mark.parametrize(
+    "option, value", [("max_stall_moves", 5), ("max_move_fraction", 0.05)]
+)
+def test_optimize_1pass_stops_early(create_FMPartMgr, option, value) -> None:
+    """A stopping rule ends the pass early, still at its best prefix."""
+    moves = []
+
+    class CountingPartMgr(FMPartMgr):
+        def _optimize_1pass(self, part: Part) -> None:
+            lock = self.gain_mgr.lock
+
+            def counting_lock(whichPart, v):
+                moves.append(v)
+                lock(whichPart, v)
+
+            self.gain_mgr.lock = counting_lock
+            try:
+                super()._optimize_1pass(part)
+            finally:
+                self.gain_mgr.lock = lock
+
+    hyprgraph = read_json("testcases/p1.json")
+    results = {}
+    for limited in (False, True):
+        part = _random_part(hyprgraph, 2, 11)
+        part_mgr = create_FMPartMgr(hyprgraph, 2, 0.45, CountingPartMgr)
+        if limited:
+            setattr(part_mgr, option, value)
+        part_mgr.legalize(part)
+        part_mgr.init(part)
+        totalcostbefore = part_mgr.totalcost
+        moves.clear()
+        part_mgr._optimize_1pass(part)
+        assert part_mgr.totalcost <= totalcostbefore
+        totalcost = part_mgr.totalcost
+        part_mgr.init(part)
+        assert part_mgr.totalcost == totalcost
+        results[limited] = len(moves)
+    assert results[True] < results[False]
+    if option == "max_move_fraction":
+        assert results[True] == int(value * hyprgraph.number_of_modules())
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_reinit_matches_init(create_FMPartMgr, num_parts) -> None:
+    """After a pass, reinit leaves the managers as a full init would."""
+    hyprgraph = read_json("testcases/p1.json")
+    part = _random_part(hyprgraph, num_parts, 7)
+    part_mgr = create_FMPartMgr(hyprgraph, num_parts)
+    part_mgr.legalize(part)
+    part_mgr.init(part)
+    for _ in range(2):
+        moved, undone = part_mgr._optimize_1pass(part)
+        assert undone
+        part_mgr.reinit(part, moved, undone)
+
+    fresh = create_FMPartMgr(hyprgraph, num_parts)
+    fresh.init(part)
+    assert part_mgr.totalcost == fresh.totalcost
+    assert part_mgr.validator.diff == fresh.validator.diff
+    gain_calc = part_mgr.gain_mgr.gain_calc
+    assert gain_calc.pin_count == fresh.gain_mgr.gain_calc.pin_count
+    for bckt, fresh_bckt in zip(
+        part_mgr.gain_mgr.gainbucket, fresh.gain_mgr.gainbucket
+    ):
+        assert list(bckt) == list(fresh_bckt)
+        assert [bckt.get_key(i) for i in bckt] == [
+            fresh_bckt.get_key(i) for i in fresh_bckt
+        ]
+
+
+def test_legalize_keeps_legal_part(create_FMPartMgr) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    part = [v % 2 for v in hyprgraph]
+    part_mgr = create_FMPartMgr(hyprgraph, 2, 0.3)
+    before = list(part)
+    assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+    assert part == before
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_label_propagation(create_FMPartMgr, num_parts) -> None:
+    """Label propagation keeps the cost and the pin counts exact and legal."""
+    hyprgraph = read_json("testcases/p1.json")
+    part = _random_part(hyprgraph, num_parts, 7)
+    part_mgr = create_FMPartMgr(hyprgraph, num_parts)
+    assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+    part_mgr.init(part)
+    totalcostbefore = part_mgr.totalcost
+    assert part_mgr._label_propagation(part) > 0
+    assert part_mgr.totalcost < totalcostbefore
+
+    fresh = create_FMPartMgr(hyprgraph, num_parts)
+    fresh.init(part)
+    assert part_mgr.totalcost == fresh.totalcost
+    assert part_mgr.validator.diff == fresh.validator.diff
+    assert part_mgr.gain_mgr.gain_calc.pin_count == fresh.gain_mgr.gain_calc.pin_count
+    assert fresh.validator.is_legal()
+
+    # converged: another round moves nothing
+    assert part_mgr._label_propagation(part) == 0
+
+    part_mgr.label_propagation = True
+    part_mgr.optimize(part)
+    assert part_mgr.final_check(part)
+    assert part_mgr.totalcost <= fresh.totalcost
+    fresh.init(part)
+    assert part_mgr.totalcost == fresh.totalcost
+
+
+@pytest.mark.parametrize("PartMgr", [FMPartMgr, NNPartMgr])
+def test_deadline(create_FMPartMgr, PartMgr) -> None:
+    """A deadline stops the passes and keeps the legal partition so far."""
+    hyprgraph = read_json("testcases/p1.json")
+    part = _random_part(hyprgraph, 2, 3)
+    part_mgr = create_FMPartMgr(hyprgraph, 2, 0.45, PartMgr)
+    assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+    part_mgr.init(part)
+    totalcostbefore = part_mgr.totalcost
+    unlimited = list(part)
+
+    part_mgr.deadline = time.monotonic()  # already passed
+    part_mgr.optimize(part)
+    assert part_mgr.totalcost == totalcostbefore
+    part_mgr.init(part)
+    assert part_mgr.totalcost == totalcostbefore
+
+    part_mgr.deadline = None
+    part_mgr.optimize(unlimited)
+    assert part_mgr.totalcost < totalcostbefore
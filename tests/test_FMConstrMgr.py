@@ -60,3 +60,14 @@ def test_update_move(mgr) -> None:
     mgr.weight = mgr.get_module_weight(move_info_v[0])
     mgr.update_move(move_info_v)
     assert mgr.diff == [1, 3]
+
+
+def test_ratios() -> None:
+    hyprgraph = MockHyprgraph(6)
+    mgr = FMConstrMgr(hyprgraph, 0.5, [1] * 6, ratios=(1 / 3, 2 / 3))
+    assert mgr.lowerbounds == [2, 4]
+    mgr.init([0, 0, 1, 1, 1, 1])
+    assert mgr.check_legal((0, 0, 1)) == LegalCheck.NotSatisfied
+    assert mgr.check_legal((2, 1, 0)) == LegalCheck.NotSatisfied
+    assert mgr.final_check([0, 0, 1, 1, 1, 1])
+    assert not mgr.final_check([0, 0, 0, 1, 1, 1])
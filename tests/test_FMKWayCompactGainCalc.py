@@ -0,0 +1,56 @@
+from random import randint, seed
+
+import pytest
+from netlistx.netlist import create_drawf, read_json
+
+from ckpttnpy.FMKWayCompactGainCalc import FMKWayCompactGainCalc
+from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
+from ckpttnpy.FMKWayGainCalc import FMKWayGainCalc
+from ckpttnpy.FMKWayGainMgr import FMKWayGainMgr
+from ckpttnpy.FMPartMgr import FMPartMgr
+from ckpttnpy.MLPartMgr import MLKWayNNPartMgr, MLKWayPartMgr
+
+
+@pytest.mark.parametrize("num_parts", [2, 3, 5])
+def test_same_gains(num_parts) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    seed(num_parts)
+    part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    gain_calc = FMKWayCompactGainCalc(hyprgraph, num_parts)
+    reference = FMKWayGainCalc(hyprgraph, num_parts)
+    assert gain_calc.init(part) == reference.init(part)
+    for k in range(num_parts):
+        assert gain_calc.gains(k) == reference.gains(k)
+    assert gain_calc.vertex_list is None
+    assert gain_calc.gain.typecode == "i"
+    assert len(gain_calc.gain) == hyprgraph.number_of_modules() * num_parts
+
+
+def _run_fm(GainCalc, hyprgraph, num_parts, part):
+    gain_mgr = FMKWayGainMgr(GainCalc, hyprgraph, num_parts)
+    constr_mgr = FMKWayConstrMgr(hyprgraph, 0.45, hyprgraph.module_weight, num_parts)
+    part_mgr = FMPartMgr(hyprgraph, gain_mgr, constr_mgr)
+    part_mgr.legalize(part)
+    part_mgr.optimize(part)
+    return part_mgr.totalcost
+
+
+@pytest.mark.parametrize(
+    "create_netlist, num_parts",
+    [(create_drawf, 3), (lambda: read_json("testcases/p1.json"), 4)],
+)
+def test_same_moves(create_netlist, num_parts) -> None:
+    hyprgraph = create_netlist()
+    seed(7)
+    randseq = [randint(0, num_parts - 1) for _ in hyprgraph]
+    part = dict(zip(hyprgraph, randseq))
+    part_ref = dict(part)
+    cost = _run_fm(FMKWayCompactGainCalc, hyprgraph, num_parts, part)
+    cost_ref = _run_fm(FMKWayGainCalc, hyprgraph, num_parts, part_ref)
+    assert cost == cost_ref
+    assert part == part_ref
+
+
+def test_multilevel_default() -> None:
+    assert MLKWayPartMgr(0.45, 3).GainCalc is FMKWayCompactGainCalc
+    assert MLKWayNNPartMgr(0.45, 3).GainCalc is FMKWayCompactGainCalc
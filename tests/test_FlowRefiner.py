@@ -0,0 +1,56 @@
+from random import randint, seed
+
+import pytest
+from netlistx.netlist import read_json
+
+from ckpttnpy.FlowRefiner import FlowRefiner
+from ckpttnpy.FMConstrMgr import LegalCheck
+from ckpttnpy.HierNetlist import cut_cost
+
+
+@pytest.mark.parametrize("num_parts", [2, 3, 4])
+def test_FlowRefiner_after_FM(create_FMPartMgr, num_parts) -> None:
+    """The flows lower the cost of FM's local minima, legally and exactly."""
+    hyprgraph = read_json("testcases/p1.json")
+    totalgain = 0
+    for i in range(3):
+        seed(i)
+        part = [randint(0, num_parts - 1) for _ in hyprgraph]
+        part_mgr = create_FMPartMgr(hyprgraph, num_parts)
+        assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+        part_mgr.optimize(part)
+        totalcostbefore = part_mgr.totalcost
+        assert totalcostbefore == cut_cost(hyprgraph, part)
+
+        gain = FlowRefiner(hyprgraph, part_mgr.validator).refine(part)
+        assert gain >= 0
+        assert cut_cost(hyprgraph, part) == totalcostbefore - gain
+        assert part_mgr.validator.is_legal()
+        totalgain += gain
+    assert totalgain > 0
+
+
+def test_FlowRefiner_keeps_fixed_modules(create_FMPartMgr) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    seed(1)
+    part = [randint(0, 1) for _ in hyprgraph]
+    hyprgraph.module_fixed = set(range(0, hyprgraph.number_of_modules(), 3))
+    part_mgr = create_FMPartMgr(hyprgraph, 2)
+    part_mgr.legalize(part)
+    before = list(part)
+    gain = FlowRefiner(hyprgraph, part_mgr.validator).refine(part)
+    assert gain > 0
+    assert all(part[v] == before[v] for v in hyprgraph.module_fixed)
+
+
+def test_FlowRefiner_zero_slack(create_FMPartMgr) -> None:
+    """Without slack above the lower bounds, nothing may move."""
+    hyprgraph = read_json("testcases/p1.json")
+    part = [2 * v // hyprgraph.number_of_modules() for v in hyprgraph]
+    part_mgr = create_FMPartMgr(hyprgraph, 2)
+    part_mgr.init(part)
+    constr_mgr = part_mgr.validator
+    constr_mgr.lowerbounds = list(constr_mgr.diff)
+    before = list(part)
+    assert FlowRefiner(hyprgraph, constr_mgr).refine(part) == 0
+    assert list(part) == before
@@ -1,11 +1,23 @@
-from random import randint, seed
+import time
+from random import Random, randint, seed
 
+import pytest
 from netlistx.netlist import Netlist, create_drawf, read_json
 
+from ckpttnpy.CSRNetlist import CSRNetlist
+from ckpttnpy.FlowRefiner import FlowRefiner
 from ckpttnpy.FMBiConstrMgr import FMBiConstrMgr
 from ckpttnpy.FMConstrMgr import LegalCheck
 from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
-from ckpttnpy.MLPartMgr import MLBiPartMgr, MLKWayPartMgr
+from ckpttnpy.FMPartMgr import FMPartMgr
+from ckpttnpy.HierNetlist import cut_cost, is_large_net
+from ckpttnpy.min_cover import contract_subgraph
+from ckpttnpy.MLPartMgr import (
+    COARSEST_SIZE_PER_PART,
+    MLBiPartMgr,
+    MLKWayPartMgr,
+    MLPartMgr,
+)
 from tests.mocks import Part
 
 
@@ -90,3 +102,321 @@ def test_MLKWayPartMgr() -> None:
 
 # if __name__ == "__main__":
 #     test_MLKWayPartMgr()
+
+
+def _create_MLPartMgr(num_parts: int):
+    if num_parts == 2:
+        return MLBiPartMgr(0.45)
+    return MLKWayPartMgr(0.45, num_parts)
+
+
+def _run_MLPartMgr(hyprgraph: Netlist, num_parts: int, **options):
+    """
+    The function `_run_MLPartMgr` partitions `hyprgraph` from a seeded random partition, with a
+    multilevel manager whose attributes are set from `options`.
+
+    :param hyprgraph: The netlist to partition
+    :type hyprgraph: Netlist
+    :param num_parts: The number of parts, 2 for `MLBiPartMgr`
+    :type num_parts: int
+    :return: the manager and the resulting partition, checked to be legal and exactly costed.
+    """
+    part_mgr = _create_MLPartMgr(num_parts)
+    part_mgr.limitsize = 7
+    for name, value in options.items():
+        assert hasattr(part_mgr, name)
+        setattr(part_mgr, name, value)
+    seed(5)
+    part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    legal_check = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+    assert legal_check == LegalCheck.AllSatisfied
+    assert part_mgr.totalcost == cut_cost(hyprgraph, part)
+    return part_mgr, part
+
+
+def _levels(part_mgr):
+    return [hgr for hgr, _ in filter(None, part_mgr.hierarchy)]
+
+
+def test_contract_skips_large_nets() -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    hgr = CSRNetlist.from_netlist(hyprgraph)
+    hgr.large_net_threshold = 10
+    large_nets = {net for net in hgr.nets if hgr.ugraph.degree[net] > 10}
+    assert large_nets
+    hgr2, _ = contract_subgraph(hgr, hgr.module_weight, set())
+    assert hgr2.large_net_threshold == 10
+    assert not large_nets.intersection(hgr2.clusters)
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_large_net_threshold(num_parts) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr, _ = _run_MLPartMgr(hyprgraph, num_parts, large_net_threshold=10)
+    assert getattr(hyprgraph, "large_net_threshold", None) is None  # caller untouched
+    levels = _levels(part_mgr)
+    assert len(levels) > 2
+    assert any(is_large_net(levels[0], net) for net in levels[0].nets)
+    for finer, coarser in zip(levels, levels[1:]):
+        assert coarser.large_net_threshold == 10
+        assert not any(is_large_net(finer, net) for net in coarser.clusters)
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+@pytest.mark.parametrize("coarsening", ["heavy_edge", "first_choice"])
+def test_rating_coarsening(coarsening, num_parts) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr, _ = _run_MLPartMgr(hyprgraph, num_parts, coarsening=coarsening)
+    levels = _levels(part_mgr)
+    assert len(levels) > 2
+    cluster_sizes = set()
+    for finer, coarser in zip(levels, levels[1:]):
+        assert not coarser.clusters  # no net is contracted
+        members = [v for cluster in coarser.cluster_members for v in cluster]
+        assert len(members) == len(set(members))
+        assert coarser.number_of_modules() == finer.number_of_modules() - len(
+            members
+        ) + len(coarser.cluster_members)
+        cluster_sizes.update(len(cluster) for cluster in coarser.cluster_members)
+    if coarsening == "heavy_edge":
+        assert cluster_sizes == {2}
+    else:
+        assert max(cluster_sizes) > 2
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+@pytest.mark.parametrize("num_vcycles", [0, 3])
+def test_vcycles(monkeypatch, num_vcycles, num_parts) -> None:
+    """V-cycles run after the first descent while they improve the cost."""
+    run_Partition = MLPartMgr._run_Partition
+    descents = []
+
+    def recording_run_Partition(
+        self, hyprgraph, module_weight, part, vcycle=False, level=None, depth=0, *args
+    ):
+        legalcheck = run_Partition(
+            self, hyprgraph, module_weight, part, vcycle, level, depth, *args
+        )
+        if depth == 0:
+            descents.append((vcycle, self.totalcost))
+        return legalcheck
+
+    monkeypatch.setattr(MLPartMgr, "_run_Partition", recording_run_Partition)
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr, _ = _run_MLPartMgr(hyprgraph, num_parts, num_vcycles=num_vcycles)
+    vcycles = [vcycle for vcycle, _ in descents]
+    costs = [cost for _, cost in descents]
+    assert vcycles == [False] + [True] * (len(descents) - 1)
+    assert costs[-1] == part_mgr.totalcost
+    if num_vcycles == 0:
+        assert len(descents) == 1
+        return
+    assert 2 <= len(descents) <= num_vcycles + 1
+    for before, after in zip(costs[:-2], costs[1:-1]):
+        assert after < before  # every V-cycle but the last one improved
+    assert costs[-1] <= costs[-2]
+    if len(descents) <= num_vcycles:
+        assert costs[-1] == costs[-2]  # stopped without improvement
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_initial_partitioning_portfolio(num_parts) -> None:
+    """Every initial partitioner runs once, on the coarsest level only."""
+    calls = []
+
+    def recording(initial_partitioner):
+        def run(hyprgraph, module_weight, num_parts, part, rng):
+            calls.append((initial_partitioner, hyprgraph, num_parts))
+            initial_partitioner(hyprgraph, module_weight, num_parts, part, rng)
+
+        return run
+
+    hyprgraph = read_json("testcases/p1.json")
+    initial_partitioners = _create_MLPartMgr(num_parts).initial_partitioners
+    assert initial_partitioners
+    part_mgr, _ = _run_MLPartMgr(
+        hyprgraph,
+        num_parts,
+        initial_partitioners=tuple(map(recording, initial_partitioners)),
+    )
+    coarsest = _levels(part_mgr)[-1]
+    assert calls == [
+        (initial_partitioner, coarsest, num_parts)
+        for initial_partitioner in initial_partitioners
+    ]
+
+    # without a portfolio, the projected partition is kept
+    _run_MLPartMgr(hyprgraph, num_parts, initial_partitioners=())
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+@pytest.mark.parametrize("label_propagation", [False, True])
+def test_label_propagation(label_propagation, num_parts) -> None:
+    moves = []
+
+    class RecordingPartMgr(FMPartMgr):
+        def _label_propagation(self, part: Part) -> int:
+            moves.append(super()._label_propagation(part))
+            return moves[-1]
+
+    hyprgraph = read_json("testcases/p1.json")
+    _run_MLPartMgr(
+        hyprgraph,
+        num_parts,
+        PartMgr=RecordingPartMgr,
+        label_propagation=label_propagation,
+    )
+    if label_propagation:
+        assert sum(moves) > 0
+    else:
+        assert not moves
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+@pytest.mark.parametrize("flow_levels", [0, 2])
+def test_flow_levels(monkeypatch, flow_levels, num_parts) -> None:
+    """The flows refine the `flow_levels` finest levels, coarsest first."""
+    refined = []
+
+    class RecordingFlowRefiner(FlowRefiner):
+        def refine(self, part: Part) -> int:
+            gain = super().refine(part)
+            refined.append((self.hyprgraph, gain))
+            return gain
+
+    monkeypatch.setattr("ckpttnpy.MLPartMgr.FlowRefiner", RecordingFlowRefiner)
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr, _ = _run_MLPartMgr(hyprgraph, num_parts, flow_levels=flow_levels)
+    levels = _levels(part_mgr)
+    assert len(levels) > flow_levels
+    assert [hgr for hgr, _ in refined] == levels[:flow_levels][::-1]
+    assert all(gain >= 0 for _, gain in refined)
+
+
+@pytest.mark.parametrize("coarsening", ["matching", "first_choice"])
+def test_cached_hierarchy(coarsening) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    costs = []
+    for _ in range(2):
+        part_mgr = MLBiPartMgr(0.45)
+        part_mgr.coarsening = coarsening
+        part_mgr.limitsize = 7
+        for s in range(3):
+            seed(s)
+            part = [randint(0, 1) for _ in hyprgraph]
+            part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+            costs.append(part_mgr.totalcost)
+    # the second manager builds the same hierarchy once and reuses it
+    assert costs[:3] == costs[3:]
+    hierarchy = part_mgr.hierarchy
+    part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+    assert part_mgr.hierarchy is hierarchy
+
+    part_mgr.build_hierarchy(hyprgraph, hyprgraph.module_weight, Random(1))
+    assert part_mgr.hierarchy is not hierarchy
+    sizes = [level[0].number_of_modules() for level in part_mgr.hierarchy if level]
+    assert sizes == sorted(sizes, reverse=True)
+    legal_check = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+    assert legal_check == LegalCheck.AllSatisfied
+
+
+def test_randomized_coarsening() -> None:
+    """Every run coarsens with its own order, repeated by the same rng seed."""
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr = _create_MLPartMgr(2)
+    part_mgr.randomized_coarsening = True
+    hierarchies = []
+    results = []
+    for s in (1, 2, 1):
+        part_mgr.rng = Random(s)
+        seed(s)
+        part = [randint(0, 1) for _ in hyprgraph]
+        legal_check = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+        assert legal_check == LegalCheck.AllSatisfied
+        assert part_mgr.totalcost == cut_cost(hyprgraph, part)
+        hierarchies.append(part_mgr.hierarchy)
+        results.append((part, part_mgr.totalcost))
+    assert hierarchies[0] is not hierarchies[2]
+    assert results[0] == results[2]
+    part1 = [-1] * hyprgraph.number_of_modules()
+    clusterings = []
+    for hierarchy in hierarchies:
+        hgr1 = hierarchy[1][0]
+        hgr1.projection_down(list(range(hgr1.number_of_modules())), part1)
+        clusterings.append(list(part1))
+    assert clusterings[0] == clusterings[2] != clusterings[1]
+
+
+def test_adaptive_coarsening_limit() -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    for num_parts in [2, 4]:
+        part_mgr = _create_MLPartMgr(num_parts)
+        assert part_mgr.limitsize is None
+        contract = part_mgr._contract
+        contractions = []
+
+        def counting_contract(*args, **kwargs):
+            contractions.append(contract(*args, **kwargs))
+            return contractions[-1]
+
+        part_mgr._contract = counting_contract
+        part_mgr.build_hierarchy(hyprgraph, hyprgraph.module_weight)
+        # every contraction is kept: the coarsening stops before the next one
+        assert len(contractions) == len(part_mgr.hierarchy) - 1
+        assert part_mgr.hierarchy[-1] is not None
+        levels = [hgr for hgr, _ in part_mgr.hierarchy]
+        sizes = [hgr.number_of_modules() for hgr in levels]
+        assert part_mgr._coarsen_further(levels[0])
+        for finer, current in zip(levels, levels[1:-1]):
+            assert part_mgr._coarsen_further(current, finer)
+        assert not part_mgr._coarsen_further(levels[-1], levels[-2])
+        assert sizes == sorted(sizes, reverse=True)
+        ratio = sizes[-1] / sizes[-2]
+        if num_parts == 2:
+            # stopped by the contraction ratio, above the size target
+            assert sizes[-1] >= COARSEST_SIZE_PER_PART * num_parts
+            assert ratio >= part_mgr._max_contraction_ratio(sizes[-1])
+        else:
+            # stopped at the size target
+            assert sizes[-1] < COARSEST_SIZE_PER_PART * num_parts
+            assert ratio < part_mgr._max_contraction_ratio(sizes[-1])
+        # the initial partitioning of a large level costs more to skip
+        assert part_mgr._max_contraction_ratio(
+            sizes[0]
+        ) > part_mgr._max_contraction_ratio(sizes[-1])
+        if num_parts == 2:
+            bi_ratio = part_mgr._max_contraction_ratio(sizes[0])
+        else:
+            assert part_mgr._max_contraction_ratio(sizes[0]) < bi_ratio
+
+        # an explicit limit overrides the adaptive one
+        part_mgr.limitsize = 7
+        part_mgr.build_hierarchy(hyprgraph, hyprgraph.module_weight)
+        sizes = [hgr.number_of_modules() for hgr, _ in filter(None, part_mgr.hierarchy)]
+        for finer, coarser in zip(sizes, sizes[1:]):
+            assert coarser * 3 / 2 < finer
+        assert sizes[-1] < 7 or part_mgr.hierarchy[-1] is None
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_deadline(num_parts) -> None:
+    """Past the deadline, a run only legalizes and keeps that partition."""
+    hyprgraph = read_json("testcases/p1.json")
+    part_mgr, part = _run_MLPartMgr(
+        hyprgraph, num_parts, num_vcycles=2, flow_levels=1, deadline=time.monotonic()
+    )
+    assert len(part_mgr.hierarchy) == 1  # no level below the finest one
+
+    seed(5)
+    legal_part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    gain_mgr = part_mgr.GainMgr(part_mgr.GainCalc, hyprgraph, num_parts)
+    constr_mgr = part_mgr.ConstrMgr(
+        hyprgraph, part_mgr.bal_tol, hyprgraph.module_weight, num_parts
+    )
+    legalizer = part_mgr.PartMgr(hyprgraph, gain_mgr, constr_mgr)
+    assert legalizer.legalize(legal_part) == LegalCheck.AllSatisfied
+    assert part == legal_part
+    assert part_mgr.totalcost == legalizer.totalcost
+
+    unlimited, _ = _run_MLPartMgr(hyprgraph, num_parts, num_vcycles=2, flow_levels=1)
+    assert unlimited.totalcost < part_mgr.totalcost
@@ -0,0 +1,43 @@
+from random import randint, seed
+
+import pytest
+from netlistx.netlist import read_json
+
+from ckpttnpy.FMConstrMgr import LegalCheck
+from ckpttnpy.FMKWayConstrMgr import FMKWayConstrMgr
+from ckpttnpy.HierNetlist import cut_cost
+from ckpttnpy.RBPartMgr import RBPartMgr
+
+
+@pytest.mark.parametrize("num_parts", [2, 3, 4, 5, 7])
+def test_RBPartMgr(num_parts) -> None:
+    hyprgraph = read_json("testcases/p1.json")
+    seed(1)
+    part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    part_mgr = RBPartMgr(0.4, num_parts)
+    part_mgr.bipart_mgr.limitsize = 7
+    legalcheck = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+    assert legalcheck == LegalCheck.AllSatisfied
+    assert set(part) == set(range(num_parts))
+    # net splitting makes the sum of the bisection cuts the (k - 1) cost
+    assert part_mgr.totalcost == cut_cost(hyprgraph, part)
+    constr_mgr = FMKWayConstrMgr(hyprgraph, 0.4, hyprgraph.module_weight, num_parts)
+    assert constr_mgr.final_check(part)
+
+
+def test_deadline() -> None:
+    """Past the deadline, every bisection still splits its modules legally."""
+    import time
+
+    num_parts = 5
+    hyprgraph = read_json("testcases/p1.json")
+    seed(1)
+    part = [randint(0, num_parts - 1) for _ in hyprgraph]
+    part_mgr = RBPartMgr(0.4, num_parts)
+    part_mgr.deadline = time.monotonic()
+    legalcheck = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+    assert legalcheck == LegalCheck.AllSatisfied
+    assert set(part) == set(range(num_parts))
+    assert part_mgr.totalcost == cut_cost(hyprgraph, part)
+    constr_mgr = FMKWayConstrMgr(hyprgraph, 0.4, hyprgraph.module_weight, num_parts)
+    assert constr_mgr.final_check(part)
@@ -1,6 +1,8 @@
 """Tests for CLI module."""
 
 import json
+import random
+import time
 from pathlib import Path
 
 import pytest
@@ -8,12 +10,17 @@ import pytest
 from ckpttnpy.cli import (
     OBJECTIVE_CHOICES,
     PRESET_CHOICES,
+    get_preset_config,
+    make_part_mgr,
     read_hypergraph,
     read_hypergraph_dimacs,
     read_hypergraph_hmetis,
     read_hypergraph_json,
+    run_multi_start,
+    run_one_partition,
     write_partition,
 )
+from ckpttnpy.RBPartMgr import RBPartMgr
 
 
 class TestReadHmetis:
@@ -261,5 +268,105 @@ class TestEdgeCases:
         assert graph.number_of_nodes() == 4
 
 
+class TestMultiStart:
+    """Tests for starts sharing one coarsening hierarchy."""
+
+    @pytest.fixture
+    def ring_hypergraph(self, tmp_path: Path):
+        """A ring of 120 modules with chords, read from hMetis: the graph and the weights."""
+        hgr = tmp_path / "test.hgr"
+        nets = [f"{i} {(i + 1) % 120} {(i * 7) % 120}" for i in range(120)]
+        hgr.write_text("120 120\n" + "\n".join(nets) + "\n")
+        return read_hypergraph_hmetis(str(hgr))
+
+    def test_shared_hierarchy(self, ring_hypergraph) -> None:
+        graph, weights = ring_hypergraph
+        num_modules = len(weights)
+        netlist, part_mgr = make_part_mgr(graph, weights, 0.1, 2, True)
+        assert part_mgr is not None
+        hierarchy = part_mgr.hierarchy
+        assert len(hierarchy) > 1
+        results = [
+            run_one_partition(
+                netlist, part_mgr, weights, num_modules, set(), 2, random.Random(s)
+            )
+            for s in (1, 2, 1)
+        ]
+        assert part_mgr.hierarchy is hierarchy
+        assert results[0] == results[2]
+        assert all(len(part) == num_modules for part, _ in results)
+
+    def test_randomized_coarsening(self, ring_hypergraph) -> None:
+        graph, weights = ring_hypergraph
+        netlist, part_mgr = make_part_mgr(
+            graph, weights, 0.1, 2, True, randomized_coarsening=True
+        )
+        assert part_mgr is not None and part_mgr.hierarchy is None
+        results = [
+            run_one_partition(
+                netlist, part_mgr, weights, 120, set(), 2, random.Random(s)
+            )
+            for s in (1, 2, 1)
+        ]
+        assert part_mgr.hierarchy is None  # every start built its own
+        assert results[0] == results[2]
+        assert all(len(part) == 120 for part, _ in results)
+
+    def test_bisection(self, ring_hypergraph) -> None:
+        assert get_preset_config("large_k")["bisection"]
+        graph, weights = ring_hypergraph
+        netlist, part_mgr = make_part_mgr(graph, weights, 0.4, 5, True, True)
+        assert isinstance(part_mgr, RBPartMgr)
+        part, cost = run_one_partition(
+            netlist, part_mgr, weights, 120, set(), 5, random.Random(1)
+        )
+        assert set(part) == set(range(5))
+        assert cost > 0
+
+    def test_empty(self, tmp_path: Path) -> None:
+        hgr = tmp_path / "test.hgr"
+        hgr.write_text("0 3\n")
+        graph, weights = read_hypergraph_hmetis(str(hgr))
+        netlist, part_mgr = make_part_mgr(graph, weights, 0.1, 2, True)
+        assert netlist is None
+        part, cost = run_one_partition(
+            netlist, part_mgr, weights, 3, set(), 2, random.Random(1)
+        )
+        assert part == [0, 0, 0] and cost == 0
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_run_multi_start(self, ring_hypergraph, executor) -> None:
+        graph, weights = ring_hypergraph
+        netlist, part_mgr = make_part_mgr(graph, weights, 0.1, 2, True)
+        seeds = [1, 2, 3]
+        expected = [
+            run_one_partition(
+                netlist, part_mgr, weights, 120, set(), 2, random.Random(s)
+            )
+            for s in seeds
+        ]
+        results = run_multi_start(
+            netlist, part_mgr, weights, 120, set(), 2, seeds, executor, 2
+        )
+        got = {start: (list(part), cost) for start, part, cost in results}
+        assert [got[start] for start in range(len(seeds))] == expected
+
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_run_multi_start_deadline(self, ring_hypergraph, executor) -> None:
+        graph, weights = ring_hypergraph
+        netlist, part_mgr = make_part_mgr(
+            graph, weights, 0.1, 2, True, deadline=time.monotonic()
+        )
+        assert part_mgr is not None and len(part_mgr.hierarchy) == 1
+        results = list(
+            run_multi_start(
+                netlist, part_mgr, weights, 120, set(), 2, [1, 2, 3, 4], executor, 2
+            )
+        )
+        # only the starts submitted before the first one completed
+        assert sorted(start for start, _, _ in results) == [0, 1]
+        assert all(len(part) == 120 for _, part, _ in results)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+"""Concurrent partitioning runs in one process share no engine state."""
+
+import copy
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+
+import pytest
+from netlistx.netlist import read_json
+
+from ckpttnpy.FMConstrMgr import LegalCheck
+from ckpttnpy.HierNetlist import cut_cost
+from ckpttnpy.MLPartMgr import MLBiPartMgr
+from ckpttnpy.RBPartMgr import RBPartMgr
+
+NUM_JOBS = 3
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """Let the threads interleave every few bytecodes."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.fixture(scope="module")
+def hyprgraph():
+    return read_json("testcases/p1.json")
+
+
+def _run_concurrently(job, seeds):
+    with ThreadPoolExecutor(max_workers=len(seeds)) as executor:
+        return list(executor.map(job, seeds))
+
+
+@pytest.mark.parametrize("num_parts", [2, 3])
+def test_FMPartMgr_threads(create_FMPartMgr, hyprgraph, num_parts) -> None:
+    def job(seed):
+        rng = Random(seed)
+        part = [rng.randint(0, num_parts - 1) for _ in hyprgraph]
+        part_mgr = create_FMPartMgr(hyprgraph, num_parts)
+        assert part_mgr.legalize(part) == LegalCheck.AllSatisfied
+        part_mgr.optimize(part)
+        return list(part), part_mgr.totalcost
+
+    seeds = list(range(NUM_JOBS))
+    expected = [job(seed) for seed in seeds]
+    assert _run_concurrently(job, seeds) == expected
+    for part, cost in expected:
+        assert cost == cut_cost(hyprgraph, part)
+
+
+def test_MLPartMgr_shared_hierarchy_threads(hyprgraph) -> None:
+    """Copies of one manager share its hierarchy, which grows during the runs."""
+    template = MLBiPartMgr(0.45)
+    template.limitsize = 7
+
+    def job(seed):
+        part_mgr = copy.copy(template)
+        part_mgr.rng = Random(seed)
+        part = [part_mgr.rng.randint(0, 1) for _ in hyprgraph]
+        legalcheck = part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+        assert legalcheck == LegalCheck.AllSatisfied
+        return list(part), part_mgr.totalcost
+
+    seeds = list(range(NUM_JOBS))
+    template.run_Partition(  # starts the hierarchy with its finest level only
+        hyprgraph, hyprgraph.module_weight, [0] * hyprgraph.number_of_modules()
+    )
+    template.hierarchy[1:] = []
+    results = _run_concurrently(job, seeds)
+    sizes = [hgr.number_of_modules() for hgr, _ in filter(None, template.hierarchy)]
+    assert all(coarser < finer for finer, coarser in zip(sizes, sizes[1:]))
+    assert results == [job(seed) for seed in seeds]
+
+
+def test_coarser_adds_each_level_once(hyprgraph) -> None:
+    """Two copies that contract the same level at once keep one of the results."""
+    part_mgr = MLBiPartMgr(0.45)
+    part_mgr.limitsize = 7
+    part_mgr._init_hierarchy(hyprgraph, hyprgraph.module_weight)
+    barrier = threading.Barrier(2)
+    contract = part_mgr._contract
+
+    def slow_contract(*args, **kwargs):
+        coarse = contract(*args, **kwargs)
+        barrier.wait(timeout=10)  # both have contracted before either appends
+        return coarse
+
+    part_mgr._contract = slow_contract
+    copies = [copy.copy(part_mgr) for _ in range(2)]
+    levels = _run_concurrently(lambda mgr: mgr._coarser(0), copies)
+    assert len(part_mgr.hierarchy) == 2
+    assert levels[0] is levels[1] is part_mgr.hierarchy[1]
+
+
+def test_RBPartMgr_threads(hyprgraph) -> None:
+    template = RBPartMgr(0.4, 5)
+    template.bipart_mgr.limitsize = 7
+
+    def job(seed):
+        part_mgr = copy.copy(template)
+        part_mgr.bipart_mgr = copy.copy(template.bipart_mgr)
+        part_mgr.bipart_mgr.rng = Random(seed)
+        part = [seed % 5] * hyprgraph.number_of_modules()
+        part_mgr.run_Partition(hyprgraph, hyprgraph.module_weight, part)
+        return list(part), part_mgr.totalcost
+
+    seeds = list(range(NUM_JOBS))
+    assert _run_concurrently(job, seeds) == [job(seed) for seed in seeds]
@@ -0,0 +1,43 @@
+from random import Random
+
+import pytest
+from netlistx.netlist import read_json
+
+from ckpttnpy.CSRNetlist import CSRNetlist
+from ckpttnpy.HierNetlist import cut_cost
+from ckpttnpy.initial_part import (
+    INITIAL_PARTITIONERS,
+    bfs_grow,
+    greedy_grow,
+    random_balanced,
+)
+
+
+@pytest.mark.parametrize("initial_partitioner", INITIAL_PARTITIONERS)
+@pytest.mark.parametrize("num_parts", [2, 3, 5])
+def test_initial_partitioner(initial_partitioner, num_parts) -> None:
+    hyprgraph = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    module_weight = hyprgraph.module_weight
+    hyprgraph.module_fixed = {0, 1}
+    part = [num_parts - 1] * hyprgraph.number_of_modules()
+    part[1] = 0
+    initial_partitioner(hyprgraph, module_weight, num_parts, part, Random(1))
+    assert part[0] == num_parts - 1 and part[1] == 0
+    assert set(part) == set(range(num_parts))
+    weights = [0] * num_parts
+    for v in hyprgraph:
+        weights[part[v]] += module_weight[v]
+    average = sum(weights) / num_parts
+    assert all(weight >= 0.5 * average for weight in weights)
+
+
+def test_growing_beats_random() -> None:
+    hyprgraph = CSRNetlist.from_netlist(read_json("testcases/p1.json"))
+    module_weight = hyprgraph.module_weight
+    costs = {}
+    for initial_partitioner in (greedy_grow, bfs_grow, random_balanced):
+        part = [0] * hyprgraph.number_of_modules()
+        initial_partitioner(hyprgraph, module_weight, 2, part, Random(1))
+        costs[initial_partitioner] = cut_cost(hyprgraph, part)
+    assert costs[greedy_grow] < costs[random_balanced]
+    assert costs[bfs_grow] < costs[random_balanced]
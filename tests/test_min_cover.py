@@ -1,74 +1,7 @@
+import pytest
 from netlistx.netlist import create_drawf
 
-from ckpttnpy.min_cover import (
-    _jaccard_similarity,
-    _minhash_signature,
-    contract_subgraph,
-)
-
-
-def test_minhash_identical_sets() -> None:
-    """Identical sets should have Jaccard similarity = 1.0."""
-    items = list(range(100))
-    sig1 = _minhash_signature(items)
-    sig2 = _minhash_signature(items)
-    sim = _jaccard_similarity(sig1, sig2)
-    assert sim == 1.0
-
-
-def test_minhash_disjoint_sets() -> None:
-    """Disjoint sets should have Jaccard similarity near 0."""
-    sig1 = _minhash_signature(range(0, 100))
-    sig2 = _minhash_signature(range(200, 300))
-    sim = _jaccard_similarity(sig1, sig2)
-    assert sim < 0.05
-
-
-def test_minhash_partial_overlap() -> None:
-    """Partially overlapping sets should have intermediate similarity."""
-    sig1 = _minhash_signature(range(100))
-    sig2 = _minhash_signature(range(50, 150))  # 50% overlap
-    sim = _jaccard_similarity(sig1, sig2)
-    assert 0.3 < sim < 0.8
-
-
-def test_minhash_empty_set() -> None:
-    """Empty sets trivially match (both empty = same set)."""
-    sig = _minhash_signature([])
-    assert _jaccard_similarity(sig, sig) == 1.0
-
-    # One empty, one non-empty
-    sig2 = _minhash_signature([1, 2, 3])
-    assert _jaccard_similarity(sig, sig2) == 0.0
-
-
-def test_minhash_different_sizes() -> None:
-    """Signatures of different sizes should not crash."""
-    sig1 = _minhash_signature(range(100), k=64)
-    sig2 = _minhash_signature(range(100), k=32)
-    sim = _jaccard_similarity(sig1, sig2)
-    assert sim == 1.0  # Same content, compared over min length
-
-
-def test_minhash_signature_length() -> None:
-    """Signature should have the requested length."""
-    sig = _minhash_signature(range(50), k=128)
-    assert len(sig) == 128
-    assert all(isinstance(v, int) for v in sig)
-
-
-def test_minhash_deterministic() -> None:
-    """Same input should produce same signature."""
-    sig1 = _minhash_signature([1, 2, 3, 4, 5])
-    sig2 = _minhash_signature([1, 2, 3, 4, 5])
-    assert sig1 == sig2
-
-
-# def test_max_independent_net() -> None:
-#     # random_graph(ugraph,5,20)
-#     hyprgraph = create_drawf()
-#     _, cost1 = max_independent_net(hyprgraph, hyprgraph.module_weight, set())
-#     assert cost1 == 3
+from ckpttnpy.min_cover import contract_subgraph
 
 
 def test_contract_subgraph() -> None:
@@ -76,7 +9,8 @@ def test_contract_subgraph() -> None:
     hgr2, module_weight2 = contract_subgraph(hyprgraph, hyprgraph.module_weight, set())
     contract_subgraph(hgr2, module_weight2, set())
     assert hgr2.number_of_modules() < 7
-    assert hgr2.number_of_nets() == 1
+    assert hgr2.number_of_nets() == 2  # one copy of the duplicate net is kept
+    assert sorted(hgr2.net_weight.values()) == [2]
     assert hgr2.number_of_pins() < 13
     assert hgr2.get_max_degree() <= 3
     # assert hgr2.get_max_net_degree() <= 3
@@ -84,26 +18,6 @@ def test_contract_subgraph() -> None:
     assert hyprgraph.module_weight["a1"] == 3  # type: ignore[call-overload]  # Original module_weight is a dict
 
 
-# ── Edge case: jaccard_similarity with empty inputs ───────────────
-
-
-def test_jaccard_identical_sets() -> None:
-    sig = _minhash_signature([1, 2, 3])
-    assert _jaccard_similarity(sig, sig) == 1.0
-
-
-def test_jaccard_one_empty() -> None:
-    """_jaccard_similarity should return 0.0 when one signature is empty."""
-    sig1: list = []
-    sig2 = _minhash_signature([1, 2, 3])
-    assert _jaccard_similarity(sig1, sig2) == 0.0
-
-
-def test_jaccard_both_empty() -> None:
-    """_jaccard_similarity should return 0.0 when both signatures are empty."""
-    assert _jaccard_similarity([], []) == 0.0
-
-
 # ── Contract subgraph with non-default net weights ────────────────
 
 
@@ -136,41 +50,137 @@ def test_contract_subgraph_with_weights() -> None:
     assert hgr2.number_of_modules() < 4
 
 
-# ── MinHash duplicate detection with high-pin nets ────────────────
+# ── Duplicate detection with high-pin nets ────────────────────────
 
 
-def test_purge_duplicate_nets_minhash() -> None:
-    """Exercise the minHash branch in purge_duplicate_nets (degree > 5 and <= 200)."""
+def test_purge_duplicate_nets_high_pin() -> None:
+    """High-pin nets are bucketed by their pins like the others, exactly."""
     import networkx as nx
     from netlistx.netlist import Netlist
 
-    from ckpttnpy.min_cover import (
-        LOW_PIN_NET_THRESHOLD,
-        construct_graph,
-        purge_duplicate_nets,
-        setup,
-    )
+    from ckpttnpy.min_cover import construct_graph, purge_duplicate_nets
 
-    num_cells = LOW_PIN_NET_THRESHOLD + 2  # 7 cells to exceed low-pin threshold
     G = nx.Graph()
-    modules = list(range(num_cells))
-    nets = [num_cells, num_cells + 1]  # two nets
+    modules = list(range(9))
+    nets = [9, 10, 11, 12]
     G.add_nodes_from(modules, bipartite=0)
     G.add_nodes_from(nets, bipartite=1)
-    for net in nets:
-        for cell in modules:
-            G.add_edge(net, cell)
-
+    G.add_edges_from([(9, 0), (9, 1)])
+    G.add_edges_from((10, v) for v in [0, 2, 3, 4, 5, 6, 7])
+    G.add_edges_from((11, v) for v in [1, 2, 3, 4, 5, 6, 7])
+    G.add_edges_from((12, v) for v in [1, 2, 3, 4, 5, 6, 8])  # differs in one pin
     hyprgraph = Netlist(G, modules, nets)
-    cluster_weight = {net: 1 for net in hyprgraph.nets}
-    clusters, remaining_nets, cell_list = setup(hyprgraph, cluster_weight, set())
-    ugraph = construct_graph(hyprgraph, remaining_nets, cell_list, clusters)
-    num_modules = len(cell_list) + len(clusters)
-    num_clusters = len(clusters)
 
+    # merging net 9 = {0, 1} turns nets 10 and 11 into the same 7-pin net
+    cell_list = list(range(2, 9))
+    ugraph = construct_graph(hyprgraph, [10, 11, 12], cell_list, [9])
     net_weight, updated_nets = purge_duplicate_nets(
-        hyprgraph, ugraph, remaining_nets, num_clusters, num_modules
+        hyprgraph, ugraph, [10, 11, 12], 1, 8
     )
-    # Should not crash
-    assert isinstance(net_weight, dict)
-    assert isinstance(updated_nets, list)
+    assert len(updated_nets) == 2
+    assert sorted(net_weight.values()) == [2]
+
+
+# ── Rating-based coarsening ───────────────────────────────────────
+
+
+@pytest.mark.parametrize("strategy", ["heavy_edge", "first_choice"])
+def test_contract_subgraph_rating(strategy) -> None:
+    from netlistx.netlist import read_json
+
+    from ckpttnpy.HierNetlist import cut_nets
+    from ckpttnpy.min_cover import MAX_CLUSTER_WEIGHT_FACTOR
+
+    hyprgraph = read_json("testcases/p1.json")
+    module_weight = hyprgraph.module_weight
+    part = [2 * v // hyprgraph.number_of_modules() for v in hyprgraph]
+    forbid = cut_nets(hyprgraph, part)
+    hgr2, module_weight2 = contract_subgraph(hyprgraph, module_weight, forbid, strategy)
+    num_modules = hyprgraph.number_of_modules()
+    assert hgr2.number_of_modules() * 3 / 2 < num_modules
+    assert sum(module_weight2) == sum(module_weight[v] for v in hyprgraph)
+    clustered = [v for cluster in hgr2.cluster_members for v in cluster]
+    assert len(clustered) == len(set(clustered))
+    assert all(len({part[v] for v in cluster}) == 1 for cluster in hgr2.cluster_members)
+    if strategy == "heavy_edge":
+        assert all(len(cluster) == 2 for cluster in hgr2.cluster_members)
+    limit = MAX_CLUSTER_WEIGHT_FACTOR * sum(module_weight) // num_modules
+    num_cells = num_modules - len(clustered)
+    assert all(w <= limit for w in module_weight2[num_cells:])
+
+    # projections map each module to its own cluster
+    part2 = list(range(hgr2.number_of_modules()))
+    part = [-1] * num_modules
+    hgr2.projection_down(part2, part)
+    part_up = [-1] * hgr2.number_of_modules()
+    hgr2.projection_up(part, part_up)
+    assert part_up == part2
+
+
+def test_contract_subgraph_matching_order() -> None:
+    """A shuffled module order randomizes the matching; the same order repeats it."""
+    from random import Random
+
+    from netlistx.netlist import read_json
+
+    hyprgraph = read_json("testcases/p1.json")
+    module_weight = hyprgraph.module_weight
+    clusterings = []
+    for s in (1, 2, 1):
+        order = list(hyprgraph)
+        Random(s).shuffle(order)
+        hgr2, module_weight2 = contract_subgraph(
+            hyprgraph, module_weight, set(), order=order
+        )
+        assert hgr2.number_of_modules() < hyprgraph.number_of_modules()
+        assert sum(module_weight2) == sum(module_weight[v] for v in hyprgraph)
+        part = [-1] * hyprgraph.number_of_modules()
+        hgr2.projection_down(list(range(hgr2.number_of_modules())), part)
+        clusterings.append(part)
+    assert clusterings[0] == clusterings[2]
+    assert clusterings[0] != clusterings[1]
+
+
+def test_contract_subgraph_keeps_partition() -> None:
+    from netlistx.netlist import read_json
+
+    from ckpttnpy.HierNetlist import cut_nets
+
+    hyprgraph = read_json("testcases/p1.json")
+    part = [2 * v // hyprgraph.number_of_modules() for v in hyprgraph]
+    forbid = cut_nets(hyprgraph, part)
+    hgr2, _ = contract_subgraph(hyprgraph, hyprgraph.module_weight, forbid)
+    part2 = [0] * hgr2.number_of_modules()
+    hgr2.projection_up(part, part2)
+    part_down = [-1] * hyprgraph.number_of_modules()
+    hgr2.projection_down(part2, part_down)
+    assert part_down == part
+
+
+def test_contract_subgraph_unknown_strategy() -> None:
+    hyprgraph = create_drawf()
+    with pytest.raises(ValueError):
+        contract_subgraph(hyprgraph, hyprgraph.module_weight, set(), "random")
+
+
+def test_purge_duplicate_nets_keeps_one() -> None:
+    """Duplicate nets collapse into the first one, with the summed weight."""
+    import networkx as nx
+    from netlistx.netlist import Netlist
+
+    from ckpttnpy.min_cover import construct_graph, purge_duplicate_nets
+
+    G = nx.Graph()
+    modules = [0, 1, 2, 3]
+    nets = [4, 5, 6, 7]
+    G.add_nodes_from(modules, bipartite=0)
+    G.add_nodes_from(nets, bipartite=1)
+    G.add_edges_from([(4, 0), (4, 1), (5, 0), (5, 2), (6, 1), (6, 2), (7, 2), (7, 3)])
+    hyprgraph = Netlist(G, modules, nets)
+
+    # merging net 4 = {0, 1} turns nets 5 and 6 into the same net {cluster, 2}
+    cell_list = [2, 3]
+    ugraph = construct_graph(hyprgraph, [5, 6, 7], cell_list, [4])
+    net_weight, updated_nets = purge_duplicate_nets(hyprgraph, ugraph, [5, 6, 7], 1, 3)
+    assert updated_nets == [3, 5]
+    assert net_weight == {3: 2}
@@ -73,3 +73,22 @@ def test_readjson() -> None:
             count_rest += 1
     print(count_2, count_3, count_rest)
     assert count_2 == 494
+
+
+def test_net_tables() -> None:
+    from ckpttnpy.CSRNetlist import CSRNetlist
+    from ckpttnpy.HierNetlist import build_net_tables, net_tables
+
+    hyprgraph = read_json("testcases/p1.json")
+    weight, degree = net_tables(hyprgraph)
+    for net in hyprgraph.nets:
+        assert weight[net] == hyprgraph.get_net_weight(net)
+        assert degree[net] == hyprgraph.ugraph.degree[net]
+
+    hgr = CSRNetlist.from_netlist(create_drawf())
+    hgr.net_weight[hgr.nets[0]] = 5
+    tables = net_tables(hgr)
+    assert net_tables(hgr) is tables  # built once per level
+    assert tables == build_net_tables(hgr)
+    assert tables[0][hgr.nets[0]] == 5
+    assert isinstance(tables[0], tuple)